@@ -13,7 +13,8 @@ from queue import Empty
 
 from fastapi import FastAPI, HTTPException, File, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 
 try:  # pragma: no cover - optional relative import support
@@ -60,16 +61,46 @@ if str(BASE_DIR) not in sys.path:
 
 try:  # pragma: no cover - optional dependencies
     from project.camera import (
+        BACKEND_REDETECT,
+        FER_MODELS,
         EmotionAggregator,
         EmotionVisualizer,
         append_emotion_log,
         cv2 as camera_cv2,
+        model_registry,
     )
 except Exception:  # noqa: BLE001
     EmotionAggregator = None  # type: ignore[assignment]
     EmotionVisualizer = None  # type: ignore[assignment]
     append_emotion_log = None  # type: ignore[assignment]
     camera_cv2 = None  # type: ignore[assignment]
+    model_registry = None  # type: ignore[assignment]
+
+try:  # pragma: no cover
+    from project.camera_broker import get_broker
+    from project.camera_metrics import metrics as camera_metrics
+    from project.frame_ring import RING_ENV, FrameRing, RingVisualizer
+    from project.log_writer import log_writer_stats
+    from project.stream_hub import BOUNDARY, get_stream_hub, stream_params
+except Exception:  # noqa: BLE001
+    get_broker = None  # type: ignore[assignment]
+    get_stream_hub = None  # type: ignore[assignment]
+    log_writer_stats = None  # type: ignore[assignment]
+    camera_metrics = None  # type: ignore[assignment]
+    FrameRing = None  # type: ignore[assignment]
+
+try:  # pragma: no cover
+    from project.emotion_timeline import (
+        TIMELINES_ENABLED,
+        EmotionTimeline,
+        list_timelines,
+        load_timeline,
+        timeline_path,
+        timeline_payload,
+    )
+except Exception:  # noqa: BLE001
+    EmotionTimeline = None  # type: ignore[assignment]
+    TIMELINES_ENABLED = False
 
 try:  # pragma: no cover
     from project.session_runner import (
@@ -98,7 +129,16 @@ except Exception:  # noqa: BLE001
 
 _camera_process: Optional[subprocess.Popen] = None
 _camera_log_handle: Optional[IO[bytes]] = None
-_camera_lock = threading.Lock()
+# Frames and spectra published by the camera process; the broker reads from it while the process runs.
+_camera_ring: Optional[Any] = None
+# Load DeepFace/FER/MediaPipe once at startup instead of on the first camera request.
+PRELOAD_MODELS = os.getenv("CAMERA_PRELOAD_MODELS", "0") == "1"
+# Per-connection overrides: /camera/stream?fps=&width=&quality=
+STREAM_DEFAULTS: Dict[str, Any] = {
+    "fps": float(os.getenv("CAMERA_STREAM_FPS", "15")),
+    "width": int(os.getenv("CAMERA_STREAM_WIDTH", "0")) or None,
+    "quality": int(os.getenv("CAMERA_STREAM_QUALITY", "80")),
+}
 
 
 app = FastAPI(
@@ -142,6 +182,8 @@ class CameraCaptureRequest(BaseModel):
     warmup: float = Field(default=1.5, ge=0.0, le=10.0)
     question: Optional[str] = None
     prompt: Optional[str] = None
+    # Keep the per-frame timeline (default: CAMERA_TIMELINES).
+    timeline: Optional[bool] = None
 
 
 class ConversationStartRequest(BaseModel):
@@ -149,90 +191,98 @@ class ConversationStartRequest(BaseModel):
 
 
 def _camera_stack_available() -> bool:
-    return EmotionVisualizer is not None and EmotionAggregator is not None
+    return EmotionVisualizer is not None and EmotionAggregator is not None and get_broker is not None
 
 
 def _capture_emotions(payload: CameraCaptureRequest) -> Dict[str, Any]:
     if not _camera_stack_available():
         raise RuntimeError("Camera stack unavailable. Install OpenCV/DeepFace dependencies.")
 
-    visualizer = EmotionVisualizer()  # type: ignore[misc]
-    aggregator = EmotionAggregator()  # type: ignore[misc]
+    # Reads scores from the shared pipeline; joins a running stream instead of reopening the camera.
+    keep_timeline = TIMELINES_ENABLED if payload.timeline is None else payload.timeline
+    timeline = EmotionTimeline(meta={"question": payload.question}) if keep_timeline and EmotionTimeline else None
+    aggregator = EmotionAggregator(timeline=timeline)  # type: ignore[misc]
     frames = 0
-
-    def _collect(duration: float, listening: bool) -> None:
-        nonlocal frames
-        if duration <= 0:
-            return
-        end_time = time.time() + duration
-        prev = time.time()
-        visualizer.is_listening = listening
-        while time.time() < end_time:
-            _, scores = visualizer.process_frame()
-            frames += 1
-            now = time.time()
-            aggregator.add(scores, now - prev)
-            prev = now
-
-    try:
-        _collect(payload.warmup, False)
+    # Per face track: aggregator, frames with scores, last timestamp and box.
+    tracks: Dict[int, Dict[str, Any]] = {}
+
+    with get_broker().subscribe(depth=8) as subscription:  # type: ignore[misc]
+
+        def _collect(duration: float) -> None:
+            nonlocal frames
+            if duration <= 0:
+                return
+            end_time = time.time() + duration
+            prev: Optional[float] = None
+            while time.time() < end_time:
+                with camera_metrics.stage("capture_wait"):
+                    item = subscription.get(timeout=min(1.0, max(end_time - time.time(), 0.01)))
+                if item is None:
+                    continue
+                frames += 1
+                camera_metrics.inc("camera_frames_total", source="capture")
+                if item.faces:
+                    camera_metrics.inc("camera_faces_total", len(item.faces), source="capture")
+                aggregator.add(item.scores, item.timestamp - prev if prev is not None else 0.0, item.timestamp)
+                prev = item.timestamp
+                for face in item.faces:
+                    if face.scores is None:
+                        continue
+                    track = tracks.setdefault(
+                        face.track_id, {"aggregator": EmotionAggregator(), "frames": 0, "prev": None}  # type: ignore[misc]
+                    )
+                    track_prev = track["prev"]
+                    track["aggregator"].add(face.scores, item.timestamp - track_prev if track_prev is not None else 0.0)
+                    track.update(frames=track["frames"] + 1, prev=item.timestamp, bbox=list(face.bbox))
+
+        with camera_metrics.stage("capture_warmup"):
+            _collect(payload.warmup)
         aggregator.reset()
-        _collect(payload.seconds, True)
-
-        spectrum = aggregator.summary()
-        dominant = aggregator.dominant()
-        timestamp = datetime.utcnow().isoformat()
-
-        if append_emotion_log:
-            try:
-                append_emotion_log(
-                    {
-                        "question": payload.question or "React emotional check-in",
-                        "transcript": "[camera capture]",
-                        "spectrum": spectrum,
-                        "dominant": dominant,
-                    }
-                )
-            except Exception:
-                pass
-
-        return {
-            "dominant": dominant,
-            "spectrum": spectrum,
-            "frames": frames,
-            "seconds": payload.seconds,
-            "warmup": payload.warmup,
-            "question": payload.question or "React emotional check-in",
-            "prompt": payload.prompt or "Camera-guided emotional read",
-            "timestamp": timestamp,
+        tracks.clear()
+        with camera_metrics.stage("capture_collect"):
+            _collect(payload.seconds)
+
+    spectrum = aggregator.summary()
+    dominant = aggregator.dominant()
+    timeline_id = aggregator.save_timeline("capture")
+    timestamp = datetime.utcnow().isoformat()
+    faces = [
+        {
+            "track_id": track_id,
+            "dominant": track["aggregator"].dominant(),
+            "spectrum": track["aggregator"].summary(),
+            "frames": track["frames"],
+            "bbox": track["bbox"],
         }
-    finally:
+        for track_id, track in sorted(tracks.items())
+    ]
+
+    if append_emotion_log:
         try:
-            visualizer.is_listening = False
+            append_emotion_log(
+                {
+                    "question": payload.question or "React emotional check-in",
+                    "transcript": "[camera capture]",
+                    "spectrum": spectrum,
+                    "dominant": dominant,
+                    **({"timeline": timeline_id} if timeline_id else {}),
+                }
+            )
         except Exception:
             pass
-        visualizer.release()
 
-
-def _frame_stream_generator() -> Any:
-    if camera_cv2 is None:
-        raise RuntimeError("cv2 is unavailable; cannot stream frames.")
-    import numpy as _np  # noqa: F401  # ensure numpy present for cv2 encoding
-
-    visualizer = EmotionVisualizer()  # type: ignore[misc]
-    try:
-        while True:
-            frame, _ = visualizer.process_frame()
-            ret, buffer = camera_cv2.imencode(".jpg", frame)
-            if not ret:
-                continue
-            frame_bytes = buffer.tobytes()
-            yield (
-                b"--frame\r\n"
-                b"Content-Type: image/jpeg\r\n\r\n" + frame_bytes + b"\r\n"
-            )
-    finally:
-        visualizer.release()
+    return {
+        "dominant": dominant,
+        "spectrum": spectrum,
+        "frames": frames,
+        "faces": faces,
+        "seconds": payload.seconds,
+        "warmup": payload.warmup,
+        "question": payload.question or "React emotional check-in",
+        "prompt": payload.prompt or "Camera-guided emotional read",
+        "timestamp": timestamp,
+        "timeline": timeline_id,
+    }
 
 
 def _camera_running() -> bool:
@@ -240,7 +290,7 @@ def _camera_running() -> bool:
 
 
 def _start_camera_process() -> str:
-    global _camera_process, _camera_log_handle
+    global _camera_process, _camera_log_handle, _camera_ring
 
     if not CAMERA_SCRIPT.exists():
         raise RuntimeError(f"Camera script not found at {CAMERA_SCRIPT}")
@@ -251,6 +301,14 @@ def _start_camera_process() -> str:
     python_exec = os.getenv("CAMERA_PYTHON", sys.executable)
     CAMERA_LOG.parent.mkdir(parents=True, exist_ok=True)
     _camera_log_handle = CAMERA_LOG.open("ab")
+    env = os.environ.copy()
+    _close_camera_ring()  # left over from a process that exited on its own
+    if FrameRing is not None and get_broker is not None:
+        _camera_ring = FrameRing.create()
+        env[RING_ENV] = _camera_ring.name
+        ring = _camera_ring
+        # Release the device if the broker holds it; from now on it reads the process's ring.
+        get_broker().set_source(lambda: RingVisualizer(ring))
 
     try:
         _camera_process = subprocess.Popen(
@@ -259,31 +317,53 @@ def _start_camera_process() -> str:
             stdout=_camera_log_handle,
             stderr=subprocess.STDOUT,
             start_new_session=True,
-            env=os.environ.copy(),
+            env=env,
         )
     except Exception:
         _camera_log_handle.close()
         _camera_log_handle = None
+        _close_camera_ring()
         raise
 
     return "started"
 
 
+def _close_camera_ring() -> None:
+    global _camera_ring
+    if _camera_ring is None:
+        return
+    get_broker().set_source(None)  # type: ignore[misc]
+    _camera_ring.close()
+    _camera_ring = None
+
+
 def _stop_camera_process() -> str:
     global _camera_process, _camera_log_handle
     if not _camera_running():
         _camera_process = None
+        _close_camera_ring()
         return "not_running"
 
-    _camera_process.terminate()
-    try:
-        _camera_process.wait(timeout=5)
-        status = "stopped"
-    except subprocess.TimeoutExpired:
-        _camera_process.kill()
-        status = "killed"
+    status = ""
+    if _camera_ring is not None:
+        # Ask through the ring first so the process releases the camera cleanly.
+        _camera_ring.request_stop()
+        try:
+            _camera_process.wait(timeout=2)
+            status = "stopped"
+        except subprocess.TimeoutExpired:
+            pass
+    if not status:
+        _camera_process.terminate()
+        try:
+            _camera_process.wait(timeout=5)
+            status = "stopped"
+        except subprocess.TimeoutExpired:
+            _camera_process.kill()
+            status = "killed"
 
     _camera_process = None
+    _close_camera_ring()
     if _camera_log_handle:
         try:
             _camera_log_handle.close()
@@ -349,7 +429,10 @@ async def stop_camera() -> Dict[str, Any]:
 
 @app.get("/camera/status")
 async def camera_status() -> Dict[str, Any]:
-    return {"running": _camera_running()}
+    broker = get_broker().stats() if get_broker is not None else None
+    stream = get_stream_hub(get_broker()).stats() if get_stream_hub is not None else None
+    ring = _camera_ring.stats() if _camera_ring is not None else None
+    return {"running": _camera_running(), "broker": broker, "stream": stream, "ring": ring}
 
 
 @app.post("/camera/capture")
@@ -357,34 +440,85 @@ async def camera_capture(payload: CameraCaptureRequest) -> Dict[str, Any]:
     if not _camera_stack_available():
         raise HTTPException(status_code=503, detail="Camera stack unavailable on this host.")
 
-    acquired = _camera_lock.acquire(blocking=False)
-    if not acquired:
-        raise HTTPException(status_code=409, detail="Camera is busy. Please try again.")
-
     try:
-        return _capture_emotions(payload)
+        # Collecting blocks for warmup + seconds; keep it off the event loop so streams keep flowing.
+        return await run_in_threadpool(_capture_emotions, payload)
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(status_code=500, detail=str(exc)) from exc
-    finally:
-        _camera_lock.release()
 
 
-@app.get("/camera/stream")
-async def camera_stream() -> StreamingResponse:
-    if not _camera_stack_available():
+@app.get("/camera/models")
+async def camera_models() -> Dict[str, Any]:
+    if model_registry is None:
         raise HTTPException(status_code=503, detail="Camera stack unavailable on this host.")
+    return {"models": model_registry.stats()}
 
-    acquired = _camera_lock.acquire(blocking=False)
-    if not acquired:
-        raise HTTPException(status_code=409, detail="Camera is busy. Please try again.")
 
-    def _generator():
-        try:
-            yield from _frame_stream_generator()
-        finally:
-            _camera_lock.release()
+@app.get("/camera/timelines")
+async def camera_timelines() -> Dict[str, Any]:
+    if EmotionTimeline is None:
+        raise HTTPException(status_code=503, detail="Camera stack unavailable on this host.")
+    return {"timelines": list_timelines()}
 
-    return StreamingResponse(_generator(), media_type="multipart/x-mixed-replace; boundary=frame")
+
+@app.get("/camera/timelines/{timeline_id}", response_model=None)
+async def camera_timeline(timeline_id: str, points: int = 300, format: str = "json") -> Any:
+    """A stored timeline, averaged into at most `points` points (0 = every frame); `format=npz` sends the file."""
+    if EmotionTimeline is None:
+        raise HTTPException(status_code=503, detail="Camera stack unavailable on this host.")
+    try:
+        path = timeline_path(timeline_id)
+        if format == "npz":
+            if not path.is_file():
+                raise FileNotFoundError(timeline_id)
+            return FileResponse(path, media_type="application/octet-stream", filename=path.name)
+        timeline = load_timeline(timeline_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=f"No timeline {timeline_id!r}.") from exc
+    return {"id": timeline_id, **timeline_payload(timeline, max(0, points))}
+
+
+@app.get("/metrics")
+async def metrics_endpoint() -> PlainTextResponse:
+    if camera_metrics is None:
+        raise HTTPException(status_code=503, detail="Camera stack unavailable on this host.")
+    gauges: Dict[str, Dict[Any, float]] = {}
+    if get_broker is not None:
+        broker = get_broker().stats()
+        gauges["camera_broker_running"] = {(): float(broker["running"])}
+        gauges["camera_broker_subscribers"] = {(): float(len(broker["subscribers"]))}
+        gauges["camera_effective_fps"] = {(("source", "broker"),): float(broker["fps"])}
+    if get_stream_hub is not None:
+        for variant in get_stream_hub(get_broker()).stats()["variants"]:
+            labels = (("quality", str(variant["quality"])), ("width", str(variant["width"] or "native")))
+            gauges.setdefault("camera_stream_viewers", {})[labels] = float(variant["viewers"])
+    if log_writer_stats is not None:
+        for writer in log_writer_stats():
+            if writer["last_error"]:
+                labels = (("error", writer["last_error"]), ("log", Path(writer["path"]).name))
+                gauges.setdefault("log_writer_last_error", {})[labels] = float(writer["last_error_at"])
+    if model_registry is not None:
+        gauges["camera_model_loaded"] = {
+            (("model", name),): float(bool(info.get("loaded"))) for name, info in model_registry.stats().items()
+        }
+    return PlainTextResponse(camera_metrics.render(gauges), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/camera/stream")
+async def camera_stream(
+    fps: Optional[float] = None, width: Optional[int] = None, quality: Optional[int] = None
+) -> StreamingResponse:
+    if not _camera_stack_available() or get_stream_hub is None:
+        raise HTTPException(status_code=503, detail="Camera stack unavailable on this host.")
+
+    fps, width, quality = stream_params(fps, width, quality, STREAM_DEFAULTS)
+    hub = get_stream_hub(get_broker())  # type: ignore[misc]
+    return StreamingResponse(
+        hub.stream(fps=fps, width=width, quality=quality),
+        media_type=f"multipart/x-mixed-replace; boundary={BOUNDARY}",
+    )
 
 
 @app.post("/conversation/start")
@@ -472,6 +606,17 @@ async def get_prompt_audio(filename: str):
     return FileResponse(path, media_type="audio/mpeg", filename=filename)
 
 
+@app.on_event("startup")
+def _startup() -> None:
+    if PRELOAD_MODELS and model_registry is not None:
+        # Warm in the background; requests that need a model block until it is ready.
+        # Only the FER variant the configured engines use (MTCNN or not) is worth building.
+        names = [name for name in model_registry.stats() if name != FER_MODELS[not BACKEND_REDETECT]]
+        threading.Thread(target=model_registry.preload, args=(names,), name="model-preload", daemon=True).start()
+
+
 @app.on_event("shutdown")
 def _shutdown() -> None:
     _stop_camera_process()
+    if get_broker is not None:
+        get_broker().close()
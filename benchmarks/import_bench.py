@@ -0,0 +1,89 @@
+"""Cold import cost of the camera modules, plus a check that importing them stays side-effect free.
+
+    python benchmarks/import_bench.py --runs 5 --budget-ms 600
+
+Each run imports the module in a fresh interpreter with `cv2.VideoCapture`
+instrumented. The script exits non-zero when a module opens a capture
+device, pulls in a heavy model stack (MediaPipe, TensorFlow, FER, DeepFace)
+or, with `--budget-ms`, when the median import time exceeds the budget.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+HEAVY_MODULES = ("mediapipe", "tensorflow", "fer", "deepface", "torch")
+
+PROBE = """
+import json, sys, time
+import cv2
+
+opened = []
+_VideoCapture = cv2.VideoCapture
+
+def _recording_capture(*args, **kwargs):
+    opened.append(repr(args))
+    return _VideoCapture(*args, **kwargs)
+
+cv2.VideoCapture = _recording_capture
+started = time.perf_counter()
+__import__(sys.argv[1])
+elapsed = (time.perf_counter() - started) * 1000.0
+heavy = sorted(name for name in sys.modules if name.split(".")[0] in json.loads(sys.argv[2]))
+print(json.dumps({"ms": elapsed, "captures": opened, "heavy": sorted({name.split(".")[0] for name in heavy})}))
+"""
+
+
+def probe(module: str) -> Dict[str, object]:
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE, module, json.dumps(HEAVY_MODULES)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{completed.stderr.strip()}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=["project.camera", "project.camera_broker"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail when the median import exceeds this")
+    args = parser.parse_args(argv)
+
+    failures: List[str] = []
+    print(f"{'module':<28} {'median ms':>10} {'min ms':>8}  side effects")
+    for module in args.modules:
+        results = [probe(module) for _ in range(max(1, args.runs))]
+        timings = [float(result["ms"]) for result in results]
+        captures = results[0]["captures"]
+        heavy = results[0]["heavy"]
+        median = statistics.median(timings)
+        effects = []
+        if captures:
+            effects.append(f"opened capture {', '.join(captures)}")
+        if heavy:
+            effects.append(f"imported {', '.join(heavy)}")
+        print(f"{module:<28} {median:>10.1f} {min(timings):>8.1f}  {'; '.join(effects) or 'none'}")
+        if effects:
+            failures.append(f"{module}: {'; '.join(effects)}")
+        if args.budget_ms is not None and median > args.budget_ms:
+            failures.append(f"{module}: median {median:.1f} ms over the {args.budget_ms:.0f} ms budget")
+
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Latency of the ONNX Runtime emotion backend, float vs int8, without TensorFlow.
+
+    python benchmarks/onnx_backend_bench.py                     # tiny generated model
+    python benchmarks/onnx_backend_bench.py --model emotion.onnx --frames 200
+
+Without `--model` a small FER2013-shaped classifier (1x48x48 grayscale ->
+7 logits) is generated with random weights by `onnx_models.build_tiny_model`,
+so nothing is downloaded; its
+scores are meaningless but its cost and plumbing are real. The int8 variant
+is produced with `emotion_backends.quantize_int8`. The run fails if anything
+imported TensorFlow, DeepFace or FER.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "project"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from emotion_backends import OnnxEmotionBackend, quantize_int8  # noqa: E402
+from emotion_spectrum import EMOTION_KEYS  # noqa: E402
+from onnx_models import build_tiny_model  # noqa: E402
+
+HEAVY_MODULES = ("tensorflow", "deepface", "fer", "keras")
+
+
+def bench(backend: OnnxEmotionBackend, crops, batch_size: int, warmup: int) -> Dict[str, Any]:
+    for crop in crops[:warmup]:
+        backend.analyze(crop)
+    single = []
+    for crop in crops:
+        started = time.perf_counter()
+        scores = backend.analyze(crop)
+        single.append((time.perf_counter() - started) * 1000.0)
+    assert set(scores) <= set(EMOTION_KEYS) and abs(sum(scores.values()) - 1.0) < 1e-3, scores
+    started = time.perf_counter()
+    for offset in range(0, len(crops), batch_size):
+        backend.analyze_batch(crops[offset:offset + batch_size])
+    batched = (time.perf_counter() - started) * 1000.0 / len(crops)
+    single.sort()
+    return {
+        "p50_ms": round(single[len(single) // 2], 3),
+        "mean_ms": round(statistics.fmean(single), 3),
+        "batched_ms_per_crop": round(batched, 3),
+        "model_kb": round(backend.model_path.stat().st_size / 1024, 1),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", type=Path, help="ONNX emotion model; default builds a tiny random one")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--json", type=Path)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(1)
+    crops = [rng.integers(0, 256, (rng.integers(90, 220),) * 2 + (3,), dtype=np.uint8) for _ in range(args.frames)]
+    results: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        source = args.model or build_tiny_model(Path(tmp) / "tiny_emotion.onnx")
+        quantized = quantize_int8(source, Path(tmp) / "emotion.int8.onnx")
+        for variant, path in (("float32", source), ("int8", quantized)):
+            results[variant] = bench(OnnxEmotionBackend(path, name=f"onnx-{variant}"), crops, args.batch_size, args.warmup)
+
+    heavy = sorted(name for name in HEAVY_MODULES if name in sys.modules)
+    results["heavy_modules_imported"] = heavy
+    print(f"{'variant':<8} {'p50':>9} {'mean':>9} {'batched/crop':>13} {'size':>10}")
+    for variant in ("float32", "int8"):
+        row = results[variant]
+        print(
+            f"{variant:<8} {row['p50_ms']:>7.3f}ms {row['mean_ms']:>7.3f}ms "
+            f"{row['batched_ms_per_crop']:>11.3f}ms {row['model_kb']:>8.1f}kB"
+        )
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+    if heavy:
+        print(f"FAIL: imported {', '.join(heavy)}", file=sys.stderr)
+        return 1
+    print("no TensorFlow, DeepFace or FER imported")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
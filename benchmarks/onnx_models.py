@@ -0,0 +1,71 @@
+"""Generated ONNX emotion models for the ONNX backend's benchmark and tests.
+
+Nothing is downloaded: `build_tiny_model` writes a small FER2013-shaped
+classifier with random (or fixed-output) weights. Needs the `onnx` package.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "project"))
+
+from emotion_backends import FER2013_LABELS  # noqa: E402
+
+
+def build_tiny_model(
+    path: Path,
+    hidden: int = 256,
+    seed: int = 0,
+    *,
+    labels: Sequence[str] = FER2013_LABELS,
+    logits: Optional[Sequence[float]] = None,
+) -> Path:
+    """48x48 grayscale NCHW input -> dense -> relu -> dense -> one logit per label, labels in the metadata.
+
+    Weights are random unless `logits` is given; then the output layer is
+    zeroed and every crop yields exactly `logits`.
+    """
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    rng = np.random.default_rng(seed)
+    pixels = 48 * 48
+    classes = len(labels)
+    w2 = (rng.standard_normal((hidden, classes)) * 0.1).astype(np.float32)
+    b2 = np.zeros(classes, dtype=np.float32)
+    if logits is not None:
+        w2[...] = 0.0
+        b2[...] = np.asarray(logits, dtype=np.float32)
+    weights = [
+        numpy_helper.from_array((rng.standard_normal((pixels, hidden)) * 0.02).astype(np.float32), "w1"),
+        numpy_helper.from_array(np.zeros(hidden, dtype=np.float32), "b1"),
+        numpy_helper.from_array(w2, "w2"),
+        numpy_helper.from_array(b2, "b2"),
+        numpy_helper.from_array(np.array([-1, pixels], dtype=np.int64), "flat_shape"),
+    ]
+    nodes = [
+        helper.make_node("Reshape", ["input", "flat_shape"], ["flat"]),
+        helper.make_node("MatMul", ["flat", "w1"], ["h"]),
+        helper.make_node("Add", ["h", "b1"], ["hb"]),
+        helper.make_node("Relu", ["hb"], ["act"]),
+        helper.make_node("MatMul", ["act", "w2"], ["o"]),
+        helper.make_node("Add", ["o", "b2"], ["logits"]),
+    ]
+    graph = helper.make_graph(
+        nodes,
+        "tiny_emotion",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, ["batch", 1, 48, 48])],
+        [helper.make_tensor_value_info("logits", TensorProto.FLOAT, ["batch", classes])],
+        initializer=weights,
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    helper.set_model_props(model, {"labels": ",".join(labels)})
+    onnx.checker.check_model(model)
+    onnx.save(model, str(path))
+    return path
@@ -0,0 +1,327 @@
+"""Per-stage latency of the camera pipeline, runnable headless without a webcam.
+
+    python benchmarks/pipeline_bench.py --source synthetic --frames 200 --json results/pipeline.json
+    python benchmarks/pipeline_bench.py --source clip.mp4 --compare results/pipeline.json
+    python benchmarks/pipeline_bench.py --source frames_dir/ --stages preprocess overlay
+
+Stages: `preprocess` (`preprocess_face_roi`), `fusion` (`EmotionFusionEngine.analyze`),
+`fusion_faces` (`analyze_faces` with 1, 2 and 4 crops per frame), `contour` (`get_face_contour`), `overlay` (face mesh, spectrum panel and
+conversation overlay) and `process_frame` (`EmotionVisualizer.process_frame`
+end to end, analysis inline). Each stage reports latency percentiles and
+fps; peak RSS is sampled after every stage. `--json` writes the results with
+the current commit so runs can be compared with `--compare`.
+
+Synthetic frames contain no real face, so when MediaPipe finds none the
+stages fall back to a fixed face box and contour (detection still runs).
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+PROJECT_DIR = ROOT / "project"
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
+
+import camera  # noqa: E402
+from face_tracking import TrackedFace, contour_bounds  # noqa: E402
+
+STAGES = ("preprocess", "fusion", "fusion_faces", "contour", "overlay", "process_frame")
+# Faces per frame for the `fusion_faces` stage; one batched call each, so cost should grow sublinearly.
+FACE_COUNTS = (1, 2, 4)
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+# -- frame sources ------------------------------------------------------------
+
+
+class SyntheticSource:
+    """Deterministic frames with a face-like blob that drifts a little each frame."""
+
+    def __init__(self, width: int = 640, height: int = 480, seed: int = 0) -> None:
+        rng = np.random.default_rng(seed)
+        self.base = rng.integers(30, 90, (height, width, 3), dtype=np.uint8)
+        self.index = 0
+
+    def read(self) -> Tuple[bool, np.ndarray]:
+        frame = self.base.copy()
+        h, w = frame.shape[:2]
+        cx = w // 2 + int(20 * np.sin(self.index / 15.0))
+        cy = h // 2
+        cv2.ellipse(frame, (cx, cy), (w // 8, h // 5), 0, 0, 360, (150, 180, 220), -1)
+        for dx in (-w // 24, w // 24):
+            cv2.circle(frame, (cx + dx, cy - h // 20), max(w // 80, 2), (40, 40, 40), -1)
+        cv2.ellipse(frame, (cx, cy + h // 12), (w // 30, h // 60), 0, 0, 180, (60, 60, 140), 2)
+        self.index += 1
+        return True, frame
+
+    def isOpened(self) -> bool:
+        return True
+
+    def release(self) -> None:
+        pass
+
+
+class LoopingSource:
+    """Replays preloaded frames (from a clip or an image directory) forever."""
+
+    def __init__(self, frames: List[np.ndarray]) -> None:
+        if not frames:
+            raise ValueError("frame source is empty")
+        self.frames = frames
+        self.index = 0
+
+    def read(self) -> Tuple[bool, np.ndarray]:
+        frame = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        return True, frame.copy()
+
+    def isOpened(self) -> bool:
+        return True
+
+    def release(self) -> None:
+        pass
+
+
+def open_source(spec: str, limit: int, width: int, height: int):
+    """`synthetic`, a video file or a directory of images."""
+    if spec == "synthetic":
+        return SyntheticSource(width, height)
+    path = Path(spec)
+    if path.is_dir():
+        images = sorted(p for p in path.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)[:limit]
+        return LoopingSource([frame for frame in (cv2.imread(str(p)) for p in images) if frame is not None])
+    capture = cv2.VideoCapture(str(path))
+    frames = []
+    while len(frames) < limit:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(frame)
+    capture.release()
+    # Decoded up front so decode cost does not leak into the stages.
+    return LoopingSource(frames)
+
+
+# -- measurement ----------------------------------------------------------------
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def measure(fn: Callable[[int], Any], iterations: int, warmup: int) -> Dict[str, float]:
+    for idx in range(warmup):
+        fn(idx)
+    samples = []
+    for idx in range(iterations):
+        started = time.perf_counter()
+        fn(idx)
+        samples.append((time.perf_counter() - started) * 1000.0)
+    samples.sort()
+    mean = statistics.fmean(samples)
+    return {
+        "n": iterations,
+        "mean_ms": round(mean, 4),
+        "p50_ms": round(percentile(samples, 0.50), 4),
+        "p90_ms": round(percentile(samples, 0.90), 4),
+        "p99_ms": round(percentile(samples, 0.99), 4),
+        "max_ms": round(samples[-1], 4),
+        "fps": round(1000.0 / mean, 1) if mean else 0.0,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+# -- fixtures -------------------------------------------------------------------
+
+
+def fallback_face(shape) -> TrackedFace:
+    h, w = shape[:2]
+    center = (w // 2, h // 2)
+    axes = (w // 8, h // 5)
+    contour = cv2.ellipse2Poly(center, axes, 0, 0, 360, 10).astype(np.int32)
+    return TrackedFace(contour_bounds(contour, shape, pad=0), contour, 1.0, True)
+
+
+def fake_landmarks() -> Any:
+    """468 landmarks on an ellipse, shaped like a MediaPipe NormalizedLandmarkList."""
+    angles = np.linspace(0, 2 * np.pi, 468, endpoint=False)
+    points = [SimpleNamespace(x=0.5 + 0.12 * np.cos(a), y=0.5 + 0.2 * np.sin(a)) for a in angles]
+    return SimpleNamespace(landmark=points)
+
+
+def find_face(frames: List[np.ndarray]) -> Tuple[TrackedFace, Any, bool]:
+    """Face box, landmarks and whether MediaPipe actually found them in `frames`."""
+    with camera.model_registry.lease("face_mesh") as mesh:
+        for frame in frames:
+            results = mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            if results.multi_face_landmarks:
+                landmarks = results.multi_face_landmarks[0]
+                contour = camera.get_face_contour(landmarks, frame.shape)
+                return TrackedFace(contour_bounds(contour, frame.shape), contour, 1.0, True), landmarks, True
+    return fallback_face(frames[0].shape), fake_landmarks(), False
+
+
+def build_visualizer(source) -> Any:
+    def fixed_face(frame):
+        # Detection always runs; the fixed face only stands in when it finds nothing.
+        face = fallback_face(frame.shape)
+        return [(face.bbox, face.contour)]
+
+    return camera.EmotionVisualizer(capture=source, background=False, analysis_stride=1, fallback_detector=fixed_face)
+
+
+# -- runner ---------------------------------------------------------------------
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:  # noqa: BLE001
+        return None
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    source = open_source(args.source, args.frames, args.width, args.height)
+    frames = [source.read()[1] for _ in range(min(args.frames, 32))]
+    face, landmarks, detected = find_face(frames)
+    x1, y1, x2, y2 = face.bbox
+    crops = [frame[y1:y2, x1:x2] for frame in frames]
+    count = len(frames)
+    stages: Dict[str, Dict[str, float]] = {}
+
+    if "preprocess" in args.stages:
+        stages["preprocess"] = measure(
+            lambda idx: camera.preprocess_face_roi(crops[idx % count], camera.PREPROCESS_FIDELITY),
+            args.frames,
+            args.warmup,
+        )
+    if "fusion" in args.stages:
+        engine = camera.EmotionFusionEngine()
+        stages["fusion"] = measure(lambda idx: engine.analyze(crops[idx % count]), args.frames, args.warmup)
+    if "fusion_faces" in args.stages:
+        engine = camera.EmotionFusionEngine()
+        for faces in FACE_COUNTS:
+            stages[f"fusion_x{faces}"] = measure(
+                lambda idx: engine.analyze_faces([crops[(idx + offset) % count] for offset in range(faces)]),
+                args.frames,
+                args.warmup,
+            )
+    if "contour" in args.stages:
+        shape = frames[0].shape
+        stages["contour"] = measure(lambda idx: camera.get_face_contour(landmarks, shape), args.frames, args.warmup)
+    if "overlay" in args.stages:
+        compositor = camera.OverlayCompositor()
+        conversation = camera.ConversationController(camera.QUESTIONS)
+        conversation.start()
+        planner = camera.EmotionAwareTravelPlanner(camera.TRAVEL_DATA_PATH)
+        bridge = camera.ExternalModelBridge()
+        spectrum = camera.normalize_emotion_dict({"happy": 3, "surprise": 1, "neutral": 1})
+        rows = camera.top_emotion_rows(spectrum, limit=4)
+
+        def overlay(idx: int) -> None:
+            frame = frames[idx % count].copy()
+            compositor.draw_mesh(frame, face.bbox, face.contour)
+            compositor.blend_rect(frame, (x2 + 20, y1), (x2 + 220, y1 + 30 + 24 * len(rows)), (20, 20, 20), 0.55)
+            camera.draw_conversation_overlay(frame, conversation, planner, bridge, compositor)
+
+        stages["overlay"] = measure(overlay, args.frames, args.warmup)
+    if "process_frame" in args.stages:
+        visualizer = build_visualizer(source)
+        try:
+            stages["process_frame"] = measure(lambda idx: visualizer.process_frame(draw=True), args.frames, args.warmup)
+        finally:
+            visualizer.release()
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "opencv": cv2.__version__,
+            "source": args.source,
+            "frame_shape": list(frames[0].shape),
+            "face_detected": detected,
+            "fidelity": camera.PREPROCESS_FIDELITY,
+            "pipeline": camera.CAMERA_PIPELINE,
+            # Without these installed, `fusion` only measures preprocessing and dispatch.
+            "backends": {name: importlib.util.find_spec(name) is not None for name in ("deepface", "fer")},
+        },
+        "stages": stages,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def print_report(result: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    meta = result["meta"]
+    print(
+        f"commit {meta['commit']}  source {meta['source']} {tuple(meta['frame_shape'])}  "
+        f"face {'detected' if meta['face_detected'] else 'fallback'}  backends {meta['backends']}"
+    )
+    header = f"{'stage':<14} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'fps':>9} {'rss MB':>8}"
+    if baseline:
+        header += f"  {'p50 vs ' + str(baseline['meta'].get('commit')):>16}"
+    print(header)
+    for name, stats in result["stages"].items():
+        line = (
+            f"{name:<14} {stats['p50_ms']:>9.3f} {stats['p90_ms']:>9.3f} {stats['p99_ms']:>9.3f} "
+            f"{stats['fps']:>9.1f} {stats['peak_rss_mb']:>8.1f}"
+        )
+        previous = (baseline or {}).get("stages", {}).get(name)
+        if previous and previous["p50_ms"]:
+            change = (stats["p50_ms"] - previous["p50_ms"]) / previous["p50_ms"] * 100.0
+            line += f"  {change:>+15.1f}%"
+        print(line)
+    print(f"peak RSS {result['peak_rss_mb']:.1f} MB")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default="synthetic", help="'synthetic', a video file or an image directory")
+    parser.add_argument("--frames", type=int, default=200, help="timed iterations per stage")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--json", type=Path, help="write machine-readable results here")
+    parser.add_argument("--compare", type=Path, help="earlier --json output to diff against")
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    result = run(args)
+    print_report(result, baseline)
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(result, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""Per-fidelity cost of the face preprocessing stage.
+
+    python benchmarks/preprocess_bench.py --sizes 64 128 224 --iterations 500
+
+`legacy` is the pre-stage implementation (fresh CLAHE and buffers on every
+call), kept here as the baseline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import cv2
+import numpy as np
+
+PROJECT_DIR = Path(__file__).resolve().parents[1] / "project"
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.append(str(PROJECT_DIR))
+
+from face_preprocess import FIDELITY_LEVELS, FacePreprocessor  # noqa: E402
+
+
+def legacy_preprocess(face_roi: np.ndarray) -> np.ndarray:
+    h, w = face_roi.shape[:2]
+    face_roi = cv2.resize(face_roi, (int(w * 1.2), int(h * 1.2)), interpolation=cv2.INTER_CUBIC)
+    lab = cv2.cvtColor(face_roi, cv2.COLOR_BGR2LAB)
+    l, a, b = cv2.split(lab)
+    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    l = clahe.apply(l)
+    lab = cv2.merge((l, a, b))
+    enhanced = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
+    return cv2.GaussianBlur(enhanced, (3, 3), 0)
+
+
+def time_per_call(fn: Callable[[np.ndarray], np.ndarray], crops: List[np.ndarray], iterations: int) -> float:
+    for crop in crops:
+        fn(crop)
+    started = time.perf_counter()
+    for idx in range(iterations):
+        fn(crops[idx % len(crops)])
+    return (time.perf_counter() - started) * 1000.0 / iterations
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[64, 128, 224, 320])
+    parser.add_argument("--iterations", type=int, default=300)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    candidates = {"legacy": legacy_preprocess}
+    candidates.update({name: FacePreprocessor(name) for name in FIDELITY_LEVELS})
+    print(f"{'size':>6} " + " ".join(f"{name:>10}" for name in candidates) + "   (ms per crop)")
+    for size in args.sizes:
+        # Jitter the crop size a little, as a tracked face box does between frames.
+        crops = [
+            rng.integers(0, 255, (size + d, size + d // 2, 3), dtype=np.uint8) for d in (0, 2, 5, 3)
+        ]
+        timings = [time_per_call(fn, crops, args.iterations) for fn in candidates.values()]
+        print(f"{size:>6} " + " ".join(f"{value:>10.3f}" for value in timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Cost and agreement of classifying MediaPipe crops directly vs letting the backends re-detect.
+
+    python benchmarks/redetect_bench.py --source clip.mp4 --frames 100 --json results/redetect.json
+
+`aligned` is the default path (`CAMERA_BACKEND_REDETECT=0`): DeepFace with
+`detector_backend='skip'` and FER with the crop passed as its face rectangle.
+`redetect` runs DeepFace's mediapipe detector and FER's MTCNN on every crop,
+as the engine did before. Agreement columns compare the two paths on the same
+crops: how often the top emotion matches and the mean absolute score gap.
+Needs DeepFace and/or FER installed; backends that are missing are skipped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from pipeline_bench import camera, find_face, open_source, percentile  # noqa: E402
+
+
+def time_calls(fn: Callable[[np.ndarray], Any], crops: List[np.ndarray], warmup: int) -> Dict[str, Any]:
+    for crop in crops[:warmup]:
+        fn(crop)
+    samples = []
+    outputs = []
+    for crop in crops:
+        started = time.perf_counter()
+        outputs.append(fn(crop))
+        samples.append((time.perf_counter() - started) * 1000.0)
+    samples.sort()
+    return {
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p50_ms": round(percentile(samples, 0.5), 3),
+        "p90_ms": round(percentile(samples, 0.9), 3),
+        "outputs": outputs,
+    }
+
+
+def agreement(first: List[Any], second: List[Any]) -> Dict[str, Any]:
+    pairs = [(a, b) for a, b in zip(first, second) if a and b]
+    if not pairs:
+        return {"compared": 0, "top1_match": None, "mean_abs_diff": None}
+    matches = 0
+    gaps = []
+    for a, b in pairs:
+        a_vec = camera.normalize_emotion_dict(a).vector
+        b_vec = camera.normalize_emotion_dict(b).vector
+        matches += int(np.argmax(a_vec) == np.argmax(b_vec))
+        gaps.append(float(np.abs(a_vec - b_vec).mean()))
+    return {
+        "compared": len(pairs),
+        "top1_match": round(matches / len(pairs), 3),
+        "mean_abs_diff": round(statistics.fmean(gaps), 4),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default="synthetic", help="'synthetic', a video file or an image directory")
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--json", type=Path)
+    args = parser.parse_args(argv)
+
+    available = {name: importlib.util.find_spec(name) is not None for name in ("deepface", "fer")}
+    if not any(available.values()):
+        print("Neither deepface nor fer is installed; nothing to compare.", file=sys.stderr)
+        return 2
+
+    source = open_source(args.source, args.frames, args.width, args.height)
+    frames = [source.read()[1] for _ in range(args.frames)]
+    face, _, detected = find_face(frames[:32])
+    x1, y1, x2, y2 = face.bbox
+    aligned = camera.EmotionFusionEngine(inference_server=None, redetect=False)
+    redetect = camera.EmotionFusionEngine(inference_server=None, redetect=True)
+    crops = [aligned.preprocess(frame[y1:y2, x1:x2], copy=True) for frame in frames]
+
+    results: Dict[str, Any] = {"source": args.source, "face_detected": detected, "crops": len(crops), "backends": {}}
+    print(f"{len(crops)} crops of {x2 - x1}x{y2 - y1} from {args.source} (face {'detected' if detected else 'fallback'})")
+    print(f"{'backend':<10} {'aligned p50':>12} {'redetect p50':>13} {'speedup':>8} {'top1 match':>11} {'mean |diff|':>12}")
+    for backend, method in (("deepface", "_analyze_with_deepface"), ("fer", "_analyze_with_fer")):
+        if not available[backend]:
+            continue
+        fast = time_calls(getattr(aligned, method), crops, args.warmup)
+        slow = time_calls(getattr(redetect, method), crops, args.warmup)
+        agree = agreement(fast.pop("outputs"), slow.pop("outputs"))
+        speedup = slow["p50_ms"] / fast["p50_ms"] if fast["p50_ms"] else 0.0
+        results["backends"][backend] = {"aligned": fast, "redetect": slow, "speedup": round(speedup, 2), **agree}
+        top1 = "-" if agree["top1_match"] is None else f"{agree['top1_match']:.0%}"
+        gap = "-" if agree["mean_abs_diff"] is None else f"{agree['mean_abs_diff']:.4f}"
+        print(
+            f"{backend:<10} {fast['p50_ms']:>10.2f}ms {slow['p50_ms']:>11.2f}ms {speedup:>7.1f}x {top1:>11} {gap:>12}"
+        )
+
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,7 +6,9 @@ import threading
 from typing import Dict, List, Tuple
 
 from camera import (
+    TIMELINES_ENABLED,
     EmotionAggregator,
+    EmotionTimeline,
     EmotionVisualizer,
     append_emotion_log,
     collect_emotions_until_event,
@@ -45,7 +47,7 @@ def run_question(
 ) -> Dict[str, object]:
     print(f"\nQuestion {question_index}: {question_text}")
 
-    aggregator = EmotionAggregator()
+    aggregator = EmotionAggregator(timeline=EmotionTimeline() if TIMELINES_ENABLED else None)
     print("Warming up emotion detector...")
     warmup_detection(visualizer, aggregator, seconds=warmup_seconds)
     aggregator.reset()
@@ -88,6 +90,9 @@ def run_question(
         "spectrum": spectrum,
         "dominant": dominant,
     }
+    timeline_id = aggregator.save_timeline(f"question{question_index}")
+    if timeline_id:
+        entry["timeline"] = timeline_id
     append_emotion_log(entry)
 
     print(f"Detected emotions: {format_spectrum(spectrum)}")
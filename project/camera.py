@@ -83,24 +83,98 @@
 import os
 
 import cv2
-import mediapipe as mp
-# DeepFace is an optional heavy dependency. Import lazily when needed to avoid
-# pulling in retinaface/tf-keras on module import (which can cause protobuf
-# conflicts in mixed environments).
+# DeepFace, FER and MediaPipe are heavy optional dependencies. They are imported
+# lazily by the model registry loaders below, so importing this module stays
+# cheap and never touches TensorFlow (which can also cause protobuf conflicts
+# in mixed environments).
 DeepFace = None
+FER = None
 import numpy as np
+import threading
 import time
 import textwrap
 import json
 from pathlib import Path
 from collections import deque
-
-SHOW_PREVIEW_WINDOW = os.getenv("CAMERA_SHOW_WINDOW", "0") == "1"
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
 
 try:
-    from fer import FER
+    from .emotion_pool import ProcessPoolEmotionAnalyzer
+    from .emotion_backends import BUILTIN_BACKENDS, EMOTION_BACKENDS, backend_installed, make_backend
+    from .face_preprocess import FacePreprocessor
+    from .emotion_timeline import TIMELINES_ENABLED, EmotionTimeline, save_timeline
+    from .frame_ring import FrameRing
+    from .log_writer import get_log_writer
+    from .fusion_backends import BACKEND_DEADLINE_MS, ConcurrentBackends
+    from .face_tracking import FaceTracker, MultiFaceTracker, TrackedFace, contour_bounds
+    from .overlay import OverlayCompositor, TextLine
+    from .inference_server import InferenceClient
+    from .model_registry import model_registry
+    from .camera_metrics import metrics
+    from .quality_controller import AdaptiveQualityController
+    from .score_gate import ScoreReuseGate
+    from .emotion_spectrum import (
+        EMOTION_KEYS,
+        RunningMean,
+        Spectrum,
+        WeightedAccumulator,
+        mix_matrix,
+        normalize_vector,
+        ranked_items,
+        to_vector,
+    )
 except ImportError:
-    FER = None
+    from emotion_pool import ProcessPoolEmotionAnalyzer
+    from emotion_backends import BUILTIN_BACKENDS, EMOTION_BACKENDS, backend_installed, make_backend
+    from face_preprocess import FacePreprocessor
+    from emotion_timeline import TIMELINES_ENABLED, EmotionTimeline, save_timeline
+    from frame_ring import FrameRing
+    from log_writer import get_log_writer
+    from fusion_backends import BACKEND_DEADLINE_MS, ConcurrentBackends
+    from face_tracking import FaceTracker, MultiFaceTracker, TrackedFace, contour_bounds
+    from overlay import OverlayCompositor, TextLine
+    from inference_server import InferenceClient
+    from model_registry import model_registry
+    from camera_metrics import metrics
+    from quality_controller import AdaptiveQualityController
+    from score_gate import ScoreReuseGate
+    from emotion_spectrum import (
+        EMOTION_KEYS,
+        RunningMean,
+        Spectrum,
+        WeightedAccumulator,
+        mix_matrix,
+        normalize_vector,
+        ranked_items,
+        to_vector,
+    )
+
+SHOW_PREVIEW_WINDOW = os.getenv("CAMERA_SHOW_WINDOW", "0") == "1"
+# Inference runs on a worker thread by default so capture keeps the camera's frame rate.
+BACKGROUND_ANALYSIS = os.getenv("CAMERA_BACKGROUND_ANALYSIS", "1") == "1"
+ANALYSIS_STRIDE = int(os.getenv("CAMERA_ANALYSIS_STRIDE", "2"))
+ANALYSIS_QUEUE_DEPTH = int(os.getenv("CAMERA_ANALYSIS_QUEUE_DEPTH", "1"))
+# Opt-in: >0 moves inference into that many worker processes (one warm engine each).
+INFERENCE_WORKERS = int(os.getenv("CAMERA_INFERENCE_WORKERS", "0"))
+# Address of a shared `inference_server` host; when set, engines forward crops instead of loading models.
+INFERENCE_SERVER = os.getenv("CAMERA_INFERENCE_SERVER") or None
+# Tracker mode: full MediaPipe detection every N frames, optical-flow tracking in between.
+FACE_TRACKING = os.getenv("CAMERA_FACE_TRACKING", "0") == "1"
+REDETECT_INTERVAL = int(os.getenv("CAMERA_REDETECT_INTERVAL", "5"))
+# Faces tracked and classified per frame; all of them go through the backends in one batch.
+MAX_FACES = int(os.getenv("CAMERA_MAX_FACES", "4"))
+# "detection" runs FaceDetection for the box plus FaceMesh for the contour;
+# "landmarks" runs FaceMesh alone and derives the box from the face oval.
+PIPELINE_MODES = ("detection", "landmarks")
+CAMERA_PIPELINE = os.getenv("CAMERA_PIPELINE", "detection")
+# Face crop preprocessing level, see `face_preprocess.FIDELITY_LEVELS` ("full", "balanced", "fast", "off").
+PREPROCESS_FIDELITY = os.getenv("CAMERA_PREPROCESS_FIDELITY", "full")
+# MediaPipe has already localized the face, so by default the backends classify the crop as-is.
+# Set to 1 to let DeepFace (mediapipe) and FER (MTCNN) detect the face inside the crop again.
+BACKEND_REDETECT = os.getenv("CAMERA_BACKEND_REDETECT", "0") == "1"
+# Registry entry for FER by `redetect`: MTCNN is only built for engines that let FER find the face.
+FER_MODELS = {False: "fer", True: "fer_mtcnn"}
 
 # Landmark indices that approximate the outer contour of a face oval
 FACE_OVAL_LANDMARKS = [
@@ -109,9 +183,6 @@ FACE_OVAL_LANDMARKS = [
     172, 58, 132, 93, 234, 127, 162, 21, 54, 103, 67, 109
 ]
 
-# Base classes returned by DeepFace
-EMOTION_KEYS = ["angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"]
-
 EMOTION_LOG = Path("project/emotion_results.jsonl")
 
 # Simple Plutchik-inspired combinations for richer states without retraining.
@@ -141,27 +212,21 @@ QUESTIONS = [
 
 
 def normalize_emotion_dict(raw_scores):
-    total = sum(raw_scores.values())
-    total = total if total else 1.0
-    normalized = {}
-    for key in EMOTION_KEYS:
-        normalized[key] = raw_scores.get(key, 0.0) / total
-    return normalized
+    """Scale raw model scores (dict or `Spectrum`) to sum to 1 over `EMOTION_KEYS`."""
+    return Spectrum(normalize_vector(to_vector(raw_scores)))
 
 
 def append_emotion_log(entry: dict) -> None:
-    EMOTION_LOG.parent.mkdir(parents=True, exist_ok=True)
+    # Queued for the background writer, which batches, rotates and compresses the file.
     payload = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), **entry}
-    with EMOTION_LOG.open("a", encoding="utf-8") as handle:
-        handle.write(json.dumps(payload) + "\n")
+    get_log_writer(EMOTION_LOG).write(json.dumps(payload))
 
 
 def format_spectrum(spectrum: dict, top: int = 3) -> str:
     if not spectrum:
         return ""
-    items = sorted(spectrum.items(), key=lambda kv: kv[1], reverse=True)
     parts = []
-    for emotion, value in items[:top]:
+    for emotion, value in ranked_items(spectrum, top):
         perc = int(round(value * 100))
         if perc <= 0:
             continue
@@ -172,7 +237,7 @@ def format_spectrum(spectrum: dict, top: int = 3) -> str:
 def top_emotion_rows(spectrum, limit=3):
     if not spectrum:
         return []
-    items = sorted(spectrum.items(), key=lambda kv: kv[1], reverse=True)
+    items = ranked_items(spectrum)
     if not items:
         return []
     if max(value for _, value in items) <= 1e-6:
@@ -194,78 +259,91 @@ def top_emotion_rows(spectrum, limit=3):
 class EmotionSmoother:
     def __init__(self, keys, window=15):
         self.keys = keys
-        self.history = deque(maxlen=window)
+        self.history = RunningMean(window, len(keys))
 
     def reset(self):
-        self.history.clear()
+        self.history.reset()
 
     def update(self, raw_scores):
-        normalized = normalize_emotion_dict(raw_scores)
-        self.history.append(normalized)
+        self.history.push(normalize_vector(to_vector(raw_scores)))
         return self.average()
 
     def has_data(self):
-        return len(self.history) > 0
+        return self.history.count > 0
 
     def average(self):
-        if not self.history:
-            return {key: 0.0 for key in self.keys}
-        avg = {key: 0.0 for key in self.keys}
-        for entry in self.history:
-            for key in self.keys:
-                avg[key] += entry.get(key, 0.0)
-        count = len(self.history)
-        return {key: value / count for key, value in avg.items()}
+        return Spectrum(self.history.mean(), self.keys)
 
 
 class EmotionAggregator:
-    def __init__(self):
-        self.reset()
+    """Weighted mean spectrum of a question or capture.
+
+    With a `timeline` (see `emotion_timeline`), every frame passed to `add()`,
+    including frames without scores, is also kept per frame.
+    """
+
+    def __init__(self, timeline=None):
+        self.totals = WeightedAccumulator()
+        self.timeline = timeline
+
+    @property
+    def weight(self):
+        return self.totals.weight
 
     def reset(self):
-        self.totals = {key: 0.0 for key in EMOTION_KEYS}
-        self.weight = 0.0
+        self.totals.reset()
+        if self.timeline is not None:
+            self.timeline.reset()
 
-    def add(self, scores, delta):
+    def add(self, scores, delta, timestamp=None):
+        if self.timeline is not None:
+            self.timeline.append(scores, timestamp)
         if not scores:
             return
         weight = delta if delta and delta > 0 else 1.0
-        for key in self.totals:
-            self.totals[key] += scores.get(key, 0.0) * weight
-        self.weight += weight
+        self.totals.add(to_vector(scores), weight)
+
+    def add_batch(self, score_vectors, deltas):
+        """Fold an `(n, len(EMOTION_KEYS))` array of spectra in one weighted sum."""
+        deltas = np.asarray(deltas, dtype=np.float64)
+        self.totals.add_many(score_vectors, np.where(deltas > 0, deltas, 1.0))
+        if self.timeline is not None:
+            # No per-frame times in a batch; space rows by their deltas.
+            elapsed = np.cumsum(np.where(deltas > 0, deltas, 0.0))
+            start = time.monotonic()
+            for vector, offset in zip(np.asarray(score_vectors), elapsed):
+                self.timeline.append(vector, start + offset)
+
+    def save_timeline(self, kind):
+        """Store the timeline (see `emotion_timeline.save_timeline`); None without one or when empty."""
+        return save_timeline(self.timeline, kind) if self.timeline is not None else None
+
+    def spectrum(self):
+        return Spectrum(self.totals.mean())
 
     def summary(self):
-        if self.weight <= 0:
-            return {key: 0.0 for key in EMOTION_KEYS}
-        return {key: value / self.weight for key, value in self.totals.items()}
+        return self.spectrum().to_dict()
 
     def dominant(self):
-        spectrum = self.summary()
-        if not spectrum:
-            return "neutral"
-        return max(spectrum, key=spectrum.get)
+        return self.spectrum().dominant()[0]
 
 class ComplexEmotionResolver:
     def __init__(self, mixes):
         self.mixes = mixes
+        self.labels, self.matrix = mix_matrix(mixes)
+        self.all_labels = tuple(EMOTION_KEYS) + self.labels
 
     def derive_complex_emotions(self, base_scores):
-        complex_scores = {}
-        for label, components in self.mixes.items():
-            values = [base_scores.get(name, 0.0) for name in components]
-            if not values:
-                continue
-            complex_scores[label] = sum(values) / len(values)
-        return complex_scores
+        return Spectrum(self.matrix @ to_vector(base_scores), self.labels)
 
     def pick_label(self, base_scores):
-        complex_scores = self.derive_complex_emotions(base_scores)
-        combined = dict(base_scores)
-        combined.update(complex_scores)
-        if not combined:
-            return "unknown", 0.0, complex_scores
-        label = max(combined, key=combined.get)
-        return label, combined[label], complex_scores
+        base = to_vector(base_scores)
+        mixed = self.matrix @ base
+        complex_scores = Spectrum(mixed, self.labels)
+        # First maximum wins, base emotions before mixes, as with max() over a dict.
+        combined = np.concatenate((base, mixed))
+        idx = int(np.argmax(combined))
+        return self.all_labels[idx], float(combined[idx]), complex_scores
 
 
 class ConversationController:
@@ -287,9 +365,10 @@ class ConversationController:
         self.live_label = "waiting"
         self.live_confidence = 0.0
         self.live_blend = ""
-        self.current_histogram = self._blank_histogram()
-        self.histogram_total = 0.0
-        self.live_spectrum = {key: 0.0 for key in EMOTION_KEYS}
+        self.current_histogram = WeightedAccumulator()
+        # Per-frame record of the current answer when CAMERA_TIMELINES=1.
+        self.timeline = EmotionTimeline() if TIMELINES_ENABLED else None
+        self.live_spectrum = Spectrum()
 
     def start(self):
         self._advance_to_prompt()
@@ -301,7 +380,7 @@ class ConversationController:
             return
         self.state = "prompt"
         self.state_started_at = time.time()
-        self.live_spectrum = {key: 0.0 for key in EMOTION_KEYS}
+        self.live_spectrum = Spectrum()
 
     def update_state(self):
         now = time.time()
@@ -320,15 +399,16 @@ class ConversationController:
 
         return None
 
-    def record_result(self, label, confidence, spectrum):
-        self.results.append(
-            {
-                "question": self.current_question_text(),
-                "label": label,
-                "confidence": confidence,
-                "spectrum": spectrum,
-            }
-        )
+    def record_result(self, label, confidence, spectrum, timeline=None):
+        result = {
+            "question": self.current_question_text(),
+            "label": label,
+            "confidence": confidence,
+            "spectrum": spectrum.to_dict() if isinstance(spectrum, Spectrum) else spectrum,
+        }
+        if timeline is not None:
+            result["timeline"] = timeline
+        self.results.append(result)
 
     def current_question_text(self):
         if 0 <= self.current_index < len(self.questions):
@@ -347,28 +427,35 @@ class ConversationController:
     def state_label(self):
         return self.state.upper()
 
+    @property
+    def histogram_total(self):
+        return self.current_histogram.weight
+
     def start_histogram(self):
-        self.current_histogram = self._blank_histogram()
-        self.histogram_total = 0.0
-        self.live_spectrum = {key: 0.0 for key in EMOTION_KEYS}
+        self.current_histogram.reset()
+        if self.timeline is not None:
+            self.timeline.reset()
+        self.live_spectrum = Spectrum()
 
     def accumulate_scores(self, scores, weight):
+        if self.timeline is not None:
+            self.timeline.append(scores)
         if weight <= 0 or not scores:
             weight = 1.0
-        for key in self.current_histogram:
-            self.current_histogram[key] += scores.get(key, 0.0) * weight
-        self.histogram_total += weight
+        self.current_histogram.add(to_vector(scores), weight)
+
+    def accumulate_missing(self):
+        """A listening frame without a scored face; only the timeline notes it."""
+        if self.timeline is not None:
+            self.timeline.append(None)
 
     def finalize_histogram(self):
-        if self.histogram_total <= 0:
-            return self._blank_histogram()
-        return {
-            key: value / self.histogram_total
-            for key, value in self.current_histogram.items()
-        }
+        return Spectrum(self.current_histogram.mean())
 
-    def _blank_histogram(self):
-        return {key: 0.0 for key in EMOTION_KEYS}
+    def save_timeline(self):
+        if self.timeline is None:
+            return None
+        return save_timeline(self.timeline, f"question{self.current_index + 1}")
 
     def force_finalize(self):
         if self.state == "listening":
@@ -378,74 +465,191 @@ class ConversationController:
         return None
 
 
-def preprocess_face_roi(face_roi):
-    """Enhance contrast to help downstream emotion models."""
-    if face_roi is None or face_roi.size == 0:
-        return face_roi
-
-    # Slight upscaling improves small faces.
-    h, w = face_roi.shape[:2]
-    scale = 1.2
-    face_roi = cv2.resize(face_roi, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_CUBIC)
+_preprocessors = {}
 
-    lab = cv2.cvtColor(face_roi, cv2.COLOR_BGR2LAB)
-    l, a, b = cv2.split(lab)
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-    l = clahe.apply(l)
-    lab = cv2.merge((l, a, b))
-    enhanced = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
-    return cv2.GaussianBlur(enhanced, (3, 3), 0)
 
+def preprocess_face_roi(face_roi, fidelity="full"):
+    """Enhance contrast to help downstream emotion models; returns a new array."""
+    preprocessor = _preprocessors.get(fidelity)
+    if preprocessor is None:
+        preprocessor = _preprocessors.setdefault(fidelity, FacePreprocessor(fidelity))
+    return preprocessor(face_roi, copy=True)
 
-class EmotionFusionEngine:
-    """Fuses DeepFace with optional FER detector for higher precision."""
 
-    def __init__(self):
-        self.fer_detector = FER(mtcnn=True) if FER else None
+# Gap between tiles when several crops share one FER call; wider than FER's crop offsets.
+FER_MOSAIC_GAP = 32
 
-    def analyze(self, face_roi):
-        if face_roi is None or face_roi.size == 0:
-            return {}
 
-        prepared = preprocess_face_roi(face_roi)
-        score_sets = []
+class EmotionFusionEngine:
+    """Fuses DeepFace with optional FER detector for higher precision.
+
+    `backends` lists "deepface", "fer", "onnx" or `EmotionBackend` instances
+    (default `CAMERA_EMOTION_BACKENDS`). `analyze()` runs them concurrently,
+    each bounded by `deadline_ms`, and averages whatever answered using
+    `weights` (`CAMERA_FUSION_WEIGHTS` by default). Crops that barely differ
+    from the last analyzed one reuse its scores (`reuse_gate`, see
+    `score_gate`). With `inference_server` set, crops are forwarded to a
+    shared `inference_server` host and no models are loaded in this process.
+    """
 
-        deepface_scores = self._analyze_with_deepface(prepared)
-        if deepface_scores:
-            score_sets.append(deepface_scores)
+    def __init__(
+        self,
+        inference_server=INFERENCE_SERVER,
+        fidelity=PREPROCESS_FIDELITY,
+        redetect=BACKEND_REDETECT,
+        deadline_ms=BACKEND_DEADLINE_MS,
+        weights=None,
+        backends=None,
+        reuse_gate=None,
+    ):
+        self.remote = InferenceClient(inference_server) if inference_server else None
+        self.redetect = redetect
+        self.reuse_gate = reuse_gate if reuse_gate is not None else ScoreReuseGate()
+        analyzers = {}
+        self._batch_analyzers = {}
+        for spec in EMOTION_BACKENDS if backends is None else backends:
+            if spec in BUILTIN_BACKENDS:
+                analyzers[spec] = getattr(self, f"_analyze_with_{spec}")
+                self._batch_analyzers[spec] = getattr(self, f"_analyze_batch_with_{spec}")
+            elif self.remote is None:
+                backend = make_backend(spec)
+                analyzers[backend.name] = backend.analyze
+                self._batch_analyzers[backend.name] = backend.analyze_batch
+        self.backends = ConcurrentBackends(analyzers, deadline_ms=deadline_ms, weights=weights)
+        # One pass per crop feeds every backend; buffers are reused between frames.
+        self.preprocess = FacePreprocessor(fidelity)
+        # Shared, lock-guarded handle: every engine in the process reuses one FER model.
+        self.fer_detector = (
+            model_registry.get(FER_MODELS[bool(redetect)]) if self.remote is None and "fer" in analyzers else None
+        )
+        # The quality controller turns FER off under load; DeepFace alone still yields a spectrum.
+        self.use_fer = True
 
-        fer_scores = self._analyze_with_fer(prepared)
-        if fer_scores:
-            score_sets.append(fer_scores)
+    def set_fidelity(self, fidelity):
+        if fidelity != self.preprocess.fidelity:
+            self.preprocess = FacePreprocessor(fidelity)
 
-        if not score_sets:
+    def analyze(self, face_roi, deadline_ms=None):
+        """Fused scores for one crop; `deadline_ms` overrides the engine's budget (0 waits for both)."""
+        if face_roi is None or face_roi.size == 0:
+            return {}
+        if not self.reuse_gate.enabled:
+            return self._analyze(face_roi, deadline_ms)
+        with metrics.stage("reuse_gate"):
+            scores, thumbnail = self.reuse_gate.lookup(face_roi)
+        if thumbnail is None:
+            return scores
+        scores = self._analyze(face_roi, deadline_ms)
+        self.reuse_gate.store(thumbnail, scores)
+        return scores
+
+    def analyze_faces(self, face_rois, gates=None, deadline_ms=None):
+        """Scores for every face in one frame.
+
+        Each crop is checked against its own reuse gate (`gates[i]`, e.g. one
+        per face track); the rest are classified together. A single crop
+        takes the concurrent `analyze()` path with its deadline, several go
+        through `analyze_batch()` so each backend runs once per frame.
+        """
+        face_rois = list(face_rois)
+        gates = list(gates) if gates is not None else [None] * len(face_rois)
+        results = [{} for _ in face_rois]
+        pending = []
+        for idx, (face_roi, gate) in enumerate(zip(face_rois, gates)):
+            if face_roi is None or face_roi.size == 0:
+                continue
+            thumbnail = None
+            if gate is not None and gate.enabled:
+                with metrics.stage("reuse_gate"):
+                    scores, thumbnail = gate.lookup(face_roi)
+                if thumbnail is None:
+                    results[idx] = scores
+                    continue
+            pending.append((idx, thumbnail))
+        if not pending:
+            return results
+        if len(pending) == 1:
+            fresh = [self._analyze(face_rois[pending[0][0]], deadline_ms)]
+        else:
+            fresh = self.analyze_batch([face_rois[idx] for idx, _ in pending])
+        for (idx, thumbnail), scores in zip(pending, fresh):
+            results[idx] = scores
+            if thumbnail is not None:
+                gates[idx].store(thumbnail, scores)
+        return results
+
+    def _analyze(self, face_roi, deadline_ms):
+        if self.remote is not None:
+            return self.remote.analyze(face_roi)
+
+        with metrics.stage("preprocess"):
+            # Copy: a backend that misses the deadline is still reading this crop when the next frame reuses the buffers.
+            prepared = self.preprocess(face_roi, copy=True)
+        with metrics.stage("backends"):
+            scores = self.backends.run(prepared, self._enabled_backends(), deadline_ms)
+        return self._fuse(scores)
+
+    def _enabled_backends(self):
+        return [name for name in self._batch_analyzers if name != "fer" or self.use_fer]
+
+    def close(self):
+        """Stop the backend worker threads (and drop the inference server connection)."""
+        self.backends.close()
+        if self.remote is not None:
+            self.remote.close()
+
+    def backend_stats(self):
+        stats = self.backends.stats() if self.remote is None else {}
+        stats["reuse"] = self.reuse_gate.stats()
+        return stats
+
+    def analyze_batch(self, face_rois):
+        """Analyze several crops, running each classifier once for the whole batch."""
+        face_rois = list(face_rois)
+        if self.remote is not None:
+            return self.remote.analyze_batch(face_rois)
+
+        results = [{} for _ in face_rois]
+        valid = [idx for idx, roi in enumerate(face_rois) if roi is not None and roi.size > 0]
+        if not valid:
+            return results
+        # Copies: the batch holds every prepared crop at once.
+        with metrics.stage("preprocess", mode="batch"):
+            prepared = [self.preprocess(face_rois[idx], copy=True) for idx in valid]
+        score_sets = {}
+        for name in self._enabled_backends():
+            with metrics.stage(name, mode="batch"):
+                score_sets[name] = self._batch_analyzers[name](prepared)
+        for position, idx in enumerate(valid):
+            results[idx] = self._fuse({name: sets[position] for name, sets in score_sets.items()})
+        return results
+
+    def _fuse(self, scores_by_backend):
+        weights = self.backends.weights
+        named = [
+            (name, scores)
+            for name, scores in scores_by_backend.items()
+            if scores and weights.get(name, 1.0) > 0
+        ]
+        if not named:
             return {}
 
-        combined = {key: 0.0 for key in EMOTION_KEYS}
-        for scores in score_sets:
-            normalized = normalize_emotion_dict(scores)
-            for key in EMOTION_KEYS:
-                combined[key] += normalized.get(key, 0.0)
-
-        count = len(score_sets)
-        return {key: value / count for key, value in combined.items()}
+        stacked = np.stack([normalize_vector(to_vector(scores)) for _, scores in named])
+        # Renormalized over the backends that answered, so a dropped backend does not shrink the spectrum.
+        factors = np.array([weights.get(name, 1.0) for name, _ in named], dtype=np.float32)
+        return Spectrum(factors @ stacked / factors.sum())
 
     def _analyze_with_deepface(self, face_roi):
-        # Import DeepFace lazily; if not available or it errors, gracefully skip.
-        global DeepFace
-        if DeepFace is None:
-            try:
-                from deepface import DeepFace as _DeepFace
-                DeepFace = _DeepFace
-            except Exception:
-                return {}
+        deepface = model_registry.get("deepface")
+        if deepface is None:
+            return {}
 
         try:
-            result = DeepFace.analyze(
+            result = deepface.analyze(
                 face_roi,
                 actions=['emotion'],
                 enforce_detection=False,
-                detector_backend='mediapipe',
+                detector_backend='mediapipe' if self.redetect else 'skip',
                 prog_bar=False,
             )
             if isinstance(result, list):
@@ -458,13 +662,171 @@ class EmotionFusionEngine:
         if not self.fer_detector:
             return {}
         try:
-            detections = self.fer_detector.detect_emotions(face_roi)
+            if self.redetect:
+                detections = self.fer_detector.detect_emotions(face_roi)
+            else:
+                h, w = face_roi.shape[:2]
+                detections = self.fer_detector.detect_emotions(face_roi, face_rectangles=[(0, 0, w, h)])
             if detections:
                 return detections[0].get('emotions', {})
         except Exception:
             return {}
         return {}
 
+    def _analyze_batch_with_deepface(self, face_rois):
+        # The direct classifier call never detects; with re-detection on, go through DeepFace per crop.
+        model = None if self.redetect else model_registry.get("deepface_emotion")
+        if model is None:
+            return [self._analyze_with_deepface(roi) for roi in face_rois]
+        try:
+            # Same input DeepFace's emotion client builds: 48x48 grayscale in [0, 1].
+            batch = np.stack(
+                [
+                    cv2.resize(cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY), (48, 48), interpolation=cv2.INTER_AREA)
+                    for roi in face_rois
+                ]
+            ).astype(np.float32)[..., np.newaxis] / 255.0
+            predictions = model.predict(batch, verbose=0)
+        except Exception:
+            return [self._analyze_with_deepface(roi) for roi in face_rois]
+        return [Spectrum(row) for row in predictions]
+
+    def _analyze_batch_with_fer(self, face_rois):
+        """Tile crops into one image so FER classifies every face in a single predict call."""
+        if not self.fer_detector:
+            return [{} for _ in face_rois]
+        if self.redetect:
+            # FER has to find each face itself; the mosaic's rectangles would skip that.
+            return [self._analyze_with_fer(roi) for roi in face_rois]
+        gap = FER_MOSAIC_GAP
+        height = max(roi.shape[0] for roi in face_rois) + 2 * gap
+        width = sum(roi.shape[1] for roi in face_rois) + gap * (len(face_rois) + 1)
+        mosaic = np.zeros((height, width, 3), dtype=np.uint8)
+        rectangles = []
+        x = gap
+        for roi in face_rois:
+            h, w = roi.shape[:2]
+            mosaic[gap:gap + h, x:x + w] = roi
+            rectangles.append((x, gap, w, h))
+            x += w + gap
+        try:
+            detections = self.fer_detector.detect_emotions(mosaic, face_rectangles=rectangles)
+        except Exception:
+            return [{} for _ in face_rois]
+        by_x = {}
+        for detection in detections or []:
+            box = detection.get("box")
+            if box is not None:
+                by_x[int(box[0])] = detection.get("emotions", {})
+        return [by_x.get(rect[0], {}) for rect in rectangles]
+
+
+class BackgroundEmotionAnalyzer:
+    """Runs the fusion engine on a worker thread with drop-oldest submission.
+
+    Capture code calls `submit()` with the newest face crop (or
+    `submit_faces()` with every face of a frame) and reads `latest()` or
+    `drain()` whenever it needs scores; it never waits on the classifiers.
+    """
+
+    def __init__(self, engine, queue_depth=1):
+        self.engine = engine
+        self.queue_depth = max(1, int(queue_depth))
+        self.pending = deque(maxlen=self.queue_depth)
+        self.finished = deque(maxlen=32)
+        self.last_scores = None
+        self.last_frame_id = -1
+        self.submitted = 0
+        self.dropped = 0
+        self.completed = 0
+        self._condition = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="emotion-analyzer", daemon=True)
+        self._thread.start()
+
+    def submit(self, face_roi, frame_id=None):
+        """Queue a crop for analysis, evicting the oldest one when the queue is full."""
+        if face_roi is None or face_roi.size == 0:
+            return False
+        # Copy so later drawing on the source frame cannot bleed into the crop.
+        return self._enqueue([(-1 if frame_id is None else frame_id, face_roi.copy(), None)])
+
+    def submit_faces(self, faces, frame_id):
+        """Queue all faces of one frame as a single batched job.
+
+        `faces` holds `(track_id, face_roi, reuse_gate)`; results come out of
+        `drain()` tagged `(frame_id, track_id)`.
+        """
+        item = [
+            ((frame_id, track_id), face_roi.copy(), gate)
+            for track_id, face_roi, gate in faces
+            if face_roi is not None and face_roi.size > 0
+        ]
+        return self._enqueue(item) if item else False
+
+    def _enqueue(self, item):
+        with self._condition:
+            if not self._running:
+                return False
+            if len(self.pending) == self.queue_depth:
+                self.dropped += 1
+                metrics.inc("camera_dropped_frames_total", reason="analysis_queue")
+            self.pending.append(item)
+            self.submitted += 1
+            self._condition.notify()
+        return True
+
+    def latest(self):
+        """Return `(frame_id, scores)` for the newest finished analysis."""
+        with self._condition:
+            return self.last_frame_id, self.last_scores
+
+    def drain(self):
+        """Return `(frame_id, scores)` results finished since the last call, in frame order."""
+        with self._condition:
+            items = list(self.finished)
+            self.finished.clear()
+        return items
+
+    def stats(self):
+        with self._condition:
+            return {
+                "submitted": self.submitted,
+                "dropped": self.dropped,
+                "completed": self.completed,
+                "pending": len(self.pending),
+                "queue_depth": self.queue_depth,
+            }
+
+    def close(self, timeout=1.0):
+        with self._condition:
+            self._running = False
+            self.pending.clear()
+            self._condition.notify_all()
+        self._thread.join(timeout=timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self.pending:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                job = self.pending.popleft()
+            try:
+                if len(job) == 1 and job[0][2] is None:
+                    results = [self.engine.analyze(job[0][1])]
+                else:
+                    results = self.engine.analyze_faces([crop for _, crop, _ in job], [gate for _, _, gate in job])
+            except Exception:
+                results = [{} for _ in job]
+            with self._condition:
+                for (tag, _, _), scores in zip(job, results):
+                    self.last_scores = scores
+                    self.last_frame_id = tag
+                    self.finished.append((tag, scores))
+                self.completed += 1
+
 
 class ExternalModelBridge:
     """Tracks readiness of ElevenLabs and Gemini integrations."""
@@ -573,9 +935,8 @@ class EmotionAwareTravelPlanner:
 
     @staticmethod
     def _format_spectrum_line(spectrum, top=3):
-        items = sorted(spectrum.items(), key=lambda kv: kv[1], reverse=True)
         chunks = []
-        for emotion, value in items[:top]:
+        for emotion, value in ranked_items(spectrum, top):
             perc = int(round(value * 100))
             if perc <= 0:
                 continue
@@ -644,86 +1005,368 @@ class ResponseStreamManager:
         self.using_mock = False
 
 
+@dataclass
+class FaceResult:
+    """One tracked face in a processed frame; `scores` is its normalized spectrum or None."""
+
+    track_id: int
+    bbox: tuple
+    scores: object = None
+    label: str = "waiting"
+
+
+class FaceTrackState:
+    """Per-face smoothing and score reuse for one `MultiFaceTracker` track."""
+
+    def __init__(self, track_id):
+        self.track_id = track_id
+        self.smoother = EmotionSmoother(EMOTION_KEYS, window=12)
+        self.reuse_gate = ScoreReuseGate(source="visualizer")
+        self.latest_scores = None
+        self.spectrum = Spectrum()
+        self.label = "waiting"
+
+
 class EmotionVisualizer:
-    def __init__(self, camera_index: int = 0):
-        self.cap = cv2.VideoCapture(camera_index)
+    def __init__(
+        self,
+        camera_index: int = 0,
+        *,
+        analysis_stride: int = ANALYSIS_STRIDE,
+        queue_depth: int = ANALYSIS_QUEUE_DEPTH,
+        background: bool = BACKGROUND_ANALYSIS,
+        inference_workers: int = INFERENCE_WORKERS,
+        tracking: bool = FACE_TRACKING,
+        redetect_interval: int = REDETECT_INTERVAL,
+        pipeline: str = CAMERA_PIPELINE,
+        headless: bool = False,
+        capture=None,
+        quality_controller=None,
+        max_faces: int = MAX_FACES,
+        fallback_detector=None,
+    ):
+        if pipeline not in PIPELINE_MODES:
+            raise ValueError(f"Unknown camera pipeline {pipeline!r}; expected one of {PIPELINE_MODES}.")
+        # Any object with `read()`, `isOpened()` and `release()` (a clip, a benchmark source) replaces the device.
+        self.cap = capture if capture is not None else cv2.VideoCapture(camera_index)
         if not self.cap.isOpened():
             raise RuntimeError("Unable to open the camera.")
-        self.face_detector = mp_face_detection.FaceDetection(min_detection_confidence=0.5)
-        self.face_mesh = mp_face_mesh.FaceMesh(
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5,
-        )
+        self.pipeline = pipeline
+        # `frame -> [(bbox, contour), ...]` for frames where MediaPipe finds no face (synthetic or
+        # recorded benchmark sources); MediaPipe still runs on every detection frame.
+        self.fallback_detector = fallback_detector
+        # Headless callers only need scores. In detection mode the overlay-only FaceMesh pass runs
+        # just for frames that are drawn; its graph is leased on the first one (see `_mediapipe_faces`).
+        self.headless = headless
+        self.face_detector = model_registry.acquire("face_detection") if pipeline == "detection" else None
+        self.face_mesh = model_registry.acquire("face_mesh") if pipeline == "landmarks" else None
+        self._want_contours = not headless
         self.emotion_engine = EmotionFusionEngine()
         self.resolver = ComplexEmotionResolver(COMPLEX_EMOTION_MIXES)
-        self.smoother = EmotionSmoother(EMOTION_KEYS, window=12)
-        self.analysis_stride = 2
+        self.analysis_stride = max(1, int(analysis_stride))
         self.frame_counter = 0
         self.is_listening = False
-        self.last_spectrum = {key: 0.0 for key in EMOTION_KEYS}
+        self.last_spectrum = Spectrum()
         self.last_label = "waiting"
+        self.last_bbox = None
+        # Every face of the latest frame, primary (oldest track) first.
+        self.last_faces = []
+        self.tracks = {}
+        if inference_workers > 0:
+            self.analyzer = ProcessPoolEmotionAnalyzer(workers=inference_workers)
+        elif background:
+            self.analyzer = BackgroundEmotionAnalyzer(self.emotion_engine, queue_depth=queue_depth)
+        else:
+            self.analyzer = None
+        # Without optical-flow tracking the detector runs every frame; IDs still come from box matching.
+        self.tracker = MultiFaceTracker(max_faces, redetect_interval=redetect_interval if tracking else 1)
+        self.overlay = OverlayCompositor()
+        self.fps_meter = metrics.fps_meter("visualizer")
+        self.detection_scale = 1.0
+        self._read_seconds = 0.0
+        # (frame_counter, submit time) of frames handed to an off-thread analyzer, oldest first.
+        self._submitted = deque(maxlen=256)
+        # Reuse-gate thumbnails of crops sent to pool workers, by `(frame_counter, track_id)` tag.
+        self._gate_thumbnails = {}
+        self._result_seconds = 0.0
+        # Holds CAMERA_TARGET_FPS / CAMERA_TARGET_LATENCY_MS when set; None keeps the fixed settings above.
+        self.quality = quality_controller if quality_controller is not None else AdaptiveQualityController.from_env()
+        self._quality_level = None
+        if self.quality is not None:
+            self._apply_quality(self.quality.level)
 
     def release(self):
+        if self.analyzer:
+            self.analyzer.close()
+        # Each visualizer owns its engine; without this every broker reopen leaks a thread per backend.
+        self.emotion_engine.close()
         if self.cap:
             self.cap.release()
+        # Graphs go back to the registry pool for the next visualizer.
+        if self.face_detector:
+            model_registry.release("face_detection", self.face_detector)
+            self.face_detector = None
         if self.face_mesh:
-            self.face_mesh.close()
+            model_registry.release("face_mesh", self.face_mesh)
+            self.face_mesh = None
+
+    def _analyze_faces(self, entries):
+        """Newest scores per track for `entries` of `(state, face_roi)`, honouring the analysis stride.
+
+        All due faces go to the engine (or the analyzer) as one batch. Every
+        newly finished result is fed to its track's smoother in frame order,
+        so worker pools that finish out of order still smooth
+        deterministically; results for tracks that have ended are dropped.
+        """
+        due = (self.frame_counter % self.analysis_stride) == 0
+        pending = [(state, face_roi) for state, face_roi in entries if due or state.latest_scores is None]
+        if self.analyzer is None:
+            if pending:
+                results = self.emotion_engine.analyze_faces(
+                    [face_roi for _, face_roi in pending], [state.reuse_gate for state, _ in pending]
+                )
+                for (state, _), scores in zip(pending, results):
+                    if scores:
+                        state.latest_scores = scores
+                        state.smoother.update(scores)
+            return
+
+        if pending:
+            submitted_at = time.perf_counter()
+            submit_faces = getattr(self.analyzer, "submit_faces", None)
+            if submit_faces is not None:
+                submit_faces([(state.track_id, face_roi, state.reuse_gate) for state, face_roi in pending], self.frame_counter)
+                self._submitted.append((self.frame_counter, submitted_at))
+            else:
+                # Worker processes take one crop at a time; the tag routes each result back to its track.
+                # Their engines see crops from every face, so each track's gate is checked here instead.
+                accepted = False
+                for state, face_roi in pending:
+                    thumbnail = None
+                    if state.reuse_gate.enabled:
+                        with metrics.stage("reuse_gate"):
+                            scores, thumbnail = state.reuse_gate.lookup(face_roi)
+                        if thumbnail is None:
+                            if scores:
+                                state.latest_scores = scores
+                                state.smoother.update(scores)
+                            continue
+                    tag = (self.frame_counter, state.track_id)
+                    if self.analyzer.submit(face_roi, frame_id=tag):
+                        accepted = True
+                        if thumbnail is not None:
+                            self._gate_thumbnails[tag] = thumbnail
+                if accepted:
+                    self._submitted.append((self.frame_counter, submitted_at))
+        now = time.perf_counter()
+        latency = 0.0
+        drained_frame = None
+        for tag, scores in self.analyzer.drain():
+            if isinstance(tag, tuple):
+                drained_frame = tag[0]
+                # Results arrive in frame order; anything submitted up to this frame is done or lost.
+                while self._submitted and self._submitted[0][0] <= tag[0]:
+                    frame_id, submitted_at = self._submitted.popleft()
+                    if frame_id == tag[0]:
+                        latency = max(latency, now - submitted_at)
+            state = self.tracks.get(tag[1]) if isinstance(tag, tuple) else None
+            thumbnail = self._gate_thumbnails.pop(tag, None) if isinstance(tag, tuple) else None
+            if state is not None and thumbnail is not None:
+                state.reuse_gate.store(thumbnail, scores)
+            if state is None or not scores:
+                continue
+            state.smoother.update(scores)
+            state.latest_scores = scores
+        if drained_frame is not None and self._gate_thumbnails:
+            # Crops from earlier frames that never came back (skipped by the pool) will not now.
+            self._gate_thumbnails = {tag: thumb for tag, thumb in self._gate_thumbnails.items() if tag[0] >= drained_frame}
+        # The oldest unanswered frame bounds the latency from below, so a stalled analyzer still registers.
+        if self._submitted:
+            latency = max(latency, now - self._submitted[0][1])
+        self._result_seconds = latency
+
+    def _detect_faces(self, frame):
+        """Full MediaPipe pass returning `(bbox, contour)` for every face, most confident first."""
+        found = self._mediapipe_faces(frame)
+        if not found and self.fallback_detector is not None:
+            found = list(self.fallback_detector(frame) or [])[: self.tracker.max_faces]
+        return found
+
+    def _mediapipe_faces(self, frame):
+        if self.detection_scale < 1.0:
+            # MediaPipe reports relative coordinates, so results map straight back onto `frame`.
+            small = cv2.resize(
+                frame, None, fx=self.detection_scale, fy=self.detection_scale, interpolation=cv2.INTER_AREA
+            )
+            rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+        else:
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        if self.pipeline == "landmarks":
+            with metrics.stage("mediapipe_mesh"):
+                mesh_results = self.face_mesh.process(rgb)
+            found = []
+            for landmarks in (mesh_results.multi_face_landmarks or [])[: self.tracker.max_faces]:
+                contour = get_face_contour(landmarks, frame.shape)
+                found.append((contour_bounds(contour, frame.shape), contour))
+            return found
+
+        with metrics.stage("mediapipe_detection"):
+            boxes = detect_face_boxes(self.face_detector, rgb, frame.shape, self.tracker.max_faces)
+        if not boxes:
+            return []
+
+        contours = [None] * len(boxes)
+        if self._want_contours and self.face_mesh is None:
+            self.face_mesh = model_registry.acquire("face_mesh")
+        if self._want_contours and self.face_mesh is not None:
+            with metrics.stage("mediapipe_mesh"):
+                mesh_results = self.face_mesh.process(rgb)
+            if mesh_results.multi_face_landmarks:
+                contours = match_contours(
+                    boxes, [get_face_contour(landmarks, frame.shape) for landmarks in mesh_results.multi_face_landmarks]
+                )
+        return list(zip(boxes, contours))
+
+    def _locate_faces(self, frame):
+        faces = self.tracker.update(frame, self._detect_faces)
+        for track_id in self.tracker.pop_ended():
+            self.tracks.pop(track_id, None)
+        return faces
+
+    def analyze_frame(self):
+        """Read one frame and update the emotion state without drawing anything.
+
+        Returns `(scores, bbox)` for the primary face: the normalized spectrum
+        (or None) and its box `(x1, y1, x2, y2)` (or None). Every face is in
+        `last_faces`.
+        """
+        started = time.perf_counter()
+        self._want_contours = False
+        self._step()
+        self._adapt_quality(started)
+        primary = self.last_faces[0] if self.last_faces else None
+        return (primary.scores if primary else None), (primary.bbox if primary else None)
+
+    def process_frame(self, draw=None):
+        """Read, analyze and (unless headless, or `draw=False`) annotate one frame.
+
+        Returns the frame and the primary face's normalized spectrum (or None).
+        """
+        started = time.perf_counter()
+        draw = (not self.headless) if draw is None else draw
+        self._want_contours = draw
+        frame, faces = self._step()
+        if draw:
+            with metrics.stage("draw"):
+                self._draw(frame, faces)
+        self._adapt_quality(started)
+        return frame, (self.last_faces[0].scores if self.last_faces else None)
+
+    def quality_status(self):
+        return self.quality.status() if self.quality is not None else None
+
+    def backend_status(self):
+        return self.emotion_engine.backend_stats()
+
+    def _adapt_quality(self, started):
+        if self.quality is None:
+            return
+        # Waiting on the camera is not our cost; only processing time counts against the budget.
+        busy = time.perf_counter() - started - self._read_seconds
+        # Off-thread analyzers keep the loop fast while results lag; judge by whichever is slower.
+        self._apply_quality(self.quality.observe(max(busy, self._result_seconds)))
 
-    def process_frame(self):
-        ret, frame = self.cap.read()
+    def _apply_quality(self, level):
+        if level is self._quality_level:
+            return
+        self._quality_level = level
+        self.analysis_stride = level.analysis_stride
+        self.detection_scale = level.detection_scale
+        # A remote inference server keeps its own fidelity and FER settings: it batches crops
+        # from every client, so one client's load does not lower the others' quality.
+        self.emotion_engine.set_fidelity(level.fidelity)
+        self.emotion_engine.use_fer = level.use_fer
+        set_quality = getattr(self.analyzer, "set_quality", None)
+        if set_quality is not None:
+            # Pool workers run their own engines.
+            set_quality(level.fidelity, level.use_fer)
+
+    def _step(self):
+        read_started = time.perf_counter()
+        with metrics.stage("camera_read"):
+            ret, frame = self.cap.read()
+        self._read_seconds = time.perf_counter() - read_started
         if not ret:
             raise RuntimeError("Failed to read from camera.")
         frame = cv2.flip(frame, 1)
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        detections = self.face_detector.process(rgb)
-        scores = None
-        bbox_coords = None
-        if detections and detections.detections:
-            detection = detections.detections[0]
-            bbox = detection.location_data.relative_bounding_box
-            h, w, _ = frame.shape
-            x1 = max(int(bbox.xmin * w), 0)
-            y1 = max(int(bbox.ymin * h), 0)
-            x2 = min(x1 + int(bbox.width * w), w)
-            y2 = min(y1 + int(bbox.height * h), h)
+        self.frame_counter += 1
+        self.fps_meter.tick()
+        metrics.inc("camera_frames_total", source="visualizer")
+        with metrics.stage("face_locate"):
+            faces = self._locate_faces(frame)
+        metrics.inc("camera_faces_total", len(faces), source="visualizer")
+
+        entries = []
+        for face in faces:
+            state = self.tracks.get(face.track_id)
+            if state is None:
+                state = self.tracks[face.track_id] = FaceTrackState(face.track_id)
+            x1, y1, x2, y2 = face.bbox
             face_roi = frame[y1:y2, x1:x2]
             if face_roi.size > 0:
-                scores = self.emotion_engine.analyze(face_roi)
-            cv2.rectangle(frame, (x1, y1), (x2, y2), (64, 224, 208), 2)
-            bbox_coords = (x1, y1, x2, y2)
+                entries.append((state, face_roi))
+        if entries:
+            with metrics.stage("analysis"):
+                self._analyze_faces(entries)
+
+        results = []
+        for face in faces:
+            state = self.tracks[face.track_id]
+            normalized = None
+            if state.latest_scores:
+                # Scores stay per-analysis for aggregation; the label and panel follow the smoothed spectrum.
+                normalized = normalize_emotion_dict(state.latest_scores)
+                state.spectrum = state.smoother.average() if state.smoother.has_data() else normalized
+                state.label, _, _ = self.resolver.pick_label(state.spectrum)
+            else:
+                state.spectrum = Spectrum()
+            results.append(FaceResult(face.track_id, face.bbox, normalized, state.label))
+
+        self.last_faces = results
+        primary = results[0] if results else None
+        self.last_bbox = primary.bbox if primary else None
+        if primary is not None and primary.scores is not None:
+            self.last_spectrum = primary.scores
+            self.last_label = primary.label
+        else:
+            self.last_spectrum = Spectrum()
+        return frame, faces
 
-            mesh_results = self.face_mesh.process(rgb)
-            if mesh_results.multi_face_landmarks:
-                contour = get_face_contour(mesh_results.multi_face_landmarks[0], frame.shape)
-                overlay = frame.copy()
-                cv2.fillPoly(overlay, [contour], (64, 224, 208))
-                cv2.addWeighted(overlay, 0.2, frame, 0.8, 0, frame)
-
-        normalized = None
-        if scores:
-            normalized = normalize_emotion_dict(scores)
-            self.smoother.update(scores)
-            dominant, _, _ = self.resolver.pick_label(normalized)
-            self.last_spectrum = normalized
-            self.last_label = dominant
+    def _draw(self, frame, faces):
+        for face, result in zip(faces, self.last_faces):
+            self._draw_face(frame, face, result)
+        if self.last_faces and self.last_faces[0].scores is not None:
             cv2.putText(
                 frame,
-                dominant,
+                self.last_label,
                 (20, frame.shape[0] - 30),
                 cv2.FONT_HERSHEY_SIMPLEX,
                 0.7,
                 (255, 255, 255),
                 2,
             )
-        else:
-            self.smoother.update({key: 0.0 for key in EMOTION_KEYS})
-            self.last_spectrum = {key: 0.0 for key in EMOTION_KEYS}
 
-        if bbox_coords and any(value > 0.0 for value in self.last_spectrum.values()):
-            x1, y1, x2, y2 = bbox_coords
-            rows = top_emotion_rows(self.last_spectrum, limit=4)
+    def _draw_face(self, frame, face, result):
+        x1, y1, x2, y2 = face.bbox
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (64, 224, 208), 2)
+        contour = face.contour
+        if contour is not None and contour.size > 0:
+            self.overlay.blend_polygon(frame, contour, (64, 224, 208), 0.2)
+
+        state = self.tracks.get(result.track_id)
+        spectrum = state.spectrum if state is not None and result.scores is not None else result.scores
+        if spectrum is not None and spectrum.peak() > 0.0:
+            rows = top_emotion_rows(spectrum, limit=4)
             if rows:
                 anchor_x = x2 + 20
                 panel_width = 200
@@ -732,17 +1375,15 @@ class EmotionVisualizer:
                     anchor_x = max(20, x1 - panel_width - 20)
                 anchor_y = max(35, y1)
 
-                overlay = frame.copy()
-                cv2.rectangle(
-                    overlay,
+                self.overlay.blend_rect(
+                    frame,
                     (anchor_x - 12, anchor_y - 20),
                     (anchor_x + panel_width, anchor_y + panel_height),
                     (8, 8, 8),
-                    -1,
+                    0.35,
                 )
-                frame = cv2.addWeighted(overlay, 0.35, frame, 0.65, 0)
 
-                header = f"Feeling: {self.last_label}"
+                header = f"Feeling: {result.label}"
                 cv2.putText(
                     frame,
                     header,
@@ -762,8 +1403,6 @@ class EmotionVisualizer:
                         (255, 255, 255),
                         1,
                     )
-
-        return frame, normalized
 def maybe_generate_travel_plan(conversation, planner, model_bridge):
     if not model_bridge.ready():
         return
@@ -778,21 +1417,18 @@ def maybe_generate_travel_plan(conversation, planner, model_bridge):
 
 
 def attach_elevenlabs_model(model_handle):
-    global external_models
-    external_models.attach_elevenlabs(model_handle)
+    get_runtime().external_models.attach_elevenlabs(model_handle)
 
 
 def attach_gemini_model(model_handle):
-    global external_models
-    external_models.attach_gemini(model_handle)
+    get_runtime().external_models.attach_gemini(model_handle)
 
 
 def spectrum_to_text(spectrum, top=3):
     if not spectrum:
         return ""
-    items = sorted(spectrum.items(), key=lambda kv: kv[1], reverse=True)
     chunks = []
-    for emotion, value in items[:top]:
+    for emotion, value in ranked_items(spectrum, top):
         perc = int(round(value * 100))
         if perc <= 0:
             continue
@@ -800,32 +1436,160 @@ def spectrum_to_text(spectrum, top=3):
     return ", ".join(chunks)
 
 
-# Setup
-mp_face_mesh = mp.solutions.face_mesh
-mp_face_detection = mp.solutions.face_detection
-stream_manager = ResponseStreamManager(default_device=0, mock_paths=MOCK_RESPONSE_VIDEOS)
-prev_time = 0
-loop_prev_time = 0
-smoother = EmotionSmoother(EMOTION_KEYS, window=15)
-resolver = ComplexEmotionResolver(COMPLEX_EMOTION_MIXES)
-fusion_engine = EmotionFusionEngine()
-external_models = ExternalModelBridge()
-travel_planner = EmotionAwareTravelPlanner(TRAVEL_DATA_PATH)
-conversation = ConversationController(QUESTIONS)
-conversation.start()
-
-
-def finalize_current_answer():
-    stream_manager.finish_question()
-    averaged_scores = smoother.average()
-    if smoother.has_data():
-        final_label, final_confidence, _ = resolver.pick_label(averaged_scores)
+def emotion_backend_available():
+    """True when a configured emotion backend is installed, without importing it."""
+    return any(backend_installed(name) for name in EMOTION_BACKENDS)
+
+
+def _load_fer(mtcnn=False):
+    global FER
+    try:
+        from fer import FER as _FER
+    except ImportError:
+        return None
+    FER = _FER
+    # MTCNN is only needed when FER has to find the face itself.
+    return FER(mtcnn=mtcnn)
+
+
+@lru_cache(maxsize=None)
+def _mp_solutions():
+    import mediapipe as mp
+
+    return mp.solutions
+
+
+def _load_deepface():
+    # Import DeepFace lazily; if not available the registry records it as unavailable.
+    global DeepFace
+    from deepface import DeepFace as _DeepFace
+
+    DeepFace = _DeepFace
+    return DeepFace
+
+
+def _load_deepface_emotion_model():
+    """Build DeepFace's Keras emotion classifier; also warms `DeepFace.analyze`."""
+    deepface = model_registry.get("deepface")
+    if deepface is None:
+        return None
+    try:
+        client = deepface.build_model(task="facial_attribute", model_name="Emotion")
+    except TypeError:
+        client = deepface.build_model("Emotion")
+    model = getattr(client, "model", None)
+    return model if model is not None and hasattr(model, "predict") else None
+
+
+# Setup: registrations only; nothing is loaded until first use.
+model_registry.register(FER_MODELS[False], _load_fer)
+model_registry.register(FER_MODELS[True], lambda: _load_fer(mtcnn=True))
+model_registry.register("deepface", _load_deepface)
+model_registry.register("deepface_emotion", _load_deepface_emotion_model)
+# MediaPipe graphs keep per-stream tracking state, so they are leased, not shared.
+model_registry.register_pool(
+    "face_mesh",
+    lambda: _mp_solutions().face_mesh.FaceMesh(
+        max_num_faces=MAX_FACES,
+        refine_landmarks=True,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5,
+    ),
+)
+model_registry.register_pool(
+    "face_detection",
+    lambda: _mp_solutions().face_detection.FaceDetection(min_detection_confidence=0.5),
+)
+
+
+class CameraRuntime:
+    """State of the interactive visualizer, built piece by piece on first use.
+
+    `capture_emotion()` only needs the fusion engine and resolver, so it never
+    opens the response stream's webcam or starts the conversation.
+    """
+
+    def __init__(self):
+        self.prev_time = 0
+        self.loop_prev_time = 0
+
+    @cached_property
+    def stream_manager(self):
+        return ResponseStreamManager(default_device=0, mock_paths=MOCK_RESPONSE_VIDEOS)
+
+    @cached_property
+    def smoother(self):
+        return EmotionSmoother(EMOTION_KEYS, window=15)
+
+    @cached_property
+    def resolver(self):
+        return ComplexEmotionResolver(COMPLEX_EMOTION_MIXES)
+
+    @cached_property
+    def fusion_engine(self):
+        return EmotionFusionEngine()
+
+    @cached_property
+    def external_models(self):
+        return ExternalModelBridge()
+
+    @cached_property
+    def travel_planner(self):
+        return EmotionAwareTravelPlanner(TRAVEL_DATA_PATH)
+
+    @cached_property
+    def conversation(self):
+        conversation = ConversationController(QUESTIONS)
+        conversation.start()
+        return conversation
+
+    @cached_property
+    def overlay_compositor(self):
+        return OverlayCompositor()
+
+
+_runtime = None
+_runtime_lock = threading.Lock()
+_RUNTIME_ATTRS = (
+    "stream_manager",
+    "smoother",
+    "resolver",
+    "fusion_engine",
+    "external_models",
+    "travel_planner",
+    "conversation",
+    "overlay_compositor",
+)
+
+
+def get_runtime():
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = CameraRuntime()
+        return _runtime
+
+
+def __getattr__(name):
+    # The old module-level singletons (`camera.conversation`, ...) now live on the runtime.
+    if name in _RUNTIME_ATTRS:
+        return getattr(get_runtime(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def finalize_current_answer(runtime=None):
+    runtime = runtime or get_runtime()
+    conversation = runtime.conversation
+    runtime.stream_manager.finish_question()
+    averaged_scores = runtime.smoother.average()
+    if runtime.smoother.has_data():
+        final_label, final_confidence, _ = runtime.resolver.pick_label(averaged_scores)
     else:
         final_label, final_confidence = "unknown", 0.0
     spectrum = conversation.finalize_histogram()
-    conversation.record_result(final_label, final_confidence, spectrum)
-    maybe_generate_travel_plan(conversation, travel_planner, external_models)
-    conversation.live_spectrum = {key: 0.0 for key in EMOTION_KEYS}
+    conversation.record_result(final_label, final_confidence, spectrum, timeline=conversation.save_timeline())
+    maybe_generate_travel_plan(conversation, runtime.travel_planner, runtime.external_models)
+    conversation.live_spectrum = Spectrum()
 
 def get_face_contour(face_landmarks, frame_shape):
     """Convert the selected landmarks into pixel positions."""
@@ -837,57 +1601,167 @@ def get_face_contour(face_landmarks, frame_shape):
     return np.array(contour, dtype=np.int32)
 
 
-def draw_conversation_overlay(frame, conversation, planner, model_bridge):
-    """Render question prompts, state, and per-question results on the frame."""
+def _face_locator(detect, tracking, redetect_interval):
+    if tracking:
+        tracker = FaceTracker(redetect_interval)
+        return lambda frame: tracker.update(frame, detect)
+
+    def locate(frame):
+        found = detect(frame)
+        if found is None:
+            return None
+        bbox, contour = found
+        return TrackedFace(bbox=bbox, contour=contour, confidence=1.0, detected=True)
+
+    return locate
+
+
+def mesh_face_locator(face_mesh, tracking=FACE_TRACKING, redetect_interval=REDETECT_INTERVAL):
+    """Return `locate(frame) -> TrackedFace | None` for the primary FaceMesh face.
+
+    In tracker mode FaceMesh only runs on re-detection frames; the oval
+    contour is carried forward by optical flow in between.
+    """
+
+    detect_all = mesh_face_detector(face_mesh, max_faces=1)
+
+    def detect(frame):
+        found = detect_all(frame)
+        return found[0] if found else None
+
+    return _face_locator(detect, tracking, redetect_interval)
+
+
+def mesh_face_detector(face_mesh, max_faces=MAX_FACES):
+    """Return `detect(frame) -> [(bbox, contour), ...]` over the FaceMesh faces, for `MultiFaceTracker`."""
+
+    def detect(frame):
+        results = face_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        found = []
+        for landmarks in (results.multi_face_landmarks or [])[:max_faces]:
+            contour = get_face_contour(landmarks, frame.shape)
+            if contour.size > 0:
+                found.append((contour_bounds(contour, frame.shape), contour))
+        return found
+
+    return detect
+
+
+def detection_face_locator(face_detector, tracking=FACE_TRACKING, redetect_interval=REDETECT_INTERVAL):
+    """Like `mesh_face_locator` but box-only, from the cheaper FaceDetection graph."""
+
+    def detect(frame):
+        bbox = detect_face_box(face_detector, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), frame.shape)
+        return None if bbox is None else (bbox, None)
+
+    return _face_locator(detect, tracking, redetect_interval)
+
+
+def detect_face_boxes(face_detector, rgb, frame_shape, max_faces=None):
+    """Pixel boxes `(x1, y1, x2, y2)` of the FaceDetection hits, most confident first."""
+    detections = face_detector.process(rgb)
+    if not (detections and detections.detections):
+        return []
+    h, w = frame_shape[:2]
+    boxes = []
+    for detection in detections.detections[:max_faces]:
+        bbox = detection.location_data.relative_bounding_box
+        x1 = max(int(bbox.xmin * w), 0)
+        y1 = max(int(bbox.ymin * h), 0)
+        x2 = min(x1 + int(bbox.width * w), w)
+        y2 = min(y1 + int(bbox.height * h), h)
+        if x2 > x1 and y2 > y1:
+            boxes.append((x1, y1, x2, y2))
+    return boxes
+
+
+def detect_face_box(face_detector, rgb, frame_shape):
+    """Pixel box `(x1, y1, x2, y2)` of the first FaceDetection hit, or None."""
+    boxes = detect_face_boxes(face_detector, rgb, frame_shape, max_faces=1)
+    return boxes[0] if boxes else None
+
+
+def match_contours(boxes, contours):
+    """Pair each box with the face-oval contour whose centre lies inside it (or None)."""
+    remaining = list(contours)
+    matched = []
+    for x1, y1, x2, y2 in boxes:
+        best = None
+        best_distance = None
+        for index, contour in enumerate(remaining):
+            cx, cy = contour.mean(axis=0)
+            if not (x1 <= cx <= x2 and y1 <= cy <= y2):
+                continue
+            distance = (cx - (x1 + x2) / 2) ** 2 + (cy - (y1 + y2) / 2) ** 2
+            if best is None or distance < best_distance:
+                best, best_distance = index, distance
+        matched.append(remaining.pop(best) if best is not None else None)
+    return matched
+
+
+@lru_cache(maxsize=32)
+def _wrap_question(question):
+    return tuple(textwrap.wrap(question, width=40)[:3])
+
+
+def _header_lines(status_label, state_label, question_number, question):
+    lines = [
+        TextLine(status_label, 0, 0, 0.6, (200, 200, 200), 1),
+        TextLine(f"State: {state_label}", 0, 20, 0.7, (255, 255, 255), 2),
+    ]
+    if question:
+        for idx, line in enumerate(_wrap_question(question)):
+            lines.append(TextLine(f"Q{question_number}: {line}", 0, 20 + 25 * (idx + 1), 0.6, (200, 200, 200), 1))
+    return lines
+
+
+def _report_lines(question_number, result):
+    lines = [TextLine(f"Q{question_number} result: {result['label']}", 0, 0, 0.6, (255, 255, 255), 1)]
+    spectrum_line = spectrum_to_text(result.get("spectrum", {}))
+    if spectrum_line:
+        lines.append(TextLine(f"Spectrum: {spectrum_line}", 0, 25, 0.55, (200, 200, 200), 1))
+    return lines
+
+
+def _summary_lines(results):
+    lines = []
+    for idx, result in enumerate(results):
+        spectrum_line = spectrum_to_text(result.get("spectrum", {}))
+        if spectrum_line:
+            text = f"Q{idx + 1}: {result['label']} | {spectrum_line}"
+        else:
+            text = f"Q{idx + 1}: {result['label']}"
+        lines.append(TextLine(text, 0, idx * 20, 0.6, (200, 200, 200), 1))
+    return lines
+
+
+def draw_conversation_overlay(frame, conversation, planner, model_bridge, compositor=None):
+    """Render question prompts, state, and per-question results on the frame.
+
+    Text that only changes with the conversation state is rendered once into
+    cached layers; only the live label and blend are drawn per frame.
+    """
+    compositor = compositor or get_runtime().overlay_compositor
     base_y = 30
-    cv2.putText(
-        frame,
-        model_bridge.status_label(),
-        (20, base_y),
-        cv2.FONT_HERSHEY_SIMPLEX,
-        0.6,
-        (200, 200, 200),
-        1,
+    status_label = model_bridge.status_label()
+    state_label = conversation.state_label()
+    question = conversation.current_question_text()
+    question_number = conversation.current_question_number()
+    header = compositor.text_layer(
+        ("header", status_label, state_label, question_number, question),
+        lambda: _header_lines(status_label, state_label, question_number, question),
     )
+    compositor.blit(frame, header, (20, base_y))
     base_y += 20
-    cv2.putText(
-        frame,
-        f"State: {conversation.state_label()}",
-        (20, base_y),
-        cv2.FONT_HERSHEY_SIMPLEX,
-        0.7,
-        (255, 255, 255),
-        2,
-    )
-
-    question = conversation.current_question_text()
-    if question:
-        wrapped = textwrap.wrap(question, width=40)
-        for idx, line in enumerate(wrapped[:3]):
-            cv2.putText(
-                frame,
-                f"Q{conversation.current_question_number()}: {line}",
-                (20, base_y + 25 * (idx + 1)),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.6,
-                (200, 200, 200),
-                1,
-            )
-        offset_lines = len(wrapped[:3])
-    else:
-        offset_lines = 0
+    offset_lines = len(_wrap_question(question)) if question else 0
 
     info_y = base_y + 25 * (offset_lines + 2)
     if conversation.is_listening():
-        cv2.putText(
-            frame,
-            "Listening for the answer...",
-            (20, info_y),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.6,
-            (255, 255, 255),
-            1,
+        listening = compositor.text_layer(
+            ("listening",),
+            lambda: [TextLine("Listening for the answer...", 0, 0, 0.6, (255, 255, 255), 1)],
         )
+        compositor.blit(frame, listening, (20, info_y))
         if conversation.live_label:
             live_text = f"Live: {conversation.live_label}"
             cv2.putText(
@@ -911,155 +1785,140 @@ def draw_conversation_overlay(frame, conversation, planner, model_bridge):
             )
     elif conversation.state == "report" and conversation.results:
         last = conversation.results[-1]
-        message = f"Q{conversation.current_question_number()} result: {last['label']}"
-        cv2.putText(
-            frame,
-            message,
-            (20, info_y),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.6,
-            (255, 255, 255),
-            1,
+        report = compositor.text_layer(
+            ("report", question_number, len(conversation.results)),
+            lambda: _report_lines(question_number, last),
         )
-        spectrum_line = spectrum_to_text(last.get("spectrum", {}))
-        if spectrum_line:
-            cv2.putText(
-                frame,
-                f"Spectrum: {spectrum_line}",
-                (20, info_y + 25),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.55,
-                (200, 200, 200),
-                1,
-            )
+        compositor.blit(frame, report, (20, info_y))
     elif conversation.is_done():
-        cv2.putText(
-            frame,
-            "Conversation finished. Press 'q' to exit.",
-            (20, info_y),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.6,
-            (255, 255, 255),
-            1,
+        done = compositor.text_layer(
+            ("done",),
+            lambda: [TextLine("Conversation finished. Press 'q' to exit.", 0, 0, 0.6, (255, 255, 255), 1)],
         )
+        compositor.blit(frame, done, (20, info_y))
 
-    summary_y = frame.shape[0] - 120
-    for idx, result in enumerate(conversation.results):
-        spectrum_line = spectrum_to_text(result.get("spectrum", {}))
-        if spectrum_line:
-            text = f"Q{idx + 1}: {result['label']} | {spectrum_line}"
-        else:
-            text = f"Q{idx + 1}: {result['label']}"
-        cv2.putText(
-            frame,
-            text,
-            (20, summary_y + idx * 20),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.6,
-            (200, 200, 200),
-            1,
+    if conversation.results:
+        # Results are append-only, so their count identifies the layer.
+        summary = compositor.text_layer(
+            ("summary", len(conversation.results)),
+            lambda: _summary_lines(conversation.results),
         )
+        compositor.blit(frame, summary, (20, frame.shape[0] - 120))
 
     if planner and planner.has_plan():
-        plan_lines = planner.formatted_summaries()
-        for idx, line in enumerate(plan_lines[:3]):
-            cv2.putText(
-                frame,
-                f"Trip: {line}",
-                (20, frame.shape[0] - 50 + idx * 18),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.55,
-                (255, 255, 255),
-                1,
-            )
+        plan = compositor.text_layer(
+            ("plan", planner.prompt),
+            lambda: [
+                TextLine(f"Trip: {line}", 0, idx * 18, 0.55, (255, 255, 255), 1)
+                for idx, line in enumerate(planner.formatted_summaries()[:3])
+            ],
+        )
+        compositor.blit(frame, plan, (20, frame.shape[0] - 50))
 
     return frame
 
 
-def capture_emotion(duration_seconds: float = 6.0, device: int = 0):
+def capture_emotion(
+    duration_seconds: float = 6.0,
+    device: int = 0,
+    *,
+    headless: bool = True,
+    include_bbox: bool = False,
+):
     """
     Capture webcam frames for `duration_seconds`, run the fusion engine on detected faces,
     and return an aggregated emotion result: {"label": str, "confidence": float, "spectrum": dict}.
     This function is safe to call after importing the module and will not start the visualizer.
+
+    Headless (default) locates faces with FaceDetection only; pass `headless=False` to use
+    FaceMesh as before. `include_bbox=True` adds the last face box as "bbox".
     """
     cap = cv2.VideoCapture(device)
     if not cap or not cap.isOpened():
         return {"label": "unknown", "confidence": 0.0, "spectrum": {}}
 
+    runtime = get_runtime()
     start = time.time()
     frame_count = 0
-    histogram = {k: 0.0 for k in EMOTION_KEYS}
+    histogram = WeightedAccumulator()
+    last_bbox = None
 
-    with mp_face_mesh.FaceMesh(
-        max_num_faces=1,
-        refine_landmarks=True,
-        min_detection_confidence=0.5,
-        min_tracking_confidence=0.5,
-    ) as face_mesh:
+    graph = "face_detection" if headless else "face_mesh"
+    with model_registry.lease(graph) as model:
+        locate_face = detection_face_locator(model) if headless else mesh_face_locator(model)
         while (time.time() - start) < duration_seconds:
             ret, frame = cap.read()
             if not ret:
                 break
 
             frame = cv2.flip(frame, 1)
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = face_mesh.process(rgb)
-
-            if not results.multi_face_landmarks:
-                # no face this frame
-                continue
-
             # use primary face
-            face_landmarks = results.multi_face_landmarks[0]
-            contour = get_face_contour(face_landmarks, frame.shape)
-            if contour.size == 0:
+            face = locate_face(frame)
+            if face is None:
+                # no face this frame
                 continue
 
-            x_min = max(np.min(contour[:, 0]) - 10, 0)
-            y_min = max(np.min(contour[:, 1]) - 10, 0)
-            x_max = min(np.max(contour[:, 0]) + 10, frame.shape[1])
-            y_max = min(np.max(contour[:, 1]) + 10, frame.shape[0])
-
+            x_min, y_min, x_max, y_max = face.bbox
             face_roi = frame[y_min:y_max, x_min:x_max]
             if face_roi.size == 0:
                 continue
 
-            fused_scores = fusion_engine.analyze(face_roi)
+            fused_scores = runtime.fusion_engine.analyze(face_roi)
             if not fused_scores:
                 continue
 
-            normalized = normalize_emotion_dict(fused_scores)
-            for k in histogram:
-                histogram[k] += normalized.get(k, 0.0)
+            histogram.add(normalize_vector(to_vector(fused_scores)), 1.0)
             frame_count += 1
+            last_bbox = face.bbox
 
     cap.release()
 
     if frame_count == 0:
         return {"label": "unknown", "confidence": 0.0, "spectrum": {}}
 
-    averaged = {k: v / frame_count for k, v in histogram.items()}
-    label, confidence, complex_scores = resolver.pick_label(averaged)
-    return {"label": label, "confidence": confidence, "spectrum": averaged}
+    averaged = Spectrum(histogram.mean())
+    label, confidence, complex_scores = runtime.resolver.pick_label(averaged)
+    result = {"label": label, "confidence": confidence, "spectrum": averaged.to_dict()}
+    if include_bbox:
+        result["bbox"] = list(last_bbox)
+    return result
 
 
 def run_visualizer():
     """Run the interactive visualizer loop (previously the module-level loop).
     Kept as a separate function so the module can be safely imported.
     """
-    global prev_time, loop_prev_time
-    with mp_face_mesh.FaceMesh(
-        max_num_faces=2,
+    runtime = get_runtime()
+    stream_manager = runtime.stream_manager
+    smoother = runtime.smoother
+    resolver = runtime.resolver
+    fusion_engine = runtime.fusion_engine
+    conversation = runtime.conversation
+    overlay_compositor = runtime.overlay_compositor
+    with _mp_solutions().face_mesh.FaceMesh(
+        max_num_faces=MAX_FACES,
         refine_landmarks=True,
         min_detection_confidence=0.5,
         min_tracking_confidence=0.5,
     ) as face_mesh:
+        detect_faces = mesh_face_detector(face_mesh)
+        face_tracker = MultiFaceTracker(MAX_FACES, redetect_interval=REDETECT_INTERVAL if FACE_TRACKING else 1)
+        # The conversation follows the primary (oldest) track; the others get their own smoothing and label.
+        track_states = {}
+        fps_meter = metrics.fps_meter("run_visualizer")
+        # Set when the API launched us: annotated frames and spectra go to its shared-memory ring.
+        ring = FrameRing.from_env()
         while True:
+            if ring is not None and ring.stop_requested:
+                break
+            loop_started = time.perf_counter()
             state_transition = conversation.update_state()
             finalize_due = False
 
             if state_transition == "reset":
                 smoother.reset()
+                for state in track_states.values():
+                    state.smoother.reset()
                 conversation.live_label = "waiting"
                 conversation.live_confidence = 0.0
                 conversation.live_blend = ""
@@ -1068,7 +1927,8 @@ def run_visualizer():
             elif state_transition == "finalize":
                 finalize_due = True
 
-            ret, frame, mock_finished = stream_manager.read()
+            with metrics.stage("camera_read", source="run_visualizer"):
+                ret, frame, mock_finished = stream_manager.read()
             if mock_finished:
                 forced = conversation.force_finalize()
                 if forced == "finalize":
@@ -1076,40 +1936,59 @@ def run_visualizer():
 
             if not ret:
                 if finalize_due:
-                    finalize_current_answer()
+                    finalize_current_answer(runtime)
                     finalize_due = False
                     continue
                 else:
                     break
 
             frame = cv2.flip(frame, 1)
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = face_mesh.process(rgb)
+            fps_meter.tick()
+            metrics.inc("camera_frames_total", source="run_visualizer")
+            with metrics.stage("face_locate", source="run_visualizer"):
+                faces = face_tracker.update(frame, detect_faces)
+            for track_id in face_tracker.pop_ended():
+                track_states.pop(track_id, None)
+            for tracked in faces:
+                if tracked.track_id not in track_states:
+                    track_states[tracked.track_id] = FaceTrackState(tracked.track_id)
+            metrics.inc("camera_faces_total", len(faces), source="run_visualizer")
 
             loop_now = time.time()
-            frame_delta = loop_now - loop_prev_time if loop_prev_time else 0.0
-            loop_prev_time = loop_now
+            frame_delta = loop_now - runtime.loop_prev_time if runtime.loop_prev_time else 0.0
+            runtime.loop_prev_time = loop_now
             if frame_delta <= 0:
                 frame_delta = 1 / 30.0
 
-            if results.multi_face_landmarks:
-                # For conversation we only need the primary face.
-                for face_landmarks in results.multi_face_landmarks[:1]:
-                    contour = get_face_contour(face_landmarks, frame.shape)
-                    if contour.size == 0:
-                        continue
+            face_scores = [{} for _ in faces]
+            publishing = ring is not None and ring.reader_active()
+            if faces and (conversation.is_listening() or publishing):
+                # Every face in one batched call; each track reuses its own last scores when it holds still.
+                crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in (tracked.bbox for tracked in faces)]
+                with metrics.stage("analysis", source="run_visualizer"):
+                    face_scores = fusion_engine.analyze_faces(
+                        crops, [track_states[tracked.track_id].reuse_gate for tracked in faces]
+                    )
 
-                    x_min = max(np.min(contour[:, 0]) - 10, 0)
-                    y_min = max(np.min(contour[:, 1]) - 10, 0)
-                    x_max = min(np.max(contour[:, 0]) + 10, frame.shape[1])
-                    y_max = min(np.max(contour[:, 1]) + 10, frame.shape[0])
+            if conversation.is_listening() and not (faces and face_scores[0]):
+                conversation.accumulate_missing()
 
-                    if conversation.is_listening():
-                        face_roi = frame[y_min:y_max, x_min:x_max]
-                        if face_roi.size == 0:
-                            continue
+            if faces:
+                for index, (tracked, fused_scores) in enumerate(zip(faces, face_scores)):
+                    contour = tracked.contour
+                    if contour is None or contour.size == 0:
+                        continue
+
+                    x_min, y_min, x_max, y_max = tracked.bbox
+                    primary = index == 0
 
-                        fused_scores = fusion_engine.analyze(face_roi)
+                    if not (primary and conversation.is_listening()):
+                        # Outside listening, scores are only computed for the ring's readers.
+                        state = track_states[tracked.track_id]
+                        if fused_scores:
+                            smoothed = state.smoother.update(normalize_emotion_dict(fused_scores))
+                            state.label = resolver.pick_label(smoothed)[0]
+                    else:
                         if fused_scores:
                             normalized_scores = normalize_emotion_dict(fused_scores)
                             smoothed_scores = smoother.update(normalized_scores)
@@ -1119,35 +1998,36 @@ def run_visualizer():
                             conversation.live_confidence = confidence
                             conversation.live_spectrum = smoothed_scores
                             if complex_scores:
-                                blend = max(complex_scores.items(), key=lambda kv: kv[1])
-                                conversation.live_blend = blend[0]
+                                conversation.live_blend = complex_scores.dominant()[0]
                             else:
                                 conversation.live_blend = ""
                         else:
                             conversation.live_label = "unknown"
                             conversation.live_confidence = 0.0
                             conversation.live_blend = ""
-                            conversation.live_spectrum = {key: 0.0 for key in EMOTION_KEYS}
+                            conversation.live_spectrum = Spectrum()
 
                     mesh_color = (255, 255, 255)
                     mesh_spacing = 15
 
-                    # Build a mask for the face contour so the mesh follows the exact shape.
-                    mask = np.zeros(frame.shape[:2], dtype=np.uint8)
-                    cv2.fillPoly(mask, [contour], 255)
-
-                    mesh_overlay = np.zeros_like(frame)
-                    for y in range(y_min, y_max, mesh_spacing):
-                        cv2.line(mesh_overlay, (x_min, y), (x_max, y), mesh_color, 1)
-                    for x in range(x_min, x_max, mesh_spacing):
-                        cv2.line(mesh_overlay, (x, y_min), (x, y_max), mesh_color, 1)
-                    mesh_overlay = cv2.bitwise_and(mesh_overlay, mesh_overlay, mask=mask)
-
-                    # Draw the outline to emphasize the contour and blend the mesh on top.
-                    cv2.polylines(mesh_overlay, [contour], True, mesh_color, 2)
-                    frame = cv2.addWeighted(frame, 1.0, mesh_overlay, 0.7, 0)
-
-                    if conversation.is_listening() and conversation.live_label:
+                    # Grid clipped to the face contour, plus the outline, blended inside the face box only.
+                    with metrics.stage("draw_mesh", source="run_visualizer"):
+                        overlay_compositor.draw_mesh(
+                            frame,
+                            tracked.bbox,
+                            contour,
+                            color=mesh_color,
+                            spacing=mesh_spacing,
+                            strength=0.7,
+                            outline=2,
+                        )
+
+                    if conversation.is_listening() and not primary:
+                        label = track_states[tracked.track_id].label
+                        cv2.putText(
+                            frame, label, (x_min, max(y_min - 15, 20)), cv2.FONT_HERSHEY_SIMPLEX, 0.7, mesh_color, 2
+                        )
+                    elif conversation.is_listening() and conversation.live_label:
                         text_pos = (x_min, max(y_min - 15, 20))
                         cv2.putText(frame, conversation.live_label, text_pos, cv2.FONT_HERSHEY_SIMPLEX, 0.8, mesh_color, 2)
 
@@ -1171,15 +2051,13 @@ def run_visualizer():
                                     anchor_x = max(20, x_min - panel_width - 20)
                                 anchor_y = max(30, y_min)
 
-                                overlay = frame.copy()
-                                cv2.rectangle(
-                                    overlay,
+                                overlay_compositor.blend_rect(
+                                    frame,
                                     (anchor_x - 12, anchor_y - 18),
                                     (anchor_x + panel_width, anchor_y + panel_height),
                                     (5, 5, 5),
-                                    -1,
+                                    0.35,
                                 )
-                                frame = cv2.addWeighted(overlay, 0.35, frame, 0.65, 0)
 
                                 cv2.putText(
                                     frame,
@@ -1203,8 +2081,8 @@ def run_visualizer():
                                     )
 
             curr_time = time.time()
-            fps = 1 / (curr_time - prev_time) if prev_time else 0
-            prev_time = curr_time
+            fps = 1 / (curr_time - runtime.prev_time) if runtime.prev_time else 0
+            runtime.prev_time = curr_time
             fps_text = f'FPS: {int(fps)}'
             cv2.putText(
                 frame,
@@ -1216,7 +2094,26 @@ def run_visualizer():
                 2
             )
 
-            frame = draw_conversation_overlay(frame, conversation, travel_planner, external_models)
+            with metrics.stage("conversation_overlay", source="run_visualizer"):
+                frame = draw_conversation_overlay(
+                    frame, conversation, runtime.travel_planner, runtime.external_models, overlay_compositor
+                )
+            metrics.record("frame", time.perf_counter() - loop_started, source="run_visualizer")
+
+            if ring is not None:
+                ring.publish(
+                    frame,
+                    [
+                        FaceResult(
+                            tracked.track_id,
+                            tracked.bbox,
+                            normalize_emotion_dict(fused_scores) if fused_scores else None,
+                            conversation.live_label if index == 0 and conversation.is_listening()
+                            else track_states[tracked.track_id].label,
+                        )
+                        for index, (tracked, fused_scores) in enumerate(zip(faces, face_scores))
+                    ],
+                )
 
             if SHOW_PREVIEW_WINDOW:
                 cv2.imshow("Emotion Scan Visualizer", frame)
@@ -1224,12 +2121,22 @@ def run_visualizer():
                     break
 
             if finalize_due:
-                finalize_current_answer()
+                finalize_current_answer(runtime)
 
     stream_manager.release()
+    if ring is not None:
+        ring.close()
     if SHOW_PREVIEW_WINDOW:
         cv2.destroyAllWindows()
 
 
 if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "analyze-video":
+        try:
+            from .video_analysis import main as analyze_video_main
+        except ImportError:
+            from video_analysis import main as analyze_video_main
+        sys.exit(analyze_video_main(sys.argv[2:]))
     run_visualizer()
@@ -0,0 +1,308 @@
+"""One owner for the capture device, fanned out to any number of consumers.
+
+The broker opens a single `EmotionVisualizer`, runs capture and analysis on
+one thread, and hands each subscriber the newest `BrokerFrame` at that
+subscriber's own rate. `/camera/stream`, `/camera/capture` and background
+sessions all read from the same running pipeline instead of each opening
+the camera.
+"""
+
+from __future__ import annotations
+
+import itertools
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+try:
+    from .camera_metrics import metrics
+except ImportError:
+    from camera_metrics import metrics  # type: ignore
+
+VisualizerFactory = Callable[[], Any]
+
+
+@dataclass
+class BrokerFrame:
+    frame_id: int
+    timestamp: float
+    # Shared between subscribers: treat as read-only. Annotated whenever any
+    # subscriber asked for annotated frames.
+    frame: Any
+    # `scores` and `bbox` describe the primary face; `faces` holds a `FaceResult` per tracked face.
+    scores: Optional[Any]
+    bbox: Optional[Tuple[int, int, int, int]]
+    faces: Tuple[Any, ...] = ()
+
+
+class Subscription:
+    """Per-consumer view of the broker; keeps the newest `depth` frames."""
+
+    def __init__(self, broker: "CameraBroker", sub_id: int, *, max_fps: Optional[float], annotated: bool, depth: int) -> None:
+        self.broker = broker
+        self.id = sub_id
+        self.annotated = annotated
+        self.interval = 1.0 / max_fps if max_fps else 0.0
+        self.delivered = 0
+        self.dropped = 0
+        self._items: Deque[BrokerFrame] = deque(maxlen=max(1, depth))
+        self._cond = threading.Condition()
+        self._next_due = 0.0
+        self._error: Optional[BaseException] = None
+        self._closed = False
+
+    def get(self, timeout: Optional[float] = None) -> Optional[BrokerFrame]:
+        """Oldest undelivered frame, waiting up to `timeout`; None on timeout or close."""
+        with self._cond:
+            if not self._items and not self._closed and self._error is None:
+                self._cond.wait(timeout)
+            if self._items:
+                return self._items.popleft()
+            if self._error is not None:
+                raise RuntimeError(str(self._error)) from self._error
+            return None
+
+    def close(self) -> None:
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self.broker._unsubscribe(self)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _offer(self, item: BrokerFrame) -> None:
+        if item.timestamp < self._next_due:
+            return
+        self._next_due = item.timestamp + self.interval
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+                metrics.inc("camera_dropped_frames_total", reason="subscriber")
+            self._items.append(item)
+            self.delivered += 1
+            self._cond.notify_all()
+
+    def _fail(self, error: BaseException) -> None:
+        with self._cond:
+            self._error = error
+            self._cond.notify_all()
+
+
+class CameraBroker:
+    """Runs the camera pipeline while anyone is subscribed.
+
+    The device opens on the first `subscribe()` (errors surface to that
+    caller) and is released `idle_timeout` seconds after the last
+    subscriber leaves, so back-to-back requests reuse the open device.
+    """
+
+    def __init__(self, visualizer_factory: VisualizerFactory, *, idle_timeout: float = 5.0) -> None:
+        self.visualizer_factory = visualizer_factory
+        self.default_factory = visualizer_factory
+        self.idle_timeout = idle_timeout
+        self.visualizer: Any = None
+        self.frames = 0
+        self.opened_at: Optional[float] = None
+        self._subscribers: Dict[int, Subscription] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._idle_since: Optional[float] = None
+        self._frame_interval = 0.0
+
+    def subscribe(self, *, max_fps: Optional[float] = None, annotated: bool = False, depth: int = 1) -> Subscription:
+        with self._lock:
+            if self.visualizer is None:
+                previous = self._thread
+                if previous is not None:
+                    # Let a pipeline that just went idle release the device first.
+                    previous.join(timeout=2.0)
+                self.visualizer = self.visualizer_factory()
+                self.opened_at = time.time()
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self.visualizer,), name="camera-broker", daemon=True
+                )
+                self._thread.start()
+            subscription = Subscription(self, next(self._ids), max_fps=max_fps, annotated=annotated, depth=depth)
+            self._subscribers[subscription.id] = subscription
+            self._idle_since = None
+        return subscription
+
+    def set_source(self, visualizer_factory: Optional[VisualizerFactory]) -> None:
+        """Build later pipelines with `visualizer_factory` (None restores the default).
+
+        The running pipeline is stopped so whatever it holds, such as the
+        capture device, is released now; subscribers see an error and
+        resubscribe onto the new source.
+        """
+        with self._lock:
+            self.visualizer_factory = visualizer_factory or self.default_factory
+        self.close()
+
+    def running(self) -> bool:
+        return self.visualizer is not None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            subscribers = [
+                {
+                    "id": sub.id,
+                    "annotated": sub.annotated,
+                    "max_fps": round(1.0 / sub.interval, 2) if sub.interval else None,
+                    "delivered": sub.delivered,
+                    "dropped": sub.dropped,
+                }
+                for sub in self._subscribers.values()
+            ]
+            return {
+                "running": self.visualizer is not None,
+                "opened_at": self.opened_at,
+                "frames": self.frames,
+                "fps": round(1.0 / self._frame_interval, 1) if self._frame_interval else 0.0,
+                "subscribers": subscribers,
+                "quality": getattr(self.visualizer, "quality_status", lambda: None)(),
+                "backends": getattr(self.visualizer, "backend_status", lambda: None)(),
+            }
+
+    def close(self) -> None:
+        self._stop.set()
+        with self._lock:
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.pop(subscription.id, None)
+            if not self._subscribers:
+                self._idle_since = time.monotonic()
+
+    def _run(self, visualizer: Any) -> None:
+        last = time.monotonic()
+        orphaned: List[Subscription] = []
+        error: BaseException = RuntimeError("Camera broker closed.")
+        try:
+            while True:
+                with self._lock:
+                    subscribers = list(self._subscribers.values())
+                    if self._stop.is_set():
+                        orphaned = self._detach()
+                        break
+                    if (
+                        not subscribers
+                        and self._idle_since is not None
+                        and time.monotonic() - self._idle_since >= self.idle_timeout
+                    ):
+                        self.visualizer = None
+                        break
+                if not subscribers:
+                    time.sleep(0.05)
+                    continue
+
+                annotated = any(sub.annotated for sub in subscribers)
+                frame, scores = visualizer.process_frame(draw=annotated)
+                now = time.monotonic()
+                elapsed = now - last
+                last = now
+                self._frame_interval = (
+                    0.9 * self._frame_interval + 0.1 * elapsed if self._frame_interval else elapsed
+                )
+                self.frames += 1
+                metrics.inc("camera_frames_total", source="broker")
+                item = BrokerFrame(
+                    self.frames, now, frame, scores, visualizer.last_bbox, tuple(getattr(visualizer, "last_faces", ()))
+                )
+                for sub in subscribers:
+                    sub._offer(item)
+        except Exception as exc:  # noqa: BLE001 - surfaced to every subscriber
+            error = exc
+            with self._lock:
+                orphaned = self._detach()
+        finally:
+            # No lock from here on: `subscribe()` may be holding it while it joins this thread.
+            visualizer.release()
+        for sub in orphaned:
+            sub._fail(error)
+
+    def _detach(self) -> List[Subscription]:
+        """Drop the pipeline and every subscriber; caller holds the lock."""
+        self.visualizer = None
+        subscribers = list(self._subscribers.values())
+        self._subscribers.clear()
+        return subscribers
+
+
+class BrokerVisualizer:
+    """`EmotionVisualizer`-shaped adapter over a broker subscription.
+
+    Lets code written against `process_frame()` / `release()` (sessions,
+    action helpers) share the broker's device instead of opening its own.
+    """
+
+    def __init__(self, broker: CameraBroker, *, annotated: bool = True, timeout: float = 2.0) -> None:
+        self.broker = broker
+        self.timeout = timeout
+        self.is_listening = False
+        self._subscription = broker.subscribe(annotated=annotated)
+
+    @property
+    def analyzer(self) -> Any:
+        visualizer = self.broker.visualizer
+        return getattr(visualizer, "analyzer", None)
+
+    def process_frame(self):
+        item = self._subscription.get(timeout=self.timeout)
+        if item is None:
+            raise RuntimeError("No frame from the camera broker.")
+        return item.frame, item.scores
+
+    def analyze_frame(self):
+        item = self._subscription.get(timeout=self.timeout)
+        if item is None:
+            raise RuntimeError("No frame from the camera broker.")
+        return item.scores, item.bbox
+
+    def release(self) -> None:
+        self._subscription.close()
+
+
+_default_broker: Optional[CameraBroker] = None
+_default_lock = threading.Lock()
+
+
+def _default_factory() -> Any:
+    try:
+        from .camera import EmotionVisualizer
+    except ImportError:
+        from camera import EmotionVisualizer  # type: ignore
+    # Headless: scores-only subscribers skip the FaceMesh pass; annotated ones still get contours.
+    return EmotionVisualizer(headless=True)
+
+
+def get_broker() -> CameraBroker:
+    """Process-wide broker for camera index 0."""
+    # The API imports this module as `project.camera_broker` while session code
+    # imports `camera_broker`; both must hand out the same broker.
+    canonical = sys.modules.get("project.camera_broker")
+    if canonical is not None and canonical is not sys.modules.get(__name__):
+        return canonical.get_broker()
+    global _default_broker
+    with _default_lock:
+        if _default_broker is None:
+            _default_broker = CameraBroker(_default_factory)
+        return _default_broker
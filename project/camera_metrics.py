@@ -0,0 +1,218 @@
+"""Stage timers and counters for the camera hot path, rendered in Prometheus text format.
+
+    with metrics.stage("mediapipe"):
+        ...
+    metrics.inc("camera_frames_total", source="visualizer")
+
+Everything is aggregated in process: fixed-bucket histograms per stage,
+labelled counters and gauges. With `CAMERA_METRICS=0` `stage()` hands back
+a shared no-op context manager and the counters return immediately.
+"""
+
+from __future__ import annotations
+
+import bisect
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+METRICS_ENABLED = os.getenv("CAMERA_METRICS", "1") == "1"
+
+# Seconds; covers sub-millisecond drawing up to multi-second model loads.
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0)
+STAGE_METRIC = "camera_stage_seconds"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_HELP = {
+    STAGE_METRIC: "Time spent in each camera pipeline stage.",
+    "camera_frames_total": "Frames read by each camera loop.",
+    "camera_faces_total": "Faces found, summed over frames; divide by camera_frames_total for faces per frame.",
+    "camera_dropped_frames_total": "Frames or crops discarded before they were analyzed or delivered.",
+    "camera_effective_fps": "Smoothed frames per second of each camera loop.",
+    "camera_backend_timeouts_total": "Frames fused without a backend because it missed the per-frame deadline.",
+    "camera_backend_skipped_total": "Frames a backend sat out because its previous call was still running.",
+    "camera_score_reuse_total": "Crops answered from the previous analysis (result=hit) or analyzed, by reason.",
+    "inference_worker_restarts_total": "Emotion pool workers that died and were respawned.",
+    "log_write_errors_total": "Batches the background log writer failed to write; see log_writer_last_error.",
+    "log_writer_last_error": "Unix time of each log writer's most recent failure, labelled with the error.",
+    "log_dropped_lines_total": "Log lines discarded by the background log writer: reason=backlog when it fell too far behind, write_error when a batch failed.",
+}
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class _StageTimer:
+    __slots__ = ("registry", "labels", "started")
+
+    def __init__(self, registry: "MetricsRegistry", labels: Labels) -> None:
+        self.registry = registry
+        self.labels = labels
+
+    def __enter__(self) -> "_StageTimer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.registry.observe(STAGE_METRIC, time.perf_counter() - self.started, self.labels)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class FpsMeter:
+    """Smoothed rate of `tick()` calls, published as `camera_effective_fps{source=...}`."""
+
+    def __init__(self, registry: "MetricsRegistry", source: str, smoothing: float = 0.1) -> None:
+        self.registry = registry
+        self.source = source
+        self.smoothing = smoothing
+        self.fps = 0.0
+        self._last: Optional[float] = None
+
+    def tick(self) -> float:
+        now = time.perf_counter()
+        if self._last is not None and now > self._last:
+            instant = 1.0 / (now - self._last)
+            self.fps = instant if not self.fps else self.fps + self.smoothing * (instant - self.fps)
+            self.registry.set("camera_effective_fps", self.fps, source=self.source)
+        self._last = now
+        return self.fps
+
+
+class MetricsRegistry:
+    def __init__(self, *, enabled: bool = METRICS_ENABLED) -> None:
+        self.enabled = enabled
+        self._histograms: Dict[str, Dict[Labels, _Histogram]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._gauges: Dict[str, Dict[Labels, float]] = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name: str, **labels: str):
+        """Context manager timing one pass through `name` into `camera_stage_seconds`."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, (("stage", name),) + tuple(sorted(labels.items())))
+
+    def record(self, name: str, seconds: float, **labels: str) -> None:
+        """Add a stage duration measured by the caller, for spans that do not fit a `with` block."""
+        if not self.enabled:
+            return
+        self.observe(STAGE_METRIC, seconds, (("stage", name),) + tuple(sorted(labels.items())))
+
+    def observe(self, metric: str, value: float, labels: Labels = (), buckets: Sequence[float] = STAGE_BUCKETS) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            series = self._histograms.setdefault(metric, {})
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, metric: str, amount: float = 1.0, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(metric, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def set(self, metric: str, value: float, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._gauges.setdefault(metric, {})[key] = float(value)
+
+    def fps_meter(self, source: str) -> FpsMeter:
+        return FpsMeter(self, source)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    def render(self, extra_gauges: Optional[Dict[str, Dict[Labels, float]]] = None) -> str:
+        """Prometheus text exposition (format 0.0.4) of everything recorded so far."""
+        lines: List[str] = []
+        with self._lock:
+            for metric, series in sorted(self._histograms.items()):
+                _header(lines, metric, "histogram")
+                for labels, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{metric}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{metric}_sum{_labels(labels)} {histogram.total:.9g}")
+                    lines.append(f"{metric}_count{_labels(labels)} {histogram.count}")
+            for metric, series in sorted(self._counters.items()):
+                _header(lines, metric, "counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{metric}{_labels(labels)} {value:.9g}")
+            gauges = {metric: dict(series) for metric, series in self._gauges.items()}
+        for metric, series in (extra_gauges or {}).items():
+            gauges.setdefault(metric, {}).update(series)
+        for metric, series in sorted(gauges.items()):
+            _header(lines, metric, "gauge")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{metric}{_labels(labels)} {value:.9g}")
+        return "\n".join(lines) + "\n"
+
+
+def _header(lines: List[str], metric: str, kind: str) -> None:
+    if metric in _HELP:
+        lines.append(f"# HELP {metric} {_HELP[metric]}")
+    lines.append(f"# TYPE {metric} {kind}")
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _shared_registry() -> MetricsRegistry:
+    # The API loads this module as `project.camera_metrics`, session code as
+    # `camera_metrics`; both must record into one registry.
+    for name in ("project.camera_metrics", "camera_metrics"):
+        module = sys.modules.get(name)
+        if module is not None and module is not sys.modules.get(__name__):
+            existing = getattr(module, "metrics", None)
+            if existing is not None:
+                return existing
+    return MetricsRegistry()
+
+
+metrics = _shared_registry()
@@ -17,6 +17,7 @@ from elevenlabs.types import (
     SpeechToTextWebhookResponseModel,
 )
 from gemini_client1 import get_trip_response
+from log_writer import get_log_writer
 from prompts import INTRO_PROMPT
 
 try:
@@ -261,10 +262,8 @@ def log_conversation(role: str, text: str, *, log_path: Path = CONVERSATION_LOG)
     """
     Append a timestamped entry to the conversation log.
     """
-    log_path.parent.mkdir(parents=True, exist_ok=True)
     timestamp = datetime.now(UTC).isoformat()
-    with log_path.open("a", encoding="utf-8") as handle:
-        handle.write(f"{timestamp} | {role.upper()} | {text.strip()}\n")
+    get_log_writer(log_path).write(f"{timestamp} | {role.upper()} | {text.strip()}")
     return log_path
 
 
@@ -272,8 +271,8 @@ def reset_conversation_log(log_path: Path = CONVERSATION_LOG) -> Path:
     """
     Clear the persistent conversation log so only the latest session is stored.
     """
-    log_path.parent.mkdir(parents=True, exist_ok=True)
-    log_path.write_text("", encoding="utf-8")
+    # Through the writer, so lines still queued from the last session cannot land after the reset.
+    get_log_writer(log_path).truncate()
     return log_path
 
 
@@ -0,0 +1,168 @@
+"""Pluggable emotion classifiers for `EmotionFusionEngine`.
+
+DeepFace and FER are built into the engine. Anything else implements
+`EmotionBackend`: a `name` (its key in fusion weights, metrics and stats) and
+`analyze(crop)` returning raw scores keyed by emotion. The engine hands every
+backend the same preprocessed BGR crop.
+
+`OnnxEmotionBackend` runs a FER2013-style classifier with ONNX Runtime, so a
+process configured with `CAMERA_EMOTION_BACKENDS=onnx` never imports
+TensorFlow. int8 models (dynamic or QDQ quantized, see `quantize_int8`) load
+like float ones.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    from .emotion_spectrum import EMOTION_KEYS
+    from .model_registry import model_registry
+except ImportError:
+    from emotion_spectrum import EMOTION_KEYS  # type: ignore
+    from model_registry import model_registry  # type: ignore
+
+# Comma-separated; "deepface" and "fer" are the built-in TensorFlow backends, "onnx" loads `CAMERA_ONNX_MODEL`.
+EMOTION_BACKENDS = tuple(
+    name.strip() for name in os.getenv("CAMERA_EMOTION_BACKENDS", "deepface,fer").split(",") if name.strip()
+)
+BUILTIN_BACKENDS = ("deepface", "fer")
+ONNX_MODEL = os.getenv("CAMERA_ONNX_MODEL") or None
+ONNX_THREADS = int(os.getenv("CAMERA_ONNX_THREADS", "0"))
+
+# Class order of FER2013, which DeepFace, FER and most published ONNX emotion models share.
+FER2013_LABELS = ("angry", "disgust", "fear", "happy", "sad", "surprise", "neutral")
+
+
+class EmotionBackend:
+    name = "backend"
+
+    def analyze(self, face_roi: np.ndarray) -> Dict[str, float]:
+        raise NotImplementedError
+
+    def analyze_batch(self, face_rois: Sequence[np.ndarray]) -> List[Dict[str, float]]:
+        return [self.analyze(face_roi) for face_roi in face_rois]
+
+
+class OnnxEmotionBackend(EmotionBackend):
+    """Emotion classifier served by ONNX Runtime.
+
+    The input layout (NCHW or NHWC), channel count (1 = grayscale, 3 = RGB),
+    size and dtype are read from the model. Class labels come from `labels`,
+    the model's `labels` metadata entry (comma-separated) or FER2013 order.
+    Classes outside `EMOTION_KEYS` (e.g. "contempt") are ignored; logits are
+    turned into probabilities with a softmax.
+    """
+
+    def __init__(
+        self,
+        model_path: "str | os.PathLike[str]",
+        *,
+        labels: Optional[Sequence[str]] = None,
+        name: str = "onnx",
+        threads: int = ONNX_THREADS,
+    ) -> None:
+        self.model_path = Path(model_path).resolve()
+        if not self.model_path.is_file():
+            raise FileNotFoundError(f"ONNX emotion model not found: {self.model_path}")
+        self.name = name
+        self.threads = threads
+        self._labels = tuple(labels) if labels is not None else None
+        self._layout: Optional[Tuple[Any, ...]] = None
+        # One session per model file, shared by every engine in the process.
+        self._registry_name = f"onnx:{self.model_path}"
+        if self._registry_name not in model_registry:
+            model_registry.register(self._registry_name, self._load_session)
+
+    @classmethod
+    def from_env(cls) -> "OnnxEmotionBackend":
+        if not ONNX_MODEL:
+            raise ValueError("CAMERA_EMOTION_BACKENDS includes 'onnx' but CAMERA_ONNX_MODEL is not set.")
+        return cls(ONNX_MODEL)
+
+    def _load_session(self) -> Any:
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if self.threads > 0:
+            options.intra_op_num_threads = self.threads
+        return ort.InferenceSession(str(self.model_path), options, providers=["CPUExecutionProvider"])
+
+    def _inspect(self, session: Any) -> Tuple[Any, ...]:
+        model_input = session.get_inputs()[0]
+        shape = list(model_input.shape)
+        channels_first = len(shape) == 4 and shape[1] in (1, 3)
+        channels = shape[1] if channels_first else (shape[-1] if len(shape) == 4 else 1)
+        spatial = shape[2:4] if channels_first else shape[1:3]
+        height, width = (dim if isinstance(dim, int) and dim > 0 else 48 for dim in spatial)
+        dtype = np.uint8 if model_input.type == "tensor(uint8)" else np.float32
+        labels = self._labels
+        if labels is None:
+            metadata = session.get_modelmeta().custom_metadata_map
+            labels = tuple(label.strip() for label in metadata.get("labels", "").split(",") if label.strip())
+        labels = tuple(labels) or FER2013_LABELS
+        return model_input.name, channels_first, channels, (width, height), dtype, labels
+
+    def analyze(self, face_roi: np.ndarray) -> Dict[str, float]:
+        return self.analyze_batch([face_roi])[0]
+
+    def analyze_batch(self, face_rois: Sequence[np.ndarray]) -> List[Dict[str, float]]:
+        if not face_rois:
+            return []
+        session = model_registry.get(self._registry_name)
+        if session is None:
+            return [{} for _ in face_rois]
+        if self._layout is None:
+            self._layout = self._inspect(session)
+        input_name, channels_first, channels, size, dtype, labels = self._layout
+
+        tensors = []
+        for face_roi in face_rois:
+            if channels == 1:
+                image = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY)[..., np.newaxis]
+            else:
+                image = cv2.cvtColor(face_roi, cv2.COLOR_BGR2RGB)
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA).reshape(size[1], size[0], channels)
+            tensors.append(image.transpose(2, 0, 1) if channels_first else image)
+        batch = np.stack(tensors)
+        batch = batch if dtype == np.uint8 else batch.astype(np.float32) / 255.0
+
+        outputs = np.asarray(session.run(None, {input_name: batch})[0], dtype=np.float32).reshape(len(face_rois), -1)
+        return [self._scores(row, labels) for row in outputs]
+
+    @staticmethod
+    def _scores(row: np.ndarray, labels: Sequence[str]) -> Dict[str, float]:
+        if row.min() < 0 or abs(float(row.sum()) - 1.0) > 1e-3:
+            row = np.exp(row - row.max())
+            row /= row.sum()
+        return {label: float(value) for label, value in zip(labels, row) if label in EMOTION_KEYS}
+
+
+def make_backend(spec: Any) -> EmotionBackend:
+    """Backend instance for a `CAMERA_EMOTION_BACKENDS` entry other than the built-ins."""
+    if isinstance(spec, EmotionBackend):
+        return spec
+    if spec == "onnx":
+        return OnnxEmotionBackend.from_env()
+    raise ValueError(f"Unknown emotion backend {spec!r}; expected one of {BUILTIN_BACKENDS + ('onnx',)}.")
+
+
+def backend_installed(name: str) -> bool:
+    """True when `name`'s runtime is importable (and, for ONNX, the model file exists), without importing it."""
+    if name == "onnx":
+        return importlib.util.find_spec("onnxruntime") is not None and bool(ONNX_MODEL) and Path(ONNX_MODEL).is_file()
+    return importlib.util.find_spec(name) is not None
+
+
+def quantize_int8(source: "str | os.PathLike[str]", target: "str | os.PathLike[str]") -> Path:
+    """Write a dynamically int8-quantized copy of `source` (weights int8, activations quantized at run time)."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(str(source), str(target), weight_type=QuantType.QInt8)
+    return Path(target)
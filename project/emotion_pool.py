@@ -0,0 +1,321 @@
+"""Multi-process emotion inference with shared-memory face crop handoff."""
+
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import threading
+import time
+from collections import deque
+from multiprocessing import shared_memory
+from queue import Empty
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    from .camera_metrics import metrics
+except ImportError:
+    from camera_metrics import metrics  # type: ignore
+
+# Crops larger than a slot are downscaled before the copy; classifiers run at 48-224 px anyway.
+DEFAULT_SLOT_SHAPE = (320, 320, 3)
+WARMUP_SHAPE = (224, 224, 3)
+# A result still missing after this long is skipped so later frames are not held back.
+RESULT_TIMEOUT = float(os.getenv("CAMERA_INFERENCE_RESULT_TIMEOUT", "5.0"))
+# How often the collector checks that every worker is still alive.
+LIVENESS_INTERVAL = 0.5
+# Task-queue message carrying `(fidelity, use_fer)` from the quality controller.
+_CONFIGURE = "configure"
+
+EngineFactory = Callable[[], Any]
+
+
+def _default_engine_factory() -> Any:
+    try:
+        from .camera import EmotionFusionEngine
+        from .score_gate import ScoreReuseGate
+    except ImportError:
+        from camera import EmotionFusionEngine  # type: ignore
+        from score_gate import ScoreReuseGate  # type: ignore
+    # A worker gets crops from every face, so its engine must not reuse scores across them;
+    # the visualizer checks each track's own gate before submitting.
+    return EmotionFusionEngine(reuse_gate=ScoreReuseGate(threshold=0))
+
+
+def _pool_worker(
+    slot_names: List[str],
+    tasks: "mp.Queue",
+    results: "mp.Queue",
+    engine_factory: EngineFactory,
+) -> None:
+    # Spawned workers share the parent's resource tracker, so attaching does not
+    # take ownership; the parent unlinks every block in `close()`.
+    blocks = [shared_memory.SharedMemory(name=name) for name in slot_names]
+    engine = engine_factory()
+    try:
+        # Load lazily imported models before the first real crop arrives.
+        engine.analyze(np.full(WARMUP_SHAPE, 127, dtype=np.uint8), deadline_ms=0)
+    except Exception:
+        pass
+
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            if task[0] == _CONFIGURE:
+                _, fidelity, use_fer = task
+                if hasattr(engine, "set_fidelity"):
+                    engine.set_fidelity(fidelity)
+                    engine.use_fer = use_fer
+                continue
+            seq, frame_id, slot, shape = task
+            view = np.ndarray(shape, dtype=np.uint8, buffer=blocks[slot].buf)
+            try:
+                scores = engine.analyze(view)
+            except Exception:
+                scores = {}
+            del view
+            results.put((seq, frame_id, slot, scores))
+    finally:
+        for block in blocks:
+            block.close()
+
+
+class ProcessPoolEmotionAnalyzer:
+    """Runs one warm fusion engine per worker process.
+
+    Face crops are copied into preallocated shared-memory slots, so only slot
+    indices and shapes cross the process boundary. Results come back out of
+    order and are released through `drain()` in submission (frame) order.
+    Mirrors the `submit()` / `latest()` / `drain()` surface of
+    `BackgroundEmotionAnalyzer` so the visualizer can use either.
+
+    Each worker has its own task queue, so the pool knows which crops a
+    worker holds. When a worker dies its crops are skipped, their slots
+    are freed and the worker is respawned; a result that never arrives is
+    skipped after `result_timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        *,
+        slot_shape: Tuple[int, int, int] = DEFAULT_SLOT_SHAPE,
+        slots_per_worker: int = 2,
+        engine_factory: Optional[EngineFactory] = None,
+        result_timeout: float = RESULT_TIMEOUT,
+    ) -> None:
+        self.workers = max(1, workers or (os.cpu_count() or 2) - 1)
+        self.slot_shape = slot_shape
+        self.slot_bytes = int(np.prod(slot_shape))
+        self.last_scores: Optional[Dict[str, float]] = None
+        self.last_frame_id = -1
+        self.submitted = 0
+        self.dropped = 0
+        self.completed = 0
+        self.skipped = 0
+        self.restarts = 0
+        self.result_timeout = result_timeout
+
+        self._ctx = ctx = mp.get_context("spawn")
+        slot_count = self.workers * max(1, slots_per_worker)
+        self._blocks = [
+            shared_memory.SharedMemory(create=True, size=self.slot_bytes) for _ in range(slot_count)
+        ]
+        self._free_slots: Deque[int] = deque(range(slot_count))
+        self._results = ctx.Queue()
+        self._lock = threading.Lock()
+        self._next_seq = 0
+        self._release_seq = 0
+        # None marks a sequence number that was skipped.
+        self._reorder: Dict[int, Optional[Tuple[int, Dict[str, float]]]] = {}
+        # seq -> (worker index, slot, submit time) for every crop not yet answered.
+        self._in_flight: Dict[int, Tuple[int, int, float]] = {}
+        self._load = [0] * self.workers
+        self._finished: Deque[Tuple[int, Dict[str, float]]] = deque(maxlen=64)
+        self._running = True
+        self._quality: Optional[Tuple[str, bool]] = None
+
+        self._factory = engine_factory or _default_engine_factory
+        self._tasks: List[Any] = [None] * self.workers
+        self._processes: List[Any] = [None] * self.workers
+        for idx in range(self.workers):
+            self._spawn(idx)
+        self._collector = threading.Thread(target=self._collect, name="emotion-pool-collector", daemon=True)
+        self._collector.start()
+
+    def submit(self, face_roi: np.ndarray, frame_id: Optional[int] = None) -> bool:
+        """Copy a crop into a free slot; drops the crop when every worker is busy."""
+        if face_roi is None or face_roi.size == 0:
+            return False
+        with self._lock:
+            if not self._running:
+                return False
+            if not self._free_slots:
+                self.dropped += 1
+                metrics.inc("camera_dropped_frames_total", reason="inference_pool")
+                return False
+            slot = self._free_slots.popleft()
+
+        crop = self._fit_to_slot(face_roi)
+        view = np.ndarray(crop.shape, dtype=np.uint8, buffer=self._blocks[slot].buf)
+        view[...] = crop
+        del view
+        with self._lock:
+            if not self._running:
+                return False
+            # Least-loaded worker; the sequence number is taken here so it always has an owner.
+            worker = min(range(self.workers), key=self._load.__getitem__)
+            seq = self._next_seq
+            self._next_seq += 1
+            self.submitted += 1
+            self._in_flight[seq] = (worker, slot, time.monotonic())
+            self._load[worker] += 1
+            self._tasks[worker].put((seq, -1 if frame_id is None else frame_id, slot, crop.shape))
+        return True
+
+    def set_quality(self, fidelity: str, use_fer: bool) -> None:
+        """Apply a quality level's engine settings in every worker, including ones respawned later."""
+        with self._lock:
+            self._quality = (fidelity, use_fer)
+            if not self._running:
+                return
+            for tasks in self._tasks:
+                tasks.put((_CONFIGURE, fidelity, use_fer))
+
+    def latest(self) -> Tuple[int, Optional[Dict[str, float]]]:
+        with self._lock:
+            return self.last_frame_id, self.last_scores
+
+    def drain(self) -> List[Tuple[int, Dict[str, float]]]:
+        """Return results finished since the last call, oldest frame first."""
+        with self._lock:
+            items = list(self._finished)
+            self._finished.clear()
+        return items
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "submitted": self.submitted,
+                "dropped": self.dropped,
+                "completed": self.completed,
+                "skipped": self.skipped,
+                "restarts": self.restarts,
+                "in_flight": len(self._blocks) - len(self._free_slots),
+            }
+
+    def close(self, timeout: float = 2.0) -> None:
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+        for tasks in self._tasks:
+            tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=timeout)
+            if process.is_alive():
+                process.terminate()
+        self._results.put(None)
+        self._collector.join(timeout=timeout)
+        for block in self._blocks:
+            block.close()
+            try:
+                block.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _fit_to_slot(self, face_roi: np.ndarray) -> np.ndarray:
+        crop = face_roi if face_roi.ndim == 3 else cv2.cvtColor(face_roi, cv2.COLOR_GRAY2BGR)
+        max_h, max_w = self.slot_shape[:2]
+        h, w = crop.shape[:2]
+        if h <= max_h and w <= max_w:
+            return crop
+        scale = min(max_h / h, max_w / w)
+        size = (max(1, int(w * scale)), max(1, int(h * scale)))
+        return cv2.resize(crop, size, interpolation=cv2.INTER_AREA)
+
+    def _spawn(self, idx: int) -> None:
+        # A fresh queue, so a respawned worker never sees tasks whose slots were already reused.
+        self._tasks[idx] = self._ctx.Queue()
+        if self._quality is not None:
+            self._tasks[idx].put((_CONFIGURE, *self._quality))
+        process = self._ctx.Process(
+            target=_pool_worker,
+            args=([block.name for block in self._blocks], self._tasks[idx], self._results, self._factory),
+            name=f"emotion-worker-{idx}",
+            daemon=True,
+        )
+        process.start()
+        self._processes[idx] = process
+
+    def _collect(self) -> None:
+        next_check = time.monotonic() + LIVENESS_INTERVAL
+        while True:
+            try:
+                item = self._results.get(timeout=LIVENESS_INTERVAL)
+            except Empty:
+                item = ()
+            if item is None or (not item and not self._running):
+                return
+            with self._lock:
+                if item:
+                    seq, frame_id, slot, scores = item
+                    owner = self._in_flight.pop(seq, None)
+                    if owner is not None:
+                        self._load[owner[0]] -= 1
+                        self._free_slots.append(slot)
+                    self.completed += 1
+                    if seq >= self._release_seq:
+                        self._reorder[seq] = (frame_id, scores)
+                now = time.monotonic()
+                if now >= next_check:
+                    next_check = now + LIVENESS_INTERVAL
+                    self._check_workers()
+                self._skip_stalled_head(now)
+                self._release_ready()
+
+    def _check_workers(self) -> None:
+        """Skip the crops of dead workers, free their slots and respawn them; caller holds the lock."""
+        if not self._running:
+            return
+        for idx, process in enumerate(self._processes):
+            if process.is_alive():
+                continue
+            lost = [seq for seq, (worker, _, _) in self._in_flight.items() if worker == idx]
+            for seq in lost:
+                _, slot, _ = self._in_flight.pop(seq)
+                self._free_slots.append(slot)
+                self._skip(seq)
+            self._load[idx] = 0
+            print(f"[emotion_pool] {process.name} exited with code {process.exitcode}; restarting it.")
+            metrics.inc("inference_worker_restarts_total")
+            self.restarts += 1
+            self._spawn(idx)
+
+    def _skip_stalled_head(self, now: float) -> None:
+        # Caller holds the lock. The slot stays taken until the late result (if any) arrives.
+        while self._release_seq not in self._reorder:
+            owner = self._in_flight.get(self._release_seq)
+            if owner is None or now - owner[2] < self.result_timeout:
+                return
+            self._skip(self._release_seq)
+            self._release_ready()
+
+    def _skip(self, seq: int) -> None:
+        if seq >= self._release_seq:
+            self._reorder[seq] = None
+            self.skipped += 1
+            metrics.inc("camera_dropped_frames_total", reason="inference_lost")
+
+    def _release_ready(self) -> None:
+        while self._release_seq in self._reorder:
+            ready = self._reorder.pop(self._release_seq)
+            self._release_seq += 1
+            if ready is not None:
+                self._finished.append(ready)
+                self.last_frame_id, self.last_scores = ready
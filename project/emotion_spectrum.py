@@ -0,0 +1,182 @@
+"""Fixed-order float32 emotion spectra.
+
+Per-frame math (normalising, smoothing, weighted aggregation, complex-emotion
+mixes) runs on small NumPy vectors ordered by `EMOTION_KEYS`. `Spectrum`
+still reads like a mapping for display code; call `to_dict()` only where a
+spectrum leaves the process as JSON.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Base classes returned by DeepFace
+EMOTION_KEYS = ["angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"]
+EMOTION_COUNT = len(EMOTION_KEYS)
+
+
+@lru_cache(maxsize=None)
+def _key_index(keys: Tuple[str, ...]) -> Dict[str, int]:
+    return {key: idx for idx, key in enumerate(keys)}
+
+
+_BASE_KEYS = tuple(EMOTION_KEYS)
+
+
+class Spectrum(Mapping):
+    """Read-only mapping view over a float32 score vector.
+
+    `labels` defaults to `EMOTION_KEYS`; complex-emotion mixes reuse the type
+    with their own label order.
+    """
+
+    __slots__ = ("vector", "labels")
+
+    def __init__(self, vector: Optional[Any] = None, labels: Sequence[str] = _BASE_KEYS) -> None:
+        self.labels = labels if isinstance(labels, tuple) else tuple(labels)
+        if vector is None:
+            self.vector = np.zeros(len(self.labels), dtype=np.float32)
+        else:
+            self.vector = np.asarray(vector, dtype=np.float32).reshape(len(self.labels))
+
+    def __getitem__(self, key: str) -> float:
+        return float(self.vector[_key_index(self.labels)[key]])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.labels)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __contains__(self, key: object) -> bool:
+        return key in _key_index(self.labels)
+
+    def __repr__(self) -> str:
+        return f"Spectrum({self.to_dict()!r})"
+
+    def __reduce__(self):
+        return Spectrum, (self.vector, self.labels)
+
+    def peak(self) -> float:
+        return float(self.vector.max()) if self.vector.size else 0.0
+
+    def dominant(self) -> Tuple[str, float]:
+        idx = int(np.argmax(self.vector))
+        return self.labels[idx], float(self.vector[idx])
+
+    def ranked(self, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """`(label, score)` pairs, highest first; ties keep label order like `sorted()`."""
+        order = np.argsort(-self.vector, kind="stable")
+        if limit is not None:
+            order = order[:limit]
+        return [(self.labels[idx], float(self.vector[idx])) for idx in order]
+
+    def to_dict(self) -> Dict[str, float]:
+        return {key: float(value) for key, value in zip(self.labels, self.vector.tolist())}
+
+
+def to_vector(scores: Any) -> np.ndarray:
+    """Raw (unnormalised) float32 vector in `EMOTION_KEYS` order; missing keys are 0."""
+    if isinstance(scores, Spectrum) and scores.labels == _BASE_KEYS:
+        return scores.vector
+    if isinstance(scores, np.ndarray):
+        return scores.astype(np.float32, copy=False).reshape(EMOTION_COUNT)
+    if not scores:
+        return np.zeros(EMOTION_COUNT, dtype=np.float32)
+    return np.fromiter(
+        (scores.get(key, 0.0) for key in EMOTION_KEYS), dtype=np.float32, count=EMOTION_COUNT
+    )
+
+
+def normalize_vector(vector: np.ndarray) -> np.ndarray:
+    total = float(vector.sum())
+    return vector / total if total else vector.copy()
+
+
+def ranked_items(spectrum: Any, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+    """Highest-first `(label, score)` pairs for a `Spectrum` or a plain dict."""
+    if isinstance(spectrum, Spectrum):
+        return spectrum.ranked(limit)
+    items = sorted(spectrum.items(), key=lambda kv: kv[1], reverse=True)
+    return items if limit is None else items[:limit]
+
+
+class RunningMean:
+    """Mean of the last `window` vectors, kept with an O(1) running sum over a ring buffer."""
+
+    def __init__(self, window: int, width: int = EMOTION_COUNT) -> None:
+        self.window = max(1, int(window))
+        self._ring = np.zeros((self.window, width), dtype=np.float32)
+        # float64 so add/subtract pairs do not drift over long sessions.
+        self._sum = np.zeros(width, dtype=np.float64)
+        self._pos = 0
+        self.count = 0
+
+    def reset(self) -> None:
+        self._ring.fill(0.0)
+        self._sum.fill(0.0)
+        self._pos = 0
+        self.count = 0
+
+    def push(self, vector: np.ndarray) -> None:
+        if self.count == self.window:
+            self._sum -= self._ring[self._pos]
+        else:
+            self.count += 1
+        self._ring[self._pos] = vector
+        self._sum += self._ring[self._pos]
+        self._pos = (self._pos + 1) % self.window
+
+    def mean(self) -> np.ndarray:
+        if not self.count:
+            return np.zeros(self._sum.shape, dtype=np.float32)
+        return (self._sum / self.count).astype(np.float32)
+
+
+class WeightedAccumulator:
+    """Running weighted sum of spectra; `add_many` folds a whole batch in one product."""
+
+    def __init__(self, width: int = EMOTION_COUNT) -> None:
+        self._totals = np.zeros(width, dtype=np.float64)
+        self.weight = 0.0
+
+    def reset(self) -> None:
+        self._totals.fill(0.0)
+        self.weight = 0.0
+
+    def add(self, vector: np.ndarray, weight: float) -> None:
+        self._totals += vector * weight
+        self.weight += weight
+
+    def add_many(self, vectors: np.ndarray, weights: np.ndarray) -> None:
+        weights = np.asarray(weights, dtype=np.float64)
+        self._totals += weights @ np.asarray(vectors, dtype=np.float64)
+        self.weight += float(weights.sum())
+
+    def mean(self) -> np.ndarray:
+        if self.weight <= 0:
+            return np.zeros(self._totals.shape, dtype=np.float32)
+        return (self._totals / self.weight).astype(np.float32)
+
+
+def mix_matrix(mixes: Dict[str, Sequence[str]]) -> Tuple[Tuple[str, ...], np.ndarray]:
+    """Rows average their component emotions, so `matrix @ base` gives every mix at once."""
+    labels = []
+    rows = []
+    index = _key_index(_BASE_KEYS)
+    for label, components in mixes.items():
+        if not components:
+            continue
+        row = np.zeros(EMOTION_COUNT, dtype=np.float32)
+        for name in components:
+            if name in index:
+                row[index[name]] += 1.0
+        row /= len(components)
+        labels.append(label)
+        rows.append(row)
+    matrix = np.stack(rows) if rows else np.zeros((0, EMOTION_COUNT), dtype=np.float32)
+    return tuple(labels), matrix
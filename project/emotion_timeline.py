@@ -0,0 +1,215 @@
+"""Per-frame emotion timelines, kept as growable arrays and stored as `.npz`.
+
+An `EmotionTimeline` records one row per analyzed frame: the time since the
+first frame, the spectrum in `EMOTION_KEYS` order (float32, zeros when no
+face was scored) and a face-present flag. Rows go into preallocated arrays
+that double when full, so appending costs a row copy rather than a Python
+dict per frame.
+
+With `CAMERA_TIMELINES=1` each question and capture keeps its timeline next
+to the summary and saves it under `CAMERA_TIMELINE_DIR` as
+`<kind>-<UTC time>.npz`; the file stem is the timeline's ID.
+`downsample()` buckets a timeline into at most N evenly spaced points for
+charting.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    from .emotion_spectrum import EMOTION_COUNT, EMOTION_KEYS, to_vector
+except ImportError:
+    from emotion_spectrum import EMOTION_COUNT, EMOTION_KEYS, to_vector  # type: ignore
+
+# Keep per-frame timelines for questions and captures (captures can also ask per request).
+TIMELINES_ENABLED = os.getenv("CAMERA_TIMELINES", "0") == "1"
+TIMELINE_DIR = Path(os.getenv("CAMERA_TIMELINE_DIR", "project/timelines"))
+INITIAL_CAPACITY = 256
+FORMAT_VERSION = 1
+
+_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+
+
+class EmotionTimeline:
+    def __init__(self, capacity: int = INITIAL_CAPACITY, *, meta: Optional[Dict[str, Any]] = None) -> None:
+        capacity = max(1, int(capacity))
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.spectra = np.zeros((capacity, EMOTION_COUNT), dtype=np.float32)
+        self.face_present = np.zeros(capacity, dtype=bool)
+        self.meta: Dict[str, Any] = dict(meta or {})
+        self.started_at: Optional[float] = None
+        self._origin: Optional[float] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def duration(self) -> float:
+        return float(self.timestamps[self._size - 1]) if self._size else 0.0
+
+    def reset(self) -> None:
+        self._size = 0
+        self.started_at = None
+        self._origin = None
+
+    def append(self, scores: Any, timestamp: Optional[float] = None) -> None:
+        """Add a frame; empty or None `scores` record a frame without a face.
+
+        `timestamp` may come from any monotonic clock (default
+        `time.monotonic()`); rows store seconds since the first frame.
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if self._origin is None:
+            self._origin = timestamp
+            self.started_at = time.time()
+        if self._size == len(self.timestamps):
+            self._grow()
+        row = self._size
+        self.timestamps[row] = timestamp - self._origin
+        if scores is not None and len(scores):
+            self.spectra[row] = to_vector(scores)
+            self.face_present[row] = True
+        else:
+            self.spectra[row] = 0.0
+            self.face_present[row] = False
+        self._size += 1
+
+    def _grow(self) -> None:
+        capacity = len(self.timestamps) * 2
+        self.timestamps = np.resize(self.timestamps, capacity)
+        self.spectra = np.resize(self.spectra, (capacity, EMOTION_COUNT))
+        self.face_present = np.resize(self.face_present, capacity)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Views of the filled rows."""
+        size = self._size
+        return {
+            "timestamps": self.timestamps[:size],
+            "spectra": self.spectra[:size],
+            "face_present": self.face_present[:size],
+        }
+
+    def downsample(self, points: int) -> Dict[str, np.ndarray]:
+        """Average into at most `points` equal-time buckets; empty buckets are dropped.
+
+        Spectra average over the frames that had a face (NaN when none did);
+        `face_present` becomes the fraction of frames with a face.
+        """
+        data = self.arrays()
+        times, spectra, present = data["timestamps"], data["spectra"], data["face_present"]
+        if not len(times) or points <= 0 or len(times) <= points:
+            with np.errstate(invalid="ignore"):
+                spectra = np.where(present[:, None], spectra, np.nan)
+            return {"timestamps": times, "spectra": spectra, "face_present": present.astype(np.float32)}
+        span = max(float(times[-1]), 1e-9)
+        buckets = np.minimum((times / span * points).astype(np.int64), points - 1)
+        counts = np.bincount(buckets, minlength=points)
+        faces = np.bincount(buckets, weights=present, minlength=points)
+        sums = np.zeros((points, EMOTION_COUNT), dtype=np.float64)
+        np.add.at(sums, buckets[present], spectra[present])
+        keep = counts > 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = (sums / faces[:, None]).astype(np.float32)
+        return {
+            "timestamps": np.bincount(buckets, weights=times, minlength=points)[keep] / counts[keep],
+            "spectra": means[keep],
+            "face_present": (faces[keep] / counts[keep]).astype(np.float32),
+        }
+
+    def save(self, path: "str | os.PathLike[str]") -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {**self.meta, "version": FORMAT_VERSION, "started_at": self.started_at}
+        with path.open("wb") as handle:
+            np.savez_compressed(
+                handle,
+                keys=np.array(EMOTION_KEYS),
+                meta=np.array(json.dumps(meta)),
+                **self.arrays(),
+            )
+        return path
+
+    @classmethod
+    def load(cls, path: "str | os.PathLike[str]") -> "EmotionTimeline":
+        with np.load(path, allow_pickle=False) as data:
+            keys = [str(key) for key in data["keys"]]
+            spectra = data["spectra"]
+            if keys != list(EMOTION_KEYS):
+                # Written with a different key order: reorder, leaving unknown keys out.
+                index = {key: column for column, key in enumerate(keys)}
+                spectra = np.stack(
+                    [spectra[:, index[key]] if key in index else np.zeros(len(spectra)) for key in EMOTION_KEYS],
+                    axis=1,
+                )
+            meta = json.loads(str(data["meta"]))
+            timeline = cls(max(1, len(data["timestamps"])), meta=meta)
+            size = len(data["timestamps"])
+            timeline.timestamps[:size] = data["timestamps"]
+            timeline.spectra[:size] = spectra
+            timeline.face_present[:size] = data["face_present"]
+        timeline._size = size
+        timeline.started_at = meta.get("started_at")
+        return timeline
+
+
+def timeline_path(timeline_id: str, directory: Path = TIMELINE_DIR) -> Path:
+    if not _ID_PATTERN.match(timeline_id):
+        raise ValueError(f"Invalid timeline id {timeline_id!r}.")
+    return directory / f"{timeline_id}.npz"
+
+
+def save_timeline(timeline: EmotionTimeline, kind: str, directory: Path = TIMELINE_DIR) -> Optional[str]:
+    """Store `timeline` as `<kind>-<UTC time>.npz` and return its ID; None when it is empty."""
+    if not len(timeline):
+        return None
+    stamp = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime(timeline.started_at or time.time()))
+    timeline_id = f"{kind}-{stamp}"
+    counter = 1
+    while timeline_path(timeline_id, directory).exists():
+        timeline_id = f"{kind}-{stamp}-{counter}"
+        counter += 1
+    timeline.meta.setdefault("kind", kind)
+    timeline.save(timeline_path(timeline_id, directory))
+    return timeline_id
+
+
+def load_timeline(timeline_id: str, directory: Path = TIMELINE_DIR) -> EmotionTimeline:
+    path = timeline_path(timeline_id, directory)
+    if not path.is_file():
+        raise FileNotFoundError(f"No timeline {timeline_id!r}.")
+    return EmotionTimeline.load(path)
+
+
+def list_timelines(directory: Path = TIMELINE_DIR) -> List[str]:
+    if not directory.is_dir():
+        return []
+    return sorted(path.stem for path in directory.glob("*.npz"))
+
+
+def timeline_payload(timeline: EmotionTimeline, points: int, digits: int = 4) -> Dict[str, Any]:
+    """JSON-ready, column-per-emotion form of `downsample(points)`; NaN becomes null."""
+    sampled = timeline.downsample(points)
+
+    def column(values: np.ndarray) -> List[Optional[float]]:
+        return [None if np.isnan(value) else value for value in np.round(values.astype(np.float64), digits).tolist()]
+
+    return {
+        "meta": timeline.meta,
+        "started_at": timeline.started_at,
+        "frames": len(timeline),
+        "duration": round(timeline.duration, 3),
+        "points": len(sampled["timestamps"]),
+        "timestamps": np.round(sampled["timestamps"], 3).tolist(),
+        "face_present": np.round(sampled["face_present"].astype(np.float64), 3).tolist(),
+        "spectra": {key: column(sampled["spectra"][:, index]) for index, key in enumerate(EMOTION_KEYS)},
+    }
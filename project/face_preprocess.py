@@ -0,0 +1,126 @@
+"""Face crop preprocessing shared by every emotion backend.
+
+The stage runs once per crop and its output feeds both DeepFace and FER.
+CLAHE objects and destination buffers are cached per thread, so steady-state
+frames do not allocate.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+# Both emotion classifiers resize faces to 48x48 internally.
+CLASSIFIER_INPUT_SIZE = 48
+
+
+@dataclass(frozen=True)
+class FidelityLevel:
+    name: str
+    # Upscale factor applied to crops whose shorter side is below `upscale_below`.
+    upscale: float
+    upscale_below: Optional[int]
+    clahe: bool
+    blur: bool
+
+
+FIDELITY_LEVELS: Dict[str, FidelityLevel] = {
+    # Original behaviour: always upscale 1.2x, CLAHE on L, 3x3 blur.
+    "full": FidelityLevel("full", upscale=1.2, upscale_below=None, clahe=True, blur=True),
+    # Skip the upscale once a face is comfortably above the classifier input.
+    "balanced": FidelityLevel(
+        "balanced", upscale=1.2, upscale_below=2 * CLASSIFIER_INPUT_SIZE, clahe=True, blur=True
+    ),
+    # Contrast only.
+    "fast": FidelityLevel("fast", upscale=1.0, upscale_below=0, clahe=True, blur=False),
+    # Pass crops through untouched.
+    "off": FidelityLevel("off", upscale=1.0, upscale_below=0, clahe=False, blur=False),
+}
+
+
+class _Arena:
+    """Grow-only byte buffer handing out contiguous views of the requested shape."""
+
+    def __init__(self) -> None:
+        self._data = np.empty(0, dtype=np.uint8)
+
+    def view(self, shape) -> np.ndarray:
+        size = int(np.prod(shape))
+        if self._data.size < size:
+            # Headroom so a face that grows a few pixels does not reallocate every frame.
+            self._data = np.empty(int(size * 1.25), dtype=np.uint8)
+        return self._data[:size].reshape(shape)
+
+
+class _ThreadBuffers(threading.local):
+    def __init__(self) -> None:
+        self.clahe = None
+        self.resized = _Arena()
+        self.lab = _Arena()
+        self.luma = _Arena()
+        self.bgr = _Arena()
+        self.out = _Arena()
+
+
+class FacePreprocessor:
+    """Contrast-enhances face crops at a named fidelity level.
+
+    Call it with `copy=False` (the default) to get a view into a per-thread
+    buffer that stays valid until the next call on the same thread; pass
+    `copy=True` when the result must outlive that, e.g. when batching.
+    """
+
+    def __init__(self, fidelity: str = "full", *, clip_limit: float = 2.0, tile_grid: int = 8) -> None:
+        if fidelity not in FIDELITY_LEVELS:
+            raise ValueError(f"Unknown fidelity {fidelity!r}; expected one of {tuple(FIDELITY_LEVELS)}.")
+        self.level = FIDELITY_LEVELS[fidelity]
+        self.clip_limit = clip_limit
+        self.tile_grid = tile_grid
+        self._buffers = _ThreadBuffers()
+
+    @property
+    def fidelity(self) -> str:
+        return self.level.name
+
+    def __call__(self, face_roi: np.ndarray, *, copy: bool = False) -> np.ndarray:
+        if face_roi is None or face_roi.size == 0:
+            return face_roi
+        level = self.level
+        if not (level.clahe or level.blur or level.upscale != 1.0):
+            return face_roi.copy() if copy else face_roi
+        if face_roi.ndim == 2:
+            face_roi = cv2.cvtColor(face_roi, cv2.COLOR_GRAY2BGR)
+
+        buffers = self._buffers
+        image = self._maybe_upscale(face_roi, buffers)
+        if level.clahe:
+            image = self._equalize(image, buffers)
+        if level.blur:
+            image = cv2.GaussianBlur(image, (3, 3), 0, dst=buffers.out.view(image.shape))
+        return image.copy() if copy else image
+
+    def _maybe_upscale(self, face_roi: np.ndarray, buffers: _ThreadBuffers) -> np.ndarray:
+        level = self.level
+        if level.upscale == 1.0:
+            return face_roi
+        h, w = face_roi.shape[:2]
+        if level.upscale_below is not None and min(h, w) >= level.upscale_below:
+            return face_roi
+        size = (int(w * level.upscale), int(h * level.upscale))
+        dst = buffers.resized.view((size[1], size[0], 3))
+        return cv2.resize(face_roi, size, dst=dst, interpolation=cv2.INTER_CUBIC)
+
+    def _equalize(self, image: np.ndarray, buffers: _ThreadBuffers) -> np.ndarray:
+        if buffers.clahe is None:
+            buffers.clahe = cv2.createCLAHE(
+                clipLimit=self.clip_limit, tileGridSize=(self.tile_grid, self.tile_grid)
+            )
+        lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB, dst=buffers.lab.view(image.shape))
+        luma = cv2.extractChannel(lab, 0, dst=buffers.luma.view(image.shape[:2]))
+        buffers.clahe.apply(luma, dst=luma)
+        cv2.insertChannel(luma, lab, 0)
+        return cv2.cvtColor(lab, cv2.COLOR_LAB2BGR, dst=buffers.bgr.view(image.shape))
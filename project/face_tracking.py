@@ -0,0 +1,294 @@
+"""Cheap face tracking between full MediaPipe detections.
+
+`FaceTracker` follows one face. `MultiFaceTracker` follows several, giving
+each a stable track ID that survives short detection gaps.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+BBox = Tuple[int, int, int, int]
+# A detector returns `(bbox, contour)` for the primary face, or None. `contour` may be None.
+Detector = Callable[[np.ndarray], Optional[Tuple[BBox, Optional[np.ndarray]]]]
+# A multi-face detector returns `(bbox, contour)` for every face it found.
+MultiDetector = Callable[[np.ndarray], List[Tuple[BBox, Optional[np.ndarray]]]]
+
+LK_PARAMS = dict(
+    winSize=(21, 21),
+    maxLevel=3,
+    criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03),
+)
+
+
+@dataclass
+class TrackedFace:
+    bbox: BBox
+    contour: Optional[np.ndarray]
+    confidence: float
+    detected: bool
+    track_id: int = 0
+
+
+def contour_bounds(contour: np.ndarray, frame_shape, pad: int = 10) -> BBox:
+    """Padded bounding box of a contour, clipped to the frame."""
+    h, w = frame_shape[:2]
+    x_min = max(int(np.min(contour[:, 0])) - pad, 0)
+    y_min = max(int(np.min(contour[:, 1])) - pad, 0)
+    x_max = min(int(np.max(contour[:, 0])) + pad, w)
+    y_max = min(int(np.max(contour[:, 1])) + pad, h)
+    return x_min, y_min, x_max, y_max
+
+
+def box_iou(a: BBox, b: BBox) -> float:
+    ix = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+class FaceTracker:
+    """Runs the full detector every `redetect_interval` frames and tracks in between.
+
+    Between detections the face-oval contour (or the bbox corners when no
+    landmarks are available) is propagated with pyramidal Lucas-Kanade
+    optical flow and a forward-backward consistency check. The share of
+    points that survive the check is the tracking confidence; when it drops
+    below `min_confidence` the detector runs again on the same frame.
+    """
+
+    def __init__(
+        self,
+        redetect_interval: int = 5,
+        *,
+        min_confidence: float = 0.6,
+        max_fb_error: float = 2.0,
+    ) -> None:
+        self.redetect_interval = max(1, int(redetect_interval))
+        self.min_confidence = min_confidence
+        self.max_fb_error = max_fb_error
+        self.detections = 0
+        self.tracked_frames = 0
+        self._prev_gray: Optional[np.ndarray] = None
+        self._points: Optional[np.ndarray] = None
+        self._has_contour = False
+        self._bbox_offsets = np.zeros(4, dtype=np.float32)
+        self._since_detection = 0
+        self.confidence = 0.0
+        # Stamped on every `TrackedFace` this tracker returns.
+        self.track_id = 0
+
+    def reset(self) -> None:
+        self._prev_gray = None
+        self._points = None
+        self._since_detection = 0
+        self.confidence = 0.0
+
+    def update(self, frame: np.ndarray, detect: Detector) -> Optional[TrackedFace]:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self._points is not None and self._since_detection + 1 < self.redetect_interval:
+            tracked = self.advance(gray, frame.shape)
+            if tracked is not None:
+                return tracked
+        self.detections += 1
+        found = detect(frame)
+        if not found:
+            self.reset()
+            return None
+        return self.seed(gray, *found)
+
+    def advance(self, gray: np.ndarray, frame_shape) -> Optional[TrackedFace]:
+        """Move the face onto `gray` with optical flow; None when tracking is lost."""
+        tracked = self._propagate(gray, frame_shape)
+        if tracked is not None:
+            self._prev_gray = gray
+            self._since_detection += 1
+            self.tracked_frames += 1
+        return tracked
+
+    def seed(self, gray: np.ndarray, bbox: BBox, contour: Optional[np.ndarray]) -> TrackedFace:
+        """Restart tracking from a detector result on `gray`."""
+        x1, y1, x2, y2 = bbox
+        if contour is not None and contour.size > 0:
+            points = contour.astype(np.float32)
+            self._has_contour = True
+        else:
+            points = np.array(
+                [(x1, y1), (x2, y1), (x2, y2), (x1, y2), ((x1 + x2) / 2, (y1 + y2) / 2)],
+                dtype=np.float32,
+            )
+            self._has_contour = False
+        # Remember where the detector's box sits relative to the tracked points.
+        px1, py1 = points.min(axis=0)
+        px2, py2 = points.max(axis=0)
+        self._bbox_offsets = np.array([x1 - px1, y1 - py1, x2 - px2, y2 - py2], dtype=np.float32)
+        self._points = points.reshape(-1, 1, 2)
+        self._prev_gray = gray
+        self._since_detection = 0
+        self.confidence = 1.0
+        return TrackedFace(bbox=bbox, contour=contour, confidence=1.0, detected=True, track_id=self.track_id)
+
+    def _propagate(self, gray: np.ndarray, frame_shape) -> Optional[TrackedFace]:
+        prev_points = self._points
+        points, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, prev_points, None, **LK_PARAMS)
+        if points is None:
+            return None
+        back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self._prev_gray, points, None, **LK_PARAMS)
+        if back is None:
+            return None
+        fb_error = np.linalg.norm((prev_points - back).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (fb_error < self.max_fb_error)
+        confidence = float(good.mean()) if good.size else 0.0
+        if confidence < self.min_confidence or good.sum() < 3:
+            return None
+
+        # Points that failed the check follow the median motion of the ones that passed.
+        shift = np.median((points - prev_points).reshape(-1, 2)[good], axis=0)
+        moved = np.where(good.reshape(-1, 1, 1), points, prev_points + shift).astype(np.float32)
+        h, w = frame_shape[:2]
+        moved[..., 0] = np.clip(moved[..., 0], 0, w - 1)
+        moved[..., 1] = np.clip(moved[..., 1], 0, h - 1)
+        self._points = moved
+        self.confidence = confidence
+
+        flat = moved.reshape(-1, 2)
+        px1, py1 = flat.min(axis=0)
+        px2, py2 = flat.max(axis=0)
+        ox1, oy1, ox2, oy2 = self._bbox_offsets
+        bbox = (
+            max(int(px1 + ox1), 0),
+            max(int(py1 + oy1), 0),
+            min(int(px2 + ox2), w),
+            min(int(py2 + oy2), h),
+        )
+        if bbox[2] <= bbox[0] or bbox[3] <= bbox[1]:
+            return None
+        contour = flat.astype(np.int32) if self._has_contour else None
+        return TrackedFace(bbox=bbox, contour=contour, confidence=confidence, detected=False, track_id=self.track_id)
+
+
+class MultiFaceTracker:
+    """Stable track IDs for up to `max_faces` faces.
+
+    The detector runs every `redetect_interval` frames (1 = every frame) and
+    finds all faces in one pass; in between, each face is carried forward by
+    its own `FaceTracker` and a lost face triggers an early detection.
+    Detections are matched to tracks greedily by box overlap. A detection
+    that matches no track opens a new one; a track missing from more than
+    `max_missed` detection passes ends. IDs are never reused, so per-face
+    state keyed by ID cannot leak from one person to another.
+    """
+
+    def __init__(
+        self,
+        max_faces: int = 4,
+        *,
+        redetect_interval: int = 1,
+        iou_threshold: float = 0.3,
+        max_missed: int = 5,
+        min_confidence: float = 0.6,
+        max_fb_error: float = 2.0,
+    ) -> None:
+        self.max_faces = max(1, int(max_faces))
+        self.redetect_interval = max(1, int(redetect_interval))
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.min_confidence = min_confidence
+        self.max_fb_error = max_fb_error
+        self.detections = 0
+        self.tracked_frames = 0
+        self._tracks: Dict[int, FaceTracker] = {}
+        self._faces: Dict[int, TrackedFace] = {}
+        self._missed: Dict[int, int] = {}
+        self._ended: List[int] = []
+        self._next_id = 1
+        self._since_detection = 0
+
+    @property
+    def track_ids(self) -> List[int]:
+        return sorted(self._tracks)
+
+    def reset(self) -> None:
+        self._ended.extend(self._tracks)
+        self._tracks.clear()
+        self._faces.clear()
+        self._missed.clear()
+        self._since_detection = 0
+
+    def pop_ended(self) -> List[int]:
+        """IDs of tracks that ended since the last call."""
+        ended, self._ended = self._ended, []
+        return ended
+
+    def update(self, frame: np.ndarray, detect: MultiDetector) -> List[TrackedFace]:
+        """Faces visible in `frame`, ordered by track ID (oldest track first)."""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        visible = [track_id for track_id in self.track_ids if not self._missed[track_id]]
+        if visible and self._since_detection + 1 < self.redetect_interval:
+            faces = []
+            for track_id in visible:
+                face = self._tracks[track_id].advance(gray, frame.shape)
+                if face is None:
+                    break
+                faces.append(face)
+            else:
+                self._since_detection += 1
+                self.tracked_frames += 1
+                self._faces.update((face.track_id, face) for face in faces)
+                return faces
+        return self._detect(frame, gray, detect)
+
+    def _detect(self, frame: np.ndarray, gray: np.ndarray, detect: MultiDetector) -> List[TrackedFace]:
+        self.detections += 1
+        self._since_detection = 0
+        found = list(detect(frame) or [])[: self.max_faces]
+
+        pairs = sorted(
+            (
+                (box_iou(self._faces[track_id].bbox, bbox), track_id, index)
+                for track_id in self._faces
+                for index, (bbox, _) in enumerate(found)
+            ),
+            reverse=True,
+        )
+        assigned: Dict[int, int] = {}
+        used_tracks = set()
+        for iou, track_id, index in pairs:
+            if iou < self.iou_threshold:
+                break
+            if index in assigned or track_id in used_tracks:
+                continue
+            assigned[index] = track_id
+            used_tracks.add(track_id)
+
+        faces = []
+        for index, (bbox, contour) in enumerate(found):
+            track_id = assigned.get(index)
+            if track_id is None:
+                track_id = self._next_id
+                self._next_id += 1
+                tracker = FaceTracker(
+                    self.redetect_interval, min_confidence=self.min_confidence, max_fb_error=self.max_fb_error
+                )
+                tracker.track_id = track_id
+                self._tracks[track_id] = tracker
+            face = self._tracks[track_id].seed(gray, bbox, contour)
+            self._faces[track_id] = face
+            self._missed[track_id] = 0
+            faces.append(face)
+
+        seen = {face.track_id for face in faces}
+        for track_id in list(self._tracks):
+            if track_id in seen:
+                continue
+            self._missed[track_id] += 1
+            if self._missed[track_id] > self.max_missed:
+                del self._tracks[track_id], self._faces[track_id], self._missed[track_id]
+                self._ended.append(track_id)
+        faces.sort(key=lambda face: face.track_id)
+        return faces
@@ -0,0 +1,402 @@
+"""Shared-memory ring of annotated frames and face spectra between processes.
+
+`/camera/start` runs `camera.py` as its own process. The API creates a
+`FrameRing` and passes its name in `CAMERA_RING`; the camera process attaches
+and `publish()`es each annotated frame with every tracked face's box, label
+and spectrum. Inside the API, `RingVisualizer` feeds those frames to the
+camera broker, so `/camera/stream` and `/camera/capture` run on the camera
+process's frames instead of opening the device a second time.
+
+One block holds a header, per-slot metadata and `slots` frame buffers. The
+writer only ever touches the slot after the newest one. A slot's `seq` is
+zeroed while it is being rewritten and set once it is complete, so a reader
+can tell whether a slot it is looking at was overwritten. `latest()` returns
+read-only views straight into the block; a view stays valid until the writer
+comes round to that slot again, `slots - 1` frames later, which `valid()`
+checks. `RingVisualizer` hands frames to consumers it does not control (the
+broker, the MJPEG encoder), so it copies each slot out and drops copies that
+were overwritten mid-copy.
+
+The header doubles as a small control channel: the reader stamps
+`reader_heartbeat` while it consumes (the writer skips the copy when nobody
+has read for `READER_TIMEOUT` seconds) and sets `stop` to ask the camera
+process to shut down cleanly.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    from .camera_metrics import metrics
+    from .emotion_spectrum import EMOTION_KEYS, Spectrum, to_vector
+except ImportError:
+    from camera_metrics import metrics  # type: ignore
+    from emotion_spectrum import EMOTION_KEYS, Spectrum, to_vector  # type: ignore
+
+# Environment variable that carries the ring's block name to the camera process.
+RING_ENV = "CAMERA_RING"
+RING_SLOTS = int(os.getenv("CAMERA_RING_SLOTS", "4"))
+# Largest frame a slot holds ("HEIGHTxWIDTH"); bigger frames are downscaled before the copy.
+RING_FRAME_SIZE = os.getenv("CAMERA_RING_FRAME_SIZE", "1080x1920")
+# The writer stops copying frames once no reader has stamped the header for this long.
+READER_TIMEOUT = float(os.getenv("CAMERA_RING_READER_TIMEOUT", "2.0"))
+# How long `RingVisualizer` waits for the camera process's next frame; covers its model start-up.
+RING_READ_TIMEOUT = float(os.getenv("CAMERA_RING_READ_TIMEOUT", "15"))
+
+MAGIC = 0x52494E47  # "RING"
+VERSION = 1
+LABEL_BYTES = 24
+POLL_SECONDS = 0.003
+
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "<u4"),
+        ("version", "<u4"),
+        ("slots", "<u4"),
+        ("max_faces", "<u4"),
+        ("height", "<u4"),
+        ("width", "<u4"),
+        # Sequence number of the newest complete slot; 0 until the first publish.
+        ("latest", "<u8"),
+        ("writer_pid", "<i8"),
+        ("writer_heartbeat", "<f8"),
+        # Control channel, written by the reader.
+        ("reader_heartbeat", "<f8"),
+        ("stop", "<u4"),
+        ("_pad", "<u4"),
+    ]
+)
+
+
+def _slot_dtype(max_faces: int) -> np.dtype:
+    return np.dtype(
+        [
+            ("seq", "<u8"),
+            ("timestamp", "<f8"),
+            ("height", "<u4"),
+            ("width", "<u4"),
+            ("face_count", "<u4"),
+            ("_pad", "<u4"),
+            ("track_ids", "<i4", (max_faces,)),
+            ("bboxes", "<i4", (max_faces, 4)),
+            # NaN rows are faces without scores this frame.
+            ("scores", "<f4", (max_faces, len(EMOTION_KEYS))),
+            ("labels", f"S{LABEL_BYTES}", (max_faces,)),
+        ]
+    )
+
+
+def parse_frame_size(spec: str) -> Tuple[int, int]:
+    height, sep, width = spec.lower().partition("x")
+    if not sep:
+        raise ValueError(f"Ring frame size {spec!r} is not of the form HEIGHTxWIDTH.")
+    return int(height), int(width)
+
+
+def _align(offset: int, alignment: int = 64) -> int:
+    return (offset + alignment - 1) // alignment * alignment
+
+
+@dataclass
+class RingFace:
+    """A tracked face as published by the camera process; shaped like `camera.FaceResult`."""
+
+    track_id: int
+    bbox: tuple
+    scores: Optional[Spectrum] = None
+    label: str = "waiting"
+
+
+@dataclass
+class RingFrame:
+    seq: int
+    timestamp: float
+    # Read-only view into the ring; see `FrameRing.valid()`.
+    frame: np.ndarray
+    faces: Tuple[RingFace, ...]
+
+
+class FrameRing:
+    """A fixed-size ring in one shared-memory block; `create()` owns it, `attach()` borrows it."""
+
+    def __init__(self, block: shared_memory.SharedMemory, *, owner: bool) -> None:
+        self.block = block
+        self.name = block.name
+        self.owner = owner
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=block.buf)
+        if int(self.header["magic"]) != MAGIC or int(self.header["version"]) != VERSION:
+            raise ValueError(f"Shared memory block {self.name!r} is not a version {VERSION} frame ring.")
+        self.slots = int(self.header["slots"])
+        self.max_faces = int(self.header["max_faces"])
+        self.frame_shape = (int(self.header["height"]), int(self.header["width"]), 3)
+        slot_dtype = _slot_dtype(self.max_faces)
+        meta_offset = _align(HEADER_DTYPE.itemsize)
+        self.meta = np.ndarray((self.slots,), dtype=slot_dtype, buffer=block.buf, offset=meta_offset)
+        self._pixels_offset = _align(meta_offset + slot_dtype.itemsize * self.slots)
+        self._slot_bytes = _align(int(np.prod(self.frame_shape)))
+        self._seq = int(self.header["latest"])
+        self.published = 0
+        self.skipped = 0
+
+    @staticmethod
+    def nbytes(slots: int, frame_size: Tuple[int, int], max_faces: int) -> int:
+        meta_offset = _align(HEADER_DTYPE.itemsize)
+        pixels_offset = _align(meta_offset + _slot_dtype(max_faces).itemsize * slots)
+        return pixels_offset + slots * _align(frame_size[0] * frame_size[1] * 3)
+
+    @classmethod
+    def create(
+        cls,
+        name: Optional[str] = None,
+        *,
+        slots: int = RING_SLOTS,
+        frame_size: Optional[Tuple[int, int]] = None,
+        max_faces: Optional[int] = None,
+    ) -> "FrameRing":
+        if max_faces is None:
+            # The camera process tracks `camera.MAX_FACES`; imported here because camera imports this module.
+            try:
+                from .camera import MAX_FACES as max_faces
+            except ImportError:
+                from camera import MAX_FACES as max_faces  # type: ignore
+        frame_size = frame_size or parse_frame_size(RING_FRAME_SIZE)
+        slots = max(2, slots)
+        block = shared_memory.SharedMemory(
+            name=name or f"camera_ring_{uuid.uuid4().hex[:12]}",
+            create=True,
+            size=cls.nbytes(slots, frame_size, max_faces),
+        )
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=block.buf)
+        header[...] = 0
+        header["slots"] = slots
+        header["max_faces"] = max_faces
+        header["height"], header["width"] = frame_size
+        header["version"] = VERSION
+        header["magic"] = MAGIC
+        return cls(block, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "FrameRing":
+        try:
+            block = shared_memory.SharedMemory(name=name, track=False)  # type: ignore[call-arg]
+        except TypeError:
+            # Before 3.13 attaching registers the block with this process's resource
+            # tracker, which would unlink it when this process exits; the creator owns it.
+            block = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(block._name, "shared_memory")  # type: ignore[attr-defined]
+        return cls(block, owner=False)
+
+    @classmethod
+    def from_env(cls) -> Optional["FrameRing"]:
+        """The ring named by `CAMERA_RING`, or None when this process was not given one."""
+        name = os.getenv(RING_ENV)
+        if not name:
+            return None
+        try:
+            ring = cls.attach(name)
+        except (FileNotFoundError, ValueError) as exc:
+            print(f"[frame_ring] Not publishing frames: {exc}")
+            return None
+        ring.header["writer_pid"] = os.getpid()
+        return ring
+
+    # -- writer side ---------------------------------------------------------
+
+    def reader_active(self) -> bool:
+        return time.time() - float(self.header["reader_heartbeat"]) < READER_TIMEOUT
+
+    @property
+    def stop_requested(self) -> bool:
+        return bool(self.header["stop"])
+
+    def publish(self, frame: np.ndarray, faces: Iterable[Any] = (), timestamp: Optional[float] = None) -> bool:
+        """Copy `frame` and its faces into the next slot; False when no reader is listening.
+
+        `faces` are `FaceResult`-shaped (`track_id`, `bbox`, `scores`, `label`);
+        anything past `max_faces` is dropped.
+        """
+        now = time.time()
+        self.header["writer_heartbeat"] = now
+        if not self.reader_active():
+            self.skipped += 1
+            return False
+        with metrics.stage("ring_publish"):
+            frame = self._fit(frame)
+            seq = self._seq + 1
+            index = (seq - 1) % self.slots
+            meta = self.meta[index]
+            # Zero first: a reader that sees seq 0 or a newer seq knows the slot moved on.
+            meta["seq"] = 0
+            height, width = frame.shape[:2]
+            self._view(index, height, width)[...] = frame
+            count = 0
+            for face in faces:
+                if count == self.max_faces:
+                    break
+                meta["track_ids"][count] = face.track_id
+                meta["bboxes"][count] = face.bbox
+                meta["scores"][count] = np.nan if not face.scores else to_vector(face.scores)
+                meta["labels"][count] = str(face.label or "").encode("utf-8")[:LABEL_BYTES]
+                count += 1
+            meta["face_count"] = count
+            meta["height"], meta["width"] = height, width
+            meta["timestamp"] = now if timestamp is None else timestamp
+            meta["seq"] = seq
+            self.header["latest"] = seq
+            self._seq = seq
+            self.published += 1
+        return True
+
+    def _fit(self, frame: np.ndarray) -> np.ndarray:
+        if frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        max_h, max_w = self.frame_shape[:2]
+        h, w = frame.shape[:2]
+        if h <= max_h and w <= max_w:
+            return frame
+        scale = min(max_h / h, max_w / w)
+        return cv2.resize(frame, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+    def _view(self, index: int, height: int, width: int) -> np.ndarray:
+        # Packed at the start of the slot so every frame is one contiguous array.
+        offset = self._pixels_offset + index * self._slot_bytes
+        return np.ndarray((height, width, 3), dtype=np.uint8, buffer=self.block.buf, offset=offset)
+
+    # -- reader side ---------------------------------------------------------
+
+    def touch_reader(self) -> None:
+        self.header["reader_heartbeat"] = time.time()
+
+    def request_stop(self) -> None:
+        self.header["stop"] = 1
+
+    def writer_alive(self, within: float = READER_TIMEOUT) -> bool:
+        return time.time() - float(self.header["writer_heartbeat"]) < within
+
+    def latest(self, after: int = 0) -> Optional[RingFrame]:
+        """The newest complete frame with a sequence number above `after`, or None."""
+        seq = int(self.header["latest"])
+        if seq <= after:
+            return None
+        index = (seq - 1) % self.slots
+        meta = self.meta[index].copy()
+        if int(meta["seq"]) != seq:
+            # Overwritten between reading `latest` and the slot; the next poll sees the newer frame.
+            return None
+        frame = self._view(index, int(meta["height"]), int(meta["width"]))
+        frame.flags.writeable = False
+        faces = []
+        for slot in range(int(meta["face_count"])):
+            vector = meta["scores"][slot]
+            faces.append(
+                RingFace(
+                    int(meta["track_ids"][slot]),
+                    tuple(int(value) for value in meta["bboxes"][slot]),
+                    None if np.isnan(vector).any() else Spectrum(vector.copy()),
+                    meta["labels"][slot].decode("utf-8", "replace"),
+                )
+            )
+        if int(self.meta[index]["seq"]) != seq:
+            return None
+        return RingFrame(seq, float(meta["timestamp"]), frame, tuple(faces))
+
+    def valid(self, item: RingFrame) -> bool:
+        """True while `item.frame` still holds the frame it was read as."""
+        return int(self.meta[(item.seq - 1) % self.slots]["seq"]) == item.seq
+
+    def wait(self, after: int = 0, timeout: Optional[float] = None) -> Optional[RingFrame]:
+        """Block until a frame newer than `after` is published; None on timeout or stop."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            self.touch_reader()
+            item = self.latest(after)
+            if item is not None:
+                return item
+            if self.stop_requested or (deadline is not None and time.monotonic() >= deadline):
+                return None
+            time.sleep(POLL_SECONDS)
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "slots": self.slots,
+            "frame_size": list(self.frame_shape[:2]),
+            "latest": int(self.header["latest"]),
+            "writer_pid": int(self.header["writer_pid"]) or None,
+            "writer_alive": self.writer_alive(),
+            "reader_active": self.reader_active(),
+            "stop_requested": self.stop_requested,
+        }
+
+    def close(self) -> None:
+        # numpy views pin the buffer; drop ours before unmapping.
+        self.header = self.meta = None  # type: ignore[assignment]
+        try:
+            self.block.close()
+        except BufferError:
+            # A consumer still holds a frame view; the mapping goes when that view does.
+            pass
+        if self.owner:
+            try:
+                self.block.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class RingVisualizer:
+    """`EmotionVisualizer`-shaped source that reads the camera process's ring.
+
+    Frames arrive already annotated by the camera process, so `draw` is
+    ignored. Each frame is copied out of its slot, because subscribers may
+    hold it for longer than the writer takes to lap the ring; a copy whose
+    slot was rewritten meanwhile is dropped and the next frame read instead.
+    """
+
+    headless = True
+
+    def __init__(self, ring: FrameRing, *, timeout: float = RING_READ_TIMEOUT) -> None:
+        self.ring = ring
+        self.timeout = timeout
+        self.last_bbox: Optional[Tuple[int, int, int, int]] = None
+        self.last_faces: Tuple[RingFace, ...] = ()
+        self._seq = int(ring.header["latest"])
+
+    def process_frame(self, draw=None):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with metrics.stage("ring_wait"):
+                item = self.ring.wait(self._seq, timeout=max(0.0, deadline - time.monotonic()))
+            if item is None:
+                if self.ring.stop_requested:
+                    raise RuntimeError("Camera process is stopping.")
+                raise RuntimeError(f"No frame from the camera process within {self.timeout:g}s.")
+            self._seq = item.seq
+            frame = item.frame.copy()
+            if self.ring.valid(item):
+                break
+            metrics.inc("camera_dropped_frames_total", reason="ring_overwritten")
+        self.last_faces = item.faces
+        primary = item.faces[0] if item.faces else None
+        self.last_bbox = primary.bbox if primary is not None else None
+        return frame, (primary.scores if primary is not None else None)
+
+    def quality_status(self):
+        return None
+
+    def backend_status(self):
+        return None
+
+    def release(self) -> None:
+        # The ring belongs to whoever created it; nothing to free per pipeline.
+        self.last_faces = ()
@@ -0,0 +1,213 @@
+"""Runs the emotion backends side by side under a per-frame deadline.
+
+Each backend (DeepFace, FER) owns one worker thread. `run()` hands the crop
+to every enabled backend at once and waits until all answer or the deadline
+passes, so a frame costs the slowest backend rather than the sum of them. A
+backend that misses the deadline is left out of that frame's fusion; its
+call keeps running in the background and the backend is skipped for later
+frames until it is free again, so one stall never queues up work.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import Future, wait
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional
+
+try:
+    from .camera_metrics import metrics
+except ImportError:
+    from camera_metrics import metrics  # type: ignore
+
+Backend = Callable[[Any], Any]
+
+# Per-frame budget for each backend; 0 waits for every backend, as the sequential engine did.
+BACKEND_DEADLINE_MS = float(os.getenv("CAMERA_BACKEND_DEADLINE_MS", "300"))
+# "deepface=0.6,fer=0.4"; backends left out weigh 1.0. Weights are renormalized over the backends that answered.
+FUSION_WEIGHTS = os.getenv("CAMERA_FUSION_WEIGHTS", "")
+# Job that tells a worker thread to exit.
+_STOP = object()
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    weights: Dict[str, float] = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"Fusion weight {item!r} is not of the form backend=weight.")
+        weight = float(value)
+        if weight < 0:
+            raise ValueError(f"Fusion weight for {name.strip()!r} must not be negative.")
+        weights[name.strip()] = weight
+    return weights
+
+
+class _BackendWorker:
+    """One daemon thread running a single backend call at a time."""
+
+    def __init__(self, name: str, fn: Backend) -> None:
+        self.name = name
+        self.fn = fn
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.last_ms = 0.0
+        self.mean_ms = 0.0
+        self._job: Any = None
+        self._busy = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=f"fusion-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, face_roi: Any) -> Optional[Future]:
+        """Start a call, or return None while the previous one is still running."""
+        future: Future = Future()
+        with self._condition:
+            if self._closed:
+                return None
+            if self._busy:
+                self.skipped += 1
+                return None
+            self._busy = True
+            self._job = (face_roi, future)
+            self._condition.notify()
+        return future
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Stop the thread once its current call (if any) returns."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            queued, self._job = self._job, _STOP
+            self._condition.notify()
+        if queued is not None and queued is not _STOP:
+            # A call that never started answers empty, so nobody waits on it forever.
+            queued[1].set_result({})
+        self._thread.join(timeout)
+
+    def missed_deadline(self) -> None:
+        with self._condition:
+            self.timeouts += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "skipped": self.skipped,
+                "busy": self._busy,
+                "last_ms": round(self.last_ms, 2),
+                "mean_ms": round(self.mean_ms, 2),
+            }
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while self._job is None:
+                    self._condition.wait()
+                if self._job is _STOP:
+                    return
+                face_roi, future = self._job
+                self._job = None
+            started = time.perf_counter()
+            try:
+                result = self.fn(face_roi)
+                failed = False
+            except Exception:
+                result = {}
+                failed = True
+            seconds = time.perf_counter() - started
+            # Recorded whether or not the frame still waits for it: this is the backend's real latency.
+            metrics.record(self.name, seconds)
+            with self._condition:
+                self.calls += 1
+                self.errors += int(failed)
+                self.last_ms = seconds * 1000.0
+                self.mean_ms = self.last_ms if self.calls == 1 else self.mean_ms + 0.1 * (self.last_ms - self.mean_ms)
+                self._busy = False
+            future.set_result(result)
+            # Drop the crop so a closed worker does not pin it.
+            face_roi = None
+
+
+class ConcurrentBackends:
+    """Fan a crop out to named backends and collect whatever finishes before the deadline."""
+
+    def __init__(
+        self,
+        backends: Mapping[str, Backend],
+        *,
+        deadline_ms: float = BACKEND_DEADLINE_MS,
+        weights: Optional[Mapping[str, float]] = None,
+    ) -> None:
+        self.deadline_ms = deadline_ms
+        self.weights = {name: 1.0 for name in backends}
+        self.weights.update(weights if weights is not None else parse_weights(FUSION_WEIGHTS))
+        self._backends = dict(backends)
+        self._workers: Dict[str, _BackendWorker] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def close(self, timeout: float = 1.0) -> None:
+        """Stop every worker thread; a call still running past `timeout` finishes on its own."""
+        with self._lock:
+            self._closed = True
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for worker in workers:
+            worker.close(timeout)
+
+    def _worker(self, name: str) -> _BackendWorker:
+        # Threads start on first use; engines that only run batches never create them.
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("ConcurrentBackends is closed.")
+            worker = self._workers.get(name)
+            if worker is None:
+                worker = self._workers[name] = _BackendWorker(name, self._backends[name])
+            return worker
+
+    def run(self, face_roi: Any, enabled: Iterable[str], deadline_ms: Optional[float] = None) -> Dict[str, Any]:
+        """Scores keyed by backend for the enabled backends that answered in time.
+
+        `face_roi` must not be modified afterwards: a backend that misses the
+        deadline is still reading it.
+        """
+        deadline_ms = self.deadline_ms if deadline_ms is None else deadline_ms
+        # Held for the whole call: `close()` may clear `_workers` while results are collected.
+        workers = {name: self._worker(name) for name in enabled}
+        pending: Dict[str, Future] = {}
+        for name, worker in workers.items():
+            future = worker.submit(face_roi)
+            if future is None:
+                metrics.inc("camera_backend_skipped_total", backend=name)
+            else:
+                pending[name] = future
+        if not pending:
+            return {}
+        wait(pending.values(), timeout=deadline_ms / 1000.0 if deadline_ms > 0 else None)
+        results: Dict[str, Any] = {}
+        for name, future in pending.items():
+            if future.done():
+                results[name] = future.result()
+            else:
+                workers[name].missed_deadline()
+                metrics.inc("camera_backend_timeouts_total", backend=name)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            workers = dict(self._workers)
+        return {
+            "deadline_ms": self.deadline_ms,
+            "weights": dict(self.weights),
+            "backends": {name: worker.stats() for name, worker in workers.items()},
+        }
@@ -0,0 +1,456 @@
+"""Shared local inference service that micro-batches face crops from many clients.
+
+Run one host per node so API workers and camera processes stop loading their
+own DeepFace/FER stacks:
+
+    python -m project.inference_server --address /tmp/rest-quest-inference.sock
+
+Point any `EmotionFusionEngine` at it with `CAMERA_INFERENCE_SERVER=<address>`.
+
+Requests are unpickled, so only the owning user may connect. The default
+socket lives in a private (0700) per-user directory. The shared key comes
+from `CAMERA_INFERENCE_AUTHKEY` or, failing that, from a 0600 key file in
+that directory, which the server generates on first start. TCP addresses
+must be loopback unless `CAMERA_INFERENCE_ALLOW_REMOTE=1`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import getpass
+import ipaddress
+import itertools
+import os
+import secrets
+import stat
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from multiprocessing.connection import Client, Connection, Listener
+from pathlib import Path
+from queue import Empty, Queue
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# Private per-user directory for the default socket and the generated key.
+RUNTIME_DIR = Path(
+    os.getenv("CAMERA_INFERENCE_DIR")
+    or Path(os.getenv("XDG_RUNTIME_DIR") or tempfile.gettempdir()) / f"rest-quest-{getpass.getuser()}"
+)
+DEFAULT_ADDRESS = str(RUNTIME_DIR / "inference.sock")
+KEY_FILE = Path(os.getenv("CAMERA_INFERENCE_KEY_FILE") or RUNTIME_DIR / "inference.key")
+# Listening on or connecting to a non-loopback host exposes the unpickling endpoint; opt in explicitly.
+ALLOW_REMOTE = os.getenv("CAMERA_INFERENCE_ALLOW_REMOTE", "0") == "1"
+DEFAULT_MAX_BATCH = 16
+DEFAULT_MAX_LATENCY_MS = 8.0
+
+Address = Union[str, Tuple[str, int]]
+EngineFactory = Callable[[], Any]
+
+
+def parse_address(value: str, *, allow_remote: bool = ALLOW_REMOTE) -> Address:
+    """Accept a Unix socket path or `host:port` for TCP on loopback."""
+    if ":" in value and not value.startswith("/"):
+        host, port = value.rsplit(":", 1)
+        host = host.strip("[]") or "127.0.0.1"
+        if not allow_remote and not _is_loopback(host):
+            raise ValueError(
+                f"Inference address {value!r} is not on loopback; set CAMERA_INFERENCE_ALLOW_REMOTE=1 to allow it."
+            )
+        return host, int(port)
+    return value
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def private_dir(path: Path = RUNTIME_DIR) -> Path:
+    """Create `path` as 0700 and refuse it when another user owns it or can get in."""
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if os.name == "posix":
+        info = path.stat()
+        if info.st_uid != os.getuid():
+            raise PermissionError(f"{path} belongs to another user.")
+        if stat.S_IMODE(info.st_mode) & 0o077:
+            os.chmod(path, 0o700)
+    return path
+
+
+def load_authkey(*, create: bool = False) -> bytes:
+    """`CAMERA_INFERENCE_AUTHKEY`, else the key file; the server (`create=True`) generates one if missing."""
+    key = os.getenv("CAMERA_INFERENCE_AUTHKEY")
+    if key:
+        return key.encode("utf-8")
+    try:
+        return KEY_FILE.read_bytes().strip()
+    except FileNotFoundError:
+        if not create:
+            raise
+    private_dir(KEY_FILE.parent)
+    key_bytes = secrets.token_hex(32).encode("ascii")
+    try:
+        fd = os.open(KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # Another server started at the same moment; use its key.
+        return KEY_FILE.read_bytes().strip()
+    with os.fdopen(fd, "wb") as handle:
+        handle.write(key_bytes)
+    return key_bytes
+
+
+def _default_engine_factory() -> Any:
+    try:
+        from .camera import EmotionFusionEngine
+    except ImportError:
+        from camera import EmotionFusionEngine  # type: ignore
+    # The host must run models locally, never forward to itself.
+    return EmotionFusionEngine(inference_server=None)
+
+
+@dataclass
+class _PendingRequest:
+    conn: Connection
+    send_lock: threading.Lock
+    request_id: int
+    results: List[Dict[str, float]]
+    remaining: int
+    received_at: float = field(default_factory=time.monotonic)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def complete(self, index: int, scores: Dict[str, float]) -> bool:
+        with self.lock:
+            self.results[index] = scores
+            self.remaining -= 1
+            return self.remaining == 0
+
+
+class BatchStats:
+    """Counters for batch sizes and queueing delay."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.crops = 0
+        self.batches = 0
+        self.max_batch = 0
+        self.batch_sizes: Dict[int, int] = {}
+        self.wait_ms_total = 0.0
+        self.infer_ms_total = 0.0
+
+    def record_request(self, crops: int) -> None:
+        with self._lock:
+            self.requests += 1
+            self.crops += crops
+
+    def record_batch(self, size: int, wait_ms: float, infer_ms: float) -> None:
+        with self._lock:
+            self.batches += 1
+            self.max_batch = max(self.max_batch, size)
+            self.batch_sizes[size] = self.batch_sizes.get(size, 0) + 1
+            self.wait_ms_total += wait_ms
+            self.infer_ms_total += infer_ms
+
+    def snapshot(self, queue_depth: int, clients: int) -> Dict[str, Any]:
+        with self._lock:
+            batches = self.batches or 1
+            return {
+                "clients": clients,
+                "queue_depth": queue_depth,
+                "requests": self.requests,
+                "crops": self.crops,
+                "batches": self.batches,
+                "mean_batch": round(self.crops / batches, 2) if self.batches else 0.0,
+                "max_batch": self.max_batch,
+                "batch_sizes": dict(sorted(self.batch_sizes.items())),
+                "mean_wait_ms": round(self.wait_ms_total / batches, 2),
+                "mean_infer_ms": round(self.infer_ms_total / batches, 2),
+            }
+
+
+class InferenceServer:
+    """Accepts crops over a local socket and classifies them in micro-batches.
+
+    A batch closes when it reaches `max_batch` crops or when the oldest crop
+    has waited `max_latency_ms`, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        address: Address = DEFAULT_ADDRESS,
+        *,
+        engine_factory: Optional[EngineFactory] = None,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_latency_ms: float = DEFAULT_MAX_LATENCY_MS,
+        authkey: Optional[bytes] = None,
+    ) -> None:
+        if isinstance(address, tuple) and not ALLOW_REMOTE and not _is_loopback(address[0]):
+            raise ValueError(f"Refusing to listen on non-loopback host {address[0]!r} without CAMERA_INFERENCE_ALLOW_REMOTE=1.")
+        self.address = address
+        self.engine_factory = engine_factory or _default_engine_factory
+        self.max_batch = max(1, max_batch)
+        self.max_latency = max(0.0, max_latency_ms) / 1000.0
+        self.authkey = authkey if authkey is not None else load_authkey(create=True)
+        self.stats = BatchStats()
+        self.engine: Any = None
+        self._queue: "Queue[Tuple[_PendingRequest, int, Any]]" = Queue()
+        self._clients = 0
+        self._clients_lock = threading.Lock()
+        self._running = False
+        self._listener: Optional[Listener] = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._clients_lock:
+            clients = self._clients
+        return self.stats.snapshot(self._queue.qsize(), clients)
+
+    def serve_forever(self, *, stats_interval: float = 0.0) -> None:
+        self.engine = self.engine_factory()
+        if isinstance(self.address, str):
+            if Path(self.address).parent == RUNTIME_DIR:
+                private_dir()
+            if os.path.exists(self.address):
+                os.unlink(self.address)
+            # Bind under a tight umask so the socket is 0600 from the start, then pin the mode.
+            previous = os.umask(0o177)
+            try:
+                self._listener = Listener(self.address, authkey=self.authkey)
+            finally:
+                os.umask(previous)
+            os.chmod(self.address, 0o600)
+        else:
+            self._listener = Listener(self.address, authkey=self.authkey)
+        self._running = True
+        threading.Thread(target=self._batch_loop, name="inference-batcher", daemon=True).start()
+        if stats_interval > 0:
+            threading.Thread(
+                target=self._report_loop, args=(stats_interval,), name="inference-stats", daemon=True
+            ).start()
+        print(f"Inference server listening on {self.address}", flush=True)
+        try:
+            while self._running:
+                try:
+                    conn = self._listener.accept()
+                except OSError:
+                    break
+                except Exception:  # noqa: BLE001 - failed auth handshakes
+                    continue
+                threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        self._running = False
+        if self._listener is not None:
+            try:
+                self._listener.close()
+            except Exception:
+                pass
+            self._listener = None
+
+    def _serve_client(self, conn: Connection) -> None:
+        send_lock = threading.Lock()
+        with self._clients_lock:
+            self._clients += 1
+        try:
+            while self._running:
+                try:
+                    op, request_id, payload = conn.recv()
+                except (EOFError, OSError):
+                    break
+                if op == "stats":
+                    with send_lock:
+                        conn.send((request_id, self.snapshot()))
+                    continue
+                if op != "analyze":
+                    with send_lock:
+                        conn.send((request_id, {"error": f"unknown op {op!r}"}))
+                    continue
+                crops = list(payload or [])
+                self.stats.record_request(len(crops))
+                if not crops:
+                    with send_lock:
+                        conn.send((request_id, []))
+                    continue
+                request = _PendingRequest(
+                    conn=conn,
+                    send_lock=send_lock,
+                    request_id=request_id,
+                    results=[{} for _ in crops],
+                    remaining=len(crops),
+                )
+                for index, crop in enumerate(crops):
+                    self._queue.put((request, index, crop))
+        finally:
+            with self._clients_lock:
+                self._clients -= 1
+            conn.close()
+
+    def _next_batch(self) -> List[Tuple[_PendingRequest, int, Any]]:
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except Empty:
+            return []
+        deadline = time.monotonic() + self.max_latency
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except Empty:
+                break
+        return batch
+
+    def _batch_loop(self) -> None:
+        while self._running:
+            batch = self._next_batch()
+            if not batch:
+                continue
+            started = time.monotonic()
+            wait_ms = (started - min(item[0].received_at for item in batch)) * 1000.0
+            try:
+                scores = self.engine.analyze_batch([crop for _, _, crop in batch])
+            except Exception:  # noqa: BLE001
+                scores = [{} for _ in batch]
+            self.stats.record_batch(len(batch), wait_ms, (time.monotonic() - started) * 1000.0)
+
+            for (request, index, _), result in zip(batch, scores):
+                if not request.complete(index, result):
+                    continue
+                try:
+                    with request.send_lock:
+                        request.conn.send((request.request_id, request.results))
+                except (OSError, ValueError):
+                    pass
+
+    def _report_loop(self, interval: float) -> None:
+        while self._running:
+            time.sleep(interval)
+            print(f"[inference] {self.snapshot()}", flush=True)
+
+
+class InferenceClient:
+    """Thread-safe client for `InferenceServer`.
+
+    Mirrors `EmotionFusionEngine.analyze`/`analyze_batch`: failures and
+    timeouts yield empty score dicts instead of raising, and reconnects are
+    rate limited so a missing server does not stall the frame loop.
+    """
+
+    def __init__(
+        self,
+        address: Union[Address, str] = DEFAULT_ADDRESS,
+        *,
+        authkey: Optional[bytes] = None,
+        timeout: float = 2.0,
+        retry_interval: float = 2.0,
+    ) -> None:
+        self.address = parse_address(address) if isinstance(address, str) else address
+        self.authkey = authkey
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self._conn: Optional[Connection] = None
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._retry_at = 0.0
+
+    def analyze(self, face_roi: Any) -> Dict[str, float]:
+        if face_roi is None or face_roi.size == 0:
+            return {}
+        return self.analyze_batch([face_roi])[0]
+
+    def analyze_batch(self, face_rois: Sequence[Any]) -> List[Dict[str, float]]:
+        crops = list(face_rois)
+        if not crops:
+            return []
+        reply = self._request("analyze", crops)
+        if not isinstance(reply, list) or len(reply) != len(crops):
+            return [{} for _ in crops]
+        return reply
+
+    def stats(self) -> Dict[str, Any]:
+        reply = self._request("stats", None)
+        return reply if isinstance(reply, dict) else {}
+
+    def close(self) -> None:
+        with self._lock:
+            self._drop_connection()
+
+    def _request(self, op: str, payload: Any) -> Any:
+        with self._lock:
+            conn = self._ensure_connection()
+            if conn is None:
+                return None
+            request_id = next(self._ids)
+            try:
+                conn.send((op, request_id, payload))
+                if not conn.poll(self.timeout):
+                    # A late reply would be matched to the next request; start over.
+                    self._drop_connection()
+                    return None
+                reply_id, reply = conn.recv()
+            except (EOFError, OSError, ValueError):
+                self._drop_connection()
+                return None
+            if reply_id != request_id:
+                self._drop_connection()
+                return None
+            return reply
+
+    def _ensure_connection(self) -> Optional[Connection]:
+        if self._conn is not None:
+            return self._conn
+        now = time.monotonic()
+        if now < self._retry_at:
+            return None
+        try:
+            if self.authkey is None:
+                # Read at connect time: the server may create the key file after this client exists.
+                self.authkey = load_authkey()
+            self._conn = Client(self.address, authkey=self.authkey)
+        except Exception:  # noqa: BLE001
+            self._retry_at = now + self.retry_interval
+            self._conn = None
+        return self._conn
+
+    def _drop_connection(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+        self._retry_at = time.monotonic() + self.retry_interval
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Shared emotion inference host")
+    parser.add_argument(
+        "--address",
+        default=os.getenv("CAMERA_INFERENCE_SERVER", DEFAULT_ADDRESS),
+        help="Unix socket path or host:port",
+    )
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument("--max-latency-ms", type=float, default=DEFAULT_MAX_LATENCY_MS)
+    parser.add_argument("--stats-interval", type=float, default=30.0, help="Seconds between stats lines (0 disables)")
+    args = parser.parse_args(argv)
+
+    server = InferenceServer(
+        parse_address(args.address),
+        max_batch=args.max_batch,
+        max_latency_ms=args.max_latency_ms,
+    )
+    try:
+        server.serve_forever(stats_interval=args.stats_interval)
+    except KeyboardInterrupt:
+        print("\nInference server stopped.")
+
+
+if __name__ == "__main__":
+    main()
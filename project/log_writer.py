@@ -0,0 +1,329 @@
+"""Background, batched writer for append-only logs, with rotation and compression.
+
+    writer = get_log_writer(Path("project/emotion_results.jsonl"))
+    writer.write(json.dumps(entry))
+
+`write()` only appends to an in-memory queue, so capture and session threads
+never wait on the disk. One daemon thread per file writes everything queued
+every `LOG_FLUSH_INTERVAL` seconds (sooner once `LOG_BATCH_LINES` are
+waiting) with a single `write()` and, depending on `LOG_FSYNC`, an fsync.
+
+The live file keeps its name. Once it passes `LOG_ROTATE_BYTES` or has been
+open for `LOG_ROTATE_SECONDS` (counted from when this process opened it), it
+is renamed to
+`<stem>.<UTC start time><suffix>` and compressed with `LOG_COMPRESSION`
+(`gzip`, `zstd` when the `zstandard` package is installed, or `none`) on
+the writer thread. Queued lines are flushed at interpreter exit; a killed
+process loses at most one flush interval.
+"""
+
+from __future__ import annotations
+
+import atexit
+import gzip
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import IO, Any, Deque, Dict, List, Optional, Union
+
+try:
+    from .camera_metrics import metrics
+except ImportError:
+    from camera_metrics import metrics  # type: ignore
+
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "1.0"))
+# Lines that trigger a flush before the interval is up.
+LOG_BATCH_LINES = int(os.getenv("LOG_BATCH_LINES", "256"))
+# "flush": fsync after every batch; "rotate": only when a segment is sealed; "none": leave it to the OS.
+LOG_FSYNC = os.getenv("LOG_FSYNC", "flush")
+# 0 disables either rotation trigger.
+LOG_ROTATE_BYTES = int(os.getenv("LOG_ROTATE_BYTES", str(16 * 1024 * 1024)))
+LOG_ROTATE_SECONDS = float(os.getenv("LOG_ROTATE_SECONDS", "86400"))
+LOG_COMPRESSION = os.getenv("LOG_COMPRESSION", "gzip")
+# Lines held in memory while the disk is behind; beyond that the oldest are dropped.
+LOG_MAX_PENDING = int(os.getenv("LOG_MAX_PENDING", "100000"))
+
+FSYNC_POLICIES = ("flush", "rotate", "none")
+COMPRESSIONS = ("gzip", "zstd", "none")
+_TRUNCATE = object()
+
+
+def _compression_suffix(compression: str) -> str:
+    return {"gzip": ".gz", "zstd": ".zst"}.get(compression, "")
+
+
+class LogWriter:
+    """Owns one append-only file: queues lines, writes them in batches and rotates segments."""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        *,
+        flush_interval: float = LOG_FLUSH_INTERVAL,
+        batch_lines: int = LOG_BATCH_LINES,
+        fsync: str = LOG_FSYNC,
+        rotate_bytes: int = LOG_ROTATE_BYTES,
+        rotate_seconds: float = LOG_ROTATE_SECONDS,
+        compression: str = LOG_COMPRESSION,
+        max_pending: int = LOG_MAX_PENDING,
+    ) -> None:
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy {fsync!r}; expected one of {FSYNC_POLICIES}.")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown log compression {compression!r}; expected one of {COMPRESSIONS}.")
+        if compression == "zstd" and _zstandard() is None:
+            print("[log_writer] zstandard is not installed; compressing rotated logs with gzip.")
+            compression = "gzip"
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.batch_lines = max(1, batch_lines)
+        self.fsync = fsync
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self.compression = compression
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.rotations = 0
+        self.last_error: Optional[str] = None
+        self.last_error_at: Optional[float] = None
+        self.errors = 0
+        self._pending: Deque[Any] = deque(maxlen=max(1, max_pending))
+        self._queued = 0
+        self._done = 0
+        self._handle: Optional[IO[str]] = None
+        self._segment_started = 0.0
+        self._closed = False
+        self._flush_requested = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=f"log-{self.path.name}", daemon=True)
+        self._thread.start()
+
+    def write(self, line: str) -> None:
+        """Queue one line (without its newline); returns immediately."""
+        self._enqueue(line.rstrip("\n"))
+
+    def truncate(self) -> None:
+        """Empty the live file once every line queued before this call is written."""
+        self._enqueue(_TRUNCATE)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued so far is on disk; False on timeout."""
+        with self._cond:
+            target = self._queued
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._done >= target or self._closed, timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "path": str(self.path),
+                "pending": len(self._pending),
+                "written": self.written,
+                "dropped": self.dropped,
+                "flushes": self.flushes,
+                "rotations": self.rotations,
+                "fsync": self.fsync,
+                "compression": self.compression,
+                "errors": self.errors,
+                "last_error": self.last_error,
+                "last_error_at": self.last_error_at,
+            }
+
+    def _enqueue(self, item: Any) -> None:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"Log writer for {self.path} is closed.")
+            if len(self._pending) == self._pending.maxlen:
+                # The deque drops the oldest line; count it as done so flush() still returns.
+                self.dropped += 1
+                self._done += 1
+                metrics.inc("log_dropped_lines_total", log=self.path.name, reason="backlog")
+            self._pending.append(item)
+            self._queued += 1
+            if len(self._pending) >= self.batch_lines:
+                self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._closed or self._flush_requested or len(self._pending) >= self.batch_lines,
+                    self.flush_interval,
+                )
+                self._flush_requested = False
+                batch = list(self._pending)
+                self._pending.clear()
+                closing = self._closed
+            if batch:
+                try:
+                    with metrics.stage("log_flush", log=self.path.name):
+                        self._write_batch(batch)
+                except Exception as exc:  # noqa: BLE001 - reported through stats() and /metrics
+                    # The batch is lost (part of it may have reached the file); keep the thread
+                    # alive so the next batch gets a fresh handle.
+                    self._record_error(exc)
+                    self._close_handle()
+                    lost = sum(1 for item in batch if item is not _TRUNCATE)
+                    with self._cond:
+                        self.dropped += lost
+                    metrics.inc("log_dropped_lines_total", lost, log=self.path.name, reason="write_error")
+                with self._cond:
+                    self._done += len(batch)
+                    self._cond.notify_all()
+            if closing:
+                self._close_handle()
+                return
+
+    def _record_error(self, exc: BaseException) -> None:
+        message = f"{type(exc).__name__}: {exc}"
+        with self._cond:
+            repeated = message == self.last_error
+            self.errors += 1
+            self.last_error = message
+            self.last_error_at = time.time()
+        metrics.inc("log_write_errors_total", log=self.path.name)
+        if not repeated:
+            print(f"[log_writer] {self.path}: {message}")
+
+    def _write_batch(self, batch: list) -> None:
+        lines = []
+        for item in batch:
+            if item is _TRUNCATE:
+                self._write_lines(lines)
+                lines = []
+                self._close_handle()
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self.path.write_text("", encoding="utf-8")
+                continue
+            lines.append(item)
+        self._write_lines(lines)
+
+    def _write_lines(self, lines: list) -> None:
+        if not lines:
+            return
+        handle = self._open()
+        handle.write("\n".join(lines) + "\n")
+        handle.flush()
+        if self.fsync == "flush":
+            os.fsync(handle.fileno())
+        self.written += len(lines)
+        self.flushes += 1
+        if self._rotation_due(handle):
+            self._rotate()
+
+    def _open(self) -> IO[str]:
+        if self._handle is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = self.path.open("a", encoding="utf-8")
+            # A file left by an earlier run counts from now: its age on disk says nothing about
+            # when its segment began, and rotating it on the first write would sweep up old logs.
+            self._segment_started = time.time()
+        return self._handle
+
+    def _close_handle(self) -> None:
+        if self._handle is not None:
+            try:
+                self._handle.close()
+            except OSError:
+                pass
+            self._handle = None
+
+    def _rotation_due(self, handle: IO[str]) -> bool:
+        if self.rotate_bytes > 0 and handle.tell() >= self.rotate_bytes:
+            return True
+        return self.rotate_seconds > 0 and time.time() - self._segment_started >= self.rotate_seconds
+
+    def _rotate(self) -> None:
+        handle = self._handle
+        if handle is not None and self.fsync != "none":
+            os.fsync(handle.fileno())
+        self._close_handle()
+        stamp = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime(self._segment_started))
+        segment = self._segment_path(stamp)
+        os.replace(self.path, segment)
+        self.rotations += 1
+        if self.compression != "none":
+            self._compress(segment)
+
+    def _segment_path(self, stamp: str) -> Path:
+        suffix = _compression_suffix(self.compression)
+        candidate = self.path.with_name(f"{self.path.stem}.{stamp}{self.path.suffix}")
+        counter = 1
+        while candidate.exists() or candidate.with_name(candidate.name + suffix).exists():
+            candidate = self.path.with_name(f"{self.path.stem}.{stamp}-{counter}{self.path.suffix}")
+            counter += 1
+        return candidate
+
+    def _compress(self, segment: Path) -> None:
+        target = segment.with_name(segment.name + _compression_suffix(self.compression))
+        partial = target.with_name(target.name + ".partial")
+        with metrics.stage("log_compress", log=self.path.name):
+            with segment.open("rb") as source:
+                if self.compression == "zstd":
+                    with partial.open("wb") as sink:
+                        _zstandard().ZstdCompressor().copy_stream(source, sink)
+                else:
+                    with gzip.open(partial, "wb") as sink:
+                        shutil.copyfileobj(source, sink)
+            os.replace(partial, target)
+            segment.unlink()
+
+
+def _zstandard() -> Any:
+    try:
+        import zstandard  # type: ignore
+
+        return zstandard
+    except ImportError:
+        return None
+
+
+_writers: Dict[Path, LogWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_log_writer(path: Union[str, Path]) -> LogWriter:
+    """Process-wide writer for `path`, created on first use."""
+    # Imported as both `project.log_writer` and `log_writer`; two writers rotating one file would collide.
+    canonical = sys.modules.get("project.log_writer")
+    if canonical is not None and canonical is not sys.modules.get(__name__):
+        return canonical.get_log_writer(path)
+    key = Path(path).resolve()
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = _writers[key] = LogWriter(path)
+        return writer
+
+
+def log_writer_stats() -> List[Dict[str, Any]]:
+    """`stats()` of every open writer."""
+    canonical = sys.modules.get("project.log_writer")
+    if canonical is not None and canonical is not sys.modules.get(__name__):
+        return canonical.log_writer_stats()
+    with _writers_lock:
+        writers = list(_writers.values())
+    return [writer.stats() for writer in writers]
+
+
+@atexit.register
+def close_log_writers() -> None:
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
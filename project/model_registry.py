@@ -0,0 +1,218 @@
+"""Process-wide registry that loads each vision model once and shares it safely."""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None  # type: ignore[assignment]
+
+Loader = Callable[[], Any]
+
+
+def current_rss_bytes() -> int:
+    """Best-effort resident set size of this process."""
+    try:
+        import psutil  # type: ignore
+
+        return int(psutil.Process().memory_info().rss)
+    except Exception:
+        pass
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is not None:
+        # Peak rather than current RSS, but still shows what a load added.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return int(peak if sys.platform == "darwin" else peak * 1024)
+    return 0
+
+
+class LockedModel:
+    """Proxy that serializes every method call on a shared, non-reentrant model."""
+
+    def __init__(self, model: Any) -> None:
+        self._model = model
+        self._lock = threading.RLock()
+
+    @property
+    def wrapped(self) -> Any:
+        return self._model
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._model, name)
+        if not callable(attr):
+            return attr
+
+        def _locked(*args: Any, **kwargs: Any) -> Any:
+            with self._lock:
+                return attr(*args, **kwargs)
+
+        return _locked
+
+
+class _Entry:
+    def __init__(self, name: str, loader: Loader, pooled: bool) -> None:
+        self.name = name
+        self.loader = loader
+        self.pooled = pooled
+        self.loaded = False
+        self.value: Any = None
+        self.error: Optional[str] = None
+        self.load_seconds: List[float] = []
+        self.rss_delta_bytes: List[int] = []
+        self.loaded_at: Optional[str] = None
+        self.idle: List[Any] = []
+        self.in_use = 0
+
+
+class ModelRegistry:
+    """Loads models lazily, once per process, and reports what each load cost.
+
+    Shared models (`register`) are built once and handed out behind a
+    `LockedModel` so concurrent callers never run them re-entrantly.
+    Pooled models (`register_pool`) are stateful graphs such as MediaPipe
+    video-mode trackers: each caller leases an exclusive instance with
+    `acquire()` and returns it with `release()`, so instances are reused
+    across requests instead of rebuilt.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        # Loads are serialized so RSS deltas are attributable to one model.
+        self._load_lock = threading.RLock()
+
+    def register(self, name: str, loader: Loader) -> None:
+        with self._lock:
+            self._entries[name] = _Entry(name, loader, pooled=False)
+
+    def register_pool(self, name: str, loader: Loader) -> None:
+        with self._lock:
+            self._entries[name] = _Entry(name, loader, pooled=True)
+
+    def __contains__(self, name: str) -> bool:
+        with self._lock:
+            return name in self._entries
+
+    def get(self, name: str) -> Any:
+        """Return the shared handle for `name`, loading it on first use.
+
+        Returns None when the model is unavailable; failed loads are not retried.
+        """
+        entry = self._entry(name)
+        if entry.pooled:
+            raise ValueError(f"{name!r} is pooled; use acquire()/release().")
+        if entry.loaded:
+            return entry.value
+        with self._load_lock:
+            if not entry.loaded:
+                model = self._load(entry)
+                entry.value = None if model is None else LockedModel(model)
+                entry.loaded = True
+        return entry.value
+
+    def acquire(self, name: str) -> Any:
+        """Lease an exclusive instance of a pooled model."""
+        entry = self._entry(name)
+        if not entry.pooled:
+            raise ValueError(f"{name!r} is shared; use get().")
+        with self._lock:
+            if entry.idle:
+                entry.in_use += 1
+                return entry.idle.pop()
+        with self._load_lock:
+            instance = self._load(entry)
+            entry.loaded = True
+        if instance is None:
+            return None
+        with self._lock:
+            entry.in_use += 1
+        return instance
+
+    def release(self, name: str, instance: Any) -> None:
+        if instance is None:
+            return
+        entry = self._entry(name)
+        with self._lock:
+            entry.in_use = max(0, entry.in_use - 1)
+            entry.idle.append(instance)
+
+    @contextmanager
+    def lease(self, name: str) -> Iterator[Any]:
+        """`with registry.lease(name) as model:` form of `acquire()`/`release()`."""
+        instance = self.acquire(name)
+        try:
+            yield instance
+        finally:
+            self.release(name, instance)
+
+    def preload(self, names: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Load the given models (default: all) and return `stats()`."""
+        for name in list(names) if names is not None else list(self._entries):
+            entry = self._entry(name)
+            if entry.pooled:
+                self.release(name, self.acquire(name))
+            else:
+                self.get(name)
+        return self.stats()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            entries = list(self._entries.values())
+        report: Dict[str, Dict[str, Any]] = {}
+        for entry in entries:
+            item: Dict[str, Any] = {
+                "kind": "pooled" if entry.pooled else "shared",
+                "loaded": entry.loaded,
+                "available": entry.error is None,
+                "loaded_at": entry.loaded_at,
+                "load_seconds": round(entry.load_seconds[0], 3) if entry.load_seconds else None,
+                "rss_delta_mb": (
+                    round(entry.rss_delta_bytes[0] / (1024 * 1024), 1) if entry.rss_delta_bytes else None
+                ),
+            }
+            if entry.pooled:
+                item["instances"] = len(entry.load_seconds)
+                item["in_use"] = entry.in_use
+                item["idle"] = len(entry.idle)
+            if entry.error:
+                item["error"] = entry.error
+            report[entry.name] = item
+        return report
+
+    def _entry(self, name: str) -> _Entry:
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is None:
+            raise KeyError(f"Unknown model {name!r}")
+        return entry
+
+    def _load(self, entry: _Entry) -> Any:
+        rss_before = current_rss_bytes()
+        started = time.perf_counter()
+        try:
+            model = entry.loader()
+            if model is None and entry.error is None:
+                entry.error = "unavailable"
+        except Exception as exc:  # noqa: BLE001 - a missing model must not break callers
+            model = None
+            entry.error = f"{type(exc).__name__}: {exc}"
+        entry.load_seconds.append(time.perf_counter() - started)
+        entry.rss_delta_bytes.append(max(0, current_rss_bytes() - rss_before))
+        if entry.loaded_at is None:
+            entry.loaded_at = datetime.now(timezone.utc).isoformat()
+        return model
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,217 @@
+"""ROI-limited overlay drawing for the camera preview.
+
+Translucent panels, face fills and the face mesh are blended only inside
+their bounding boxes instead of copying and re-blending the whole frame.
+Grid masks are cached per ROI size and text that only changes with the
+conversation state is rendered once into a layer and blitted afterwards.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+Color = Tuple[int, int, int]
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+@dataclass(frozen=True)
+class TextLine:
+    text: str
+    # Baseline offset from the layer origin, matching the `org` passed to cv2.putText.
+    dx: int
+    dy: int
+    scale: float
+    color: Color
+    thickness: int = 1
+
+
+@dataclass
+class TextLayer:
+    # Text drawn over black (colour premultiplied by coverage) and `255 - coverage` per channel.
+    image: np.ndarray
+    inverse_alpha: np.ndarray
+    # Position of the layer's top-left corner relative to the origin it is drawn at.
+    offset: Tuple[int, int]
+
+
+def _clip(frame_shape, x1: int, y1: int, x2: int, y2: int) -> Optional[Tuple[int, int, int, int]]:
+    h, w = frame_shape[:2]
+    x1, y1 = max(int(x1), 0), max(int(y1), 0)
+    x2, y2 = min(int(x2), w), min(int(y2), h)
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return x1, y1, x2, y2
+
+
+class _LRU(OrderedDict):
+    def __init__(self, capacity: int) -> None:
+        super().__init__()
+        self.capacity = capacity
+
+    def lookup(self, key: Hashable, build: Callable[[], object]) -> object:
+        if key in self:
+            self.move_to_end(key)
+            return self[key]
+        value = build()
+        self[key] = value
+        if len(self) > self.capacity:
+            self.popitem(last=False)
+        return value
+
+
+class OverlayCompositor:
+    """Caches grid masks, scratch buffers and text layers across frames.
+
+    Not thread-safe; give each render loop its own instance.
+    """
+
+    def __init__(self, *, cache_size: int = 64) -> None:
+        self._grids = _LRU(cache_size)
+        self._layers = _LRU(cache_size)
+        self._buffers: Dict[str, np.ndarray] = {}
+
+    # -- blending -----------------------------------------------------------
+
+    def blend_rect(self, frame: np.ndarray, top_left, bottom_right, color: Color, alpha: float) -> None:
+        """Same result as drawing a filled rectangle on a copy and `addWeighted`-ing it back."""
+        box = _clip(frame.shape, top_left[0], top_left[1], bottom_right[0] + 1, bottom_right[1] + 1)
+        if box is None:
+            return
+        x1, y1, x2, y2 = box
+        roi = frame[y1:y2, x1:x2]
+        self._tint(roi, roi, color, alpha)
+
+    def blend_polygon(self, frame: np.ndarray, contour: np.ndarray, color: Color, alpha: float) -> None:
+        """Tint the inside of `contour` without touching pixels outside its bounding box."""
+        box = _clip(frame.shape, *self._bounds(contour, pad=1))
+        if box is None:
+            return
+        x1, y1, x2, y2 = box
+        roi = frame[y1:y2, x1:x2]
+        mask = self._buffer("mask", roi.shape[:2])
+        cv2.fillPoly(mask, [contour], 255, offset=(-x1, -y1))
+        blended = self._buffer("blend", roi.shape, clear=False)
+        self._tint(roi, blended, color, alpha)
+        cv2.copyTo(blended, mask, roi)
+
+    def draw_mesh(
+        self,
+        frame: np.ndarray,
+        bbox: Tuple[int, int, int, int],
+        contour: np.ndarray,
+        *,
+        color: Color = (255, 255, 255),
+        spacing: int = 15,
+        strength: float = 0.7,
+        outline: int = 2,
+    ) -> None:
+        """Grid clipped to the face contour plus the contour outline, added at `strength`."""
+        bx1, by1, bx2, by2 = bbox
+        cx1, cy1, cx2, cy2 = self._bounds(contour, pad=outline)
+        box = _clip(frame.shape, min(bx1, cx1), min(by1, cy1), max(bx2 + 1, cx2), max(by2 + 1, cy2))
+        if box is None:
+            return
+        x1, y1, x2, y2 = box
+        roi = frame[y1:y2, x1:x2]
+
+        # The grid is anchored at the face box, so its pattern only depends on the box size.
+        mask = self._buffer("mask", roi.shape[:2])
+        grid = self._grid(by2 - by1, bx2 - bx1, spacing)
+        gx, gy = max(bx1 - x1, 0), max(by1 - y1, 0)
+        gh, gw = min(grid.shape[0], mask.shape[0] - gy), min(grid.shape[1], mask.shape[1] - gx)
+        mask[gy:gy + gh, gx:gx + gw] = grid[:gh, :gw]
+
+        inside = self._buffer("inside", roi.shape[:2])
+        cv2.fillPoly(inside, [contour], 255, offset=(-x1, -y1))
+        cv2.bitwise_and(mask, inside, dst=mask)
+        cv2.polylines(mask, [contour - np.array([x1, y1], dtype=contour.dtype)], True, 255, outline)
+
+        boost = tuple(int(round(channel * strength)) for channel in color) + (0,)
+        cv2.add(roi, boost, dst=roi, mask=mask)
+
+    # -- text ---------------------------------------------------------------
+
+    def text_layer(self, key: Hashable, build_lines: Callable[[], Sequence[TextLine]]) -> Optional[TextLayer]:
+        """Rendered layer for `key`; `build_lines` runs only when `key` is new."""
+        return self._layers.lookup(key, lambda: self._render(build_lines()))
+
+    def blit(self, frame: np.ndarray, layer: Optional[TextLayer], origin: Tuple[int, int]) -> None:
+        if layer is None:
+            return
+        x0, y0 = origin[0] + layer.offset[0], origin[1] + layer.offset[1]
+        h, w = layer.image.shape[:2]
+        box = _clip(frame.shape, x0, y0, x0 + w, y0 + h)
+        if box is None:
+            return
+        x1, y1, x2, y2 = box
+        src = (slice(y1 - y0, y2 - y0), slice(x1 - x0, x2 - x0))
+        roi = frame[y1:y2, x1:x2]
+        # Alpha-composite so anti-aliased glyph edges match cv2.putText on the frame itself.
+        scratch = self._buffer("text", roi.shape, clear=False)
+        cv2.multiply(roi, layer.inverse_alpha[src], dst=scratch, scale=1.0 / 255.0)
+        cv2.add(scratch, layer.image[src], dst=roi)
+
+    # -- caches -------------------------------------------------------------
+
+    def _render(self, lines: Sequence[TextLine]) -> Optional[TextLayer]:
+        lines = [line for line in lines if line.text]
+        if not lines:
+            return None
+        boxes: List[Tuple[int, int, int, int]] = []
+        for line in lines:
+            (width, height), baseline = cv2.getTextSize(line.text, FONT, line.scale, line.thickness)
+            pad = line.thickness
+            boxes.append(
+                (line.dx - pad, line.dy - height - pad, line.dx + width + pad, line.dy + baseline + pad)
+            )
+        left = min(box[0] for box in boxes)
+        top = min(box[1] for box in boxes)
+        right = max(box[2] for box in boxes)
+        bottom = max(box[3] for box in boxes)
+        image = np.zeros((bottom - top, right - left, 3), dtype=np.uint8)
+        coverage = np.zeros(image.shape[:2], dtype=np.uint8)
+        for line in lines:
+            org = (line.dx - left, line.dy - top)
+            cv2.putText(image, line.text, org, FONT, line.scale, line.color, line.thickness)
+            cv2.putText(coverage, line.text, org, FONT, line.scale, 255, line.thickness)
+        inverse_alpha = cv2.cvtColor(255 - coverage, cv2.COLOR_GRAY2BGR)
+        return TextLayer(image=image, inverse_alpha=inverse_alpha, offset=(left, top))
+
+    @staticmethod
+    def _tint(src: np.ndarray, dst: np.ndarray, color: Color, alpha: float) -> None:
+        # `(1 - alpha) * src + alpha * color` with the colour as a scalar, so no solid image is needed.
+        cv2.convertScaleAbs(src, dst=dst, alpha=1.0 - alpha)
+        cv2.add(dst, tuple(channel * alpha for channel in color) + (0,), dst=dst)
+
+    def _grid(self, height: int, width: int, spacing: int) -> np.ndarray:
+        def build() -> np.ndarray:
+            # Lines run from the box's first to its last pixel inclusive, like cv2.line.
+            grid = np.zeros((height + 1, width + 1), dtype=np.uint8)
+            grid[0:height:spacing, :] = 255
+            grid[:, 0:width:spacing] = 255
+            return grid
+
+        return self._grids.lookup((height, width, spacing), build)
+
+    def _buffer(self, name: str, shape, *, clear: bool = True) -> np.ndarray:
+        """Grow-only scratch buffer viewed as `shape`; zeroed unless `clear=False`."""
+        size = int(np.prod(shape))
+        data = self._buffers.get(name)
+        if data is None or data.size < size:
+            data = self._buffers[name] = np.empty(size, dtype=np.uint8)
+        view = data[:size].reshape(shape)
+        if clear:
+            view.fill(0)
+        return view
+
+    @staticmethod
+    def _bounds(contour: np.ndarray, pad: int = 0) -> Tuple[int, int, int, int]:
+        points = contour.reshape(-1, 2)
+        x1, y1 = points.min(axis=0)
+        x2, y2 = points.max(axis=0)
+        return int(x1) - pad, int(y1) - pad, int(x2) + pad + 1, int(y2) + pad + 1
@@ -0,0 +1,146 @@
+"""Keeps the visualizer on a frame-time budget by trading analysis quality for speed.
+
+The controller watches how long each frame takes to process (everything but
+waiting for the camera) and walks a ladder of quality levels: analyze fewer
+frames, run MediaPipe on a smaller image, preprocess faces more cheaply and
+finally drop FER in favour of DeepFace alone. It steps down as soon as the
+smoothed frame time exceeds the budget and only steps back up after a run of
+comfortably fast frames, so it does not oscillate.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Sequence
+
+try:
+    from .camera_metrics import metrics
+    from .face_preprocess import FIDELITY_LEVELS
+except ImportError:
+    from camera_metrics import metrics  # type: ignore
+    from face_preprocess import FIDELITY_LEVELS  # type: ignore
+
+# 0 disables the controller; when both are set the stricter budget applies.
+TARGET_FPS = float(os.getenv("CAMERA_TARGET_FPS", "0"))
+TARGET_LATENCY_MS = float(os.getenv("CAMERA_TARGET_LATENCY_MS", "0"))
+
+
+@dataclass(frozen=True)
+class QualityLevel:
+    analysis_stride: int
+    # Fraction of the frame size MediaPipe sees; boxes and landmarks are relative, so they map back exactly.
+    detection_scale: float
+    fidelity: str
+    use_fer: bool
+
+
+# Best first. Each step removes the cheapest-to-lose quality for the largest saving.
+QUALITY_LADDER = (
+    QualityLevel(analysis_stride=1, detection_scale=1.0, fidelity="full", use_fer=True),
+    QualityLevel(analysis_stride=2, detection_scale=1.0, fidelity="full", use_fer=True),
+    QualityLevel(analysis_stride=2, detection_scale=1.0, fidelity="balanced", use_fer=True),
+    QualityLevel(analysis_stride=2, detection_scale=0.75, fidelity="balanced", use_fer=False),
+    QualityLevel(analysis_stride=3, detection_scale=0.75, fidelity="fast", use_fer=False),
+    QualityLevel(analysis_stride=4, detection_scale=0.5, fidelity="fast", use_fer=False),
+    QualityLevel(analysis_stride=6, detection_scale=0.5, fidelity="off", use_fer=False),
+)
+
+
+class AdaptiveQualityController:
+    """Picks a `QualityLevel` from observed frame times.
+
+    `observe()` is called once per frame with that frame's processing time and
+    returns the level to use for the next frame.
+    """
+
+    def __init__(
+        self,
+        *,
+        target_fps: float = 0.0,
+        target_latency_ms: float = 0.0,
+        ladder: Sequence[QualityLevel] = QUALITY_LADDER,
+        start_level: int = 1,
+        smoothing: float = 0.2,
+        upgrade_margin: float = 0.6,
+        upgrade_after: int = 45,
+        settle_frames: int = 10,
+        source: str = "visualizer",
+    ) -> None:
+        budgets = [1000.0 / target_fps if target_fps > 0 else 0.0, target_latency_ms]
+        budgets = [value for value in budgets if value > 0]
+        if not budgets:
+            raise ValueError("AdaptiveQualityController needs target_fps or target_latency_ms.")
+        self.budget_ms = min(budgets)
+        self.ladder = tuple(ladder)
+        self.index = min(max(start_level, 0), len(self.ladder) - 1)
+        self.smoothing = smoothing
+        # Step back up only when frames are this fraction of the budget or faster.
+        self.upgrade_margin = upgrade_margin
+        self.upgrade_after = upgrade_after
+        # Frames to ignore after a change while caches and buffers adjust.
+        self.settle_frames = settle_frames
+        self.source = source
+        self.frame_ms = 0.0
+        self.changes = 0
+        self._fast_streak = 0
+        self._settling = settle_frames
+        self._lock = threading.Lock()
+        self._publish()
+
+    @classmethod
+    def from_env(cls, **kwargs: Any) -> Optional["AdaptiveQualityController"]:
+        """Controller for `CAMERA_TARGET_FPS` / `CAMERA_TARGET_LATENCY_MS`, or None when neither is set."""
+        if TARGET_FPS <= 0 and TARGET_LATENCY_MS <= 0:
+            return None
+        return cls(target_fps=TARGET_FPS, target_latency_ms=TARGET_LATENCY_MS, **kwargs)
+
+    @property
+    def level(self) -> QualityLevel:
+        return self.ladder[self.index]
+
+    def observe(self, frame_seconds: float) -> QualityLevel:
+        frame_ms = frame_seconds * 1000.0
+        with self._lock:
+            self.frame_ms = frame_ms if not self.frame_ms else self.frame_ms + self.smoothing * (frame_ms - self.frame_ms)
+            if self._settling > 0:
+                self._settling -= 1
+                return self.level
+            if self.frame_ms > self.budget_ms and self.index < len(self.ladder) - 1:
+                self._move(+1)
+            elif self.frame_ms < self.budget_ms * self.upgrade_margin and self.index > 0:
+                self._fast_streak += 1
+                if self._fast_streak >= self.upgrade_after:
+                    self._move(-1)
+            else:
+                self._fast_streak = 0
+            return self.level
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "level": self.index,
+                "levels": len(self.ladder),
+                "budget_ms": round(self.budget_ms, 2),
+                "frame_ms": round(self.frame_ms, 2),
+                "changes": self.changes,
+                **asdict(self.level),
+            }
+
+    def _move(self, step: int) -> None:
+        self.index += step
+        self.changes += 1
+        self._fast_streak = 0
+        self._settling = self.settle_frames
+        self._publish()
+
+    def _publish(self) -> None:
+        level = self.level
+        source = self.source
+        metrics.set("camera_quality_level", self.index, source=source)
+        metrics.set("camera_analysis_stride", level.analysis_stride, source=source)
+        metrics.set("camera_detection_scale", level.detection_scale, source=source)
+        metrics.set("camera_fer_enabled", float(level.use_fer), source=source)
+        for name in FIDELITY_LEVELS:
+            metrics.set("camera_preprocess_fidelity", float(name == level.fidelity), source=source, fidelity=name)
@@ -0,0 +1,109 @@
+"""Skips emotion inference for face crops that have barely changed.
+
+When someone holds still, consecutive crops differ by little more than
+sensor noise. `ScoreReuseGate` keeps a 16x16 grayscale thumbnail of the last
+crop that was actually analyzed. It hands back that crop's scores while new
+crops stay within `threshold` of it (mean absolute difference, as a fraction
+of full scale), for at most `max_reuse` frames in a row. Comparing against
+the analyzed crop rather than the previous frame means slow drift still
+triggers a fresh analysis.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import cv2
+import numpy as np
+
+try:
+    from .camera_metrics import metrics
+except ImportError:
+    from camera_metrics import metrics  # type: ignore
+
+# 0 disables reuse. 0.02 is about 5 grey levels of average change.
+REUSE_THRESHOLD = float(os.getenv("CAMERA_REUSE_THRESHOLD", "0.02"))
+# Consecutive frames that may reuse one analysis before it is refreshed regardless.
+REUSE_MAX_FRAMES = int(os.getenv("CAMERA_REUSE_MAX_FRAMES", "10"))
+THUMBNAIL_SIZE = 16
+
+
+class ScoreReuseGate:
+    def __init__(
+        self,
+        threshold: float = REUSE_THRESHOLD,
+        max_reuse: int = REUSE_MAX_FRAMES,
+        source: str = "fusion",
+    ) -> None:
+        self.threshold = threshold
+        self.max_reuse = max_reuse
+        self.source = source
+        self.hits = 0
+        self.misses = 0
+        self.last_difference = 0.0
+        self._thumbnail: Optional[np.ndarray] = None
+        self._scores: Any = None
+        self._streak = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0 and self.max_reuse > 0
+
+    @staticmethod
+    def thumbnail(face_roi: np.ndarray) -> np.ndarray:
+        gray = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY) if face_roi.ndim == 3 else face_roi
+        return cv2.resize(gray, (THUMBNAIL_SIZE, THUMBNAIL_SIZE), interpolation=cv2.INTER_AREA).astype(np.float32)
+
+    def lookup(self, face_roi: np.ndarray) -> "tuple[Any, Optional[np.ndarray]]":
+        """`(scores, None)` to reuse, or `(None, thumbnail)` to analyze and then `store()` the result."""
+        thumbnail = self.thumbnail(face_roi)
+        with self._lock:
+            if self._thumbnail is None:
+                reason = "first"
+            elif self._streak >= self.max_reuse:
+                reason = "expired"
+            else:
+                self.last_difference = float(np.abs(thumbnail - self._thumbnail).mean()) / 255.0
+                reason = "changed" if self.last_difference > self.threshold else None
+            if reason is None:
+                self._streak += 1
+                self.hits += 1
+                scores = self._scores
+            else:
+                self.misses += 1
+        if reason is None:
+            metrics.inc("camera_score_reuse_total", result="hit", source=self.source)
+            return scores, None
+        metrics.inc("camera_score_reuse_total", result=reason, source=self.source)
+        return None, thumbnail
+
+    def store(self, thumbnail: np.ndarray, scores: Any) -> None:
+        with self._lock:
+            if not scores:
+                # Nothing answered in time; let the next frame try again.
+                self._thumbnail = None
+                return
+            self._thumbnail = thumbnail
+            self._scores = scores
+            self._streak = 0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._thumbnail = None
+            self._scores = None
+            self._streak = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "threshold": self.threshold,
+                "max_reuse": self.max_reuse,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "last_difference": round(self.last_difference, 4),
+            }
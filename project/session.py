@@ -12,7 +12,7 @@ BASE_DIR = Path(__file__).resolve().parent
 if str(BASE_DIR) not in sys.path:
     sys.path.append(str(BASE_DIR))
 
-from camera import cv2, DeepFace, FER, format_spectrum
+from camera import cv2, emotion_backend_available, format_spectrum
 from session_service import SessionService, _default_hook
 from gemini_client1 import get_trip_response
 from session_config import LISTEN_SECONDS, QUESTIONS, UI_WINDOW_NAME, WARMUP_SECONDS
@@ -24,8 +24,8 @@ def _ensure_dependencies() -> None:
     missing = []
     if cv2 is None:
         missing.append("cv2")
-    if DeepFace is None and FER is None:
-        missing.append("deepface/fer")
+    if not emotion_backend_available():
+        missing.append("an emotion backend (deepface/fer, or onnxruntime with CAMERA_ONNX_MODEL)")
     if missing:
         raise RuntimeError(
             "Missing required dependencies: " + ", ".join(missing) + ". "
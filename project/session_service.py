@@ -7,7 +7,8 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Callable, Dict, List, Optional, Tuple, Any
 
-from camera import EmotionVisualizer
+from camera import SHOW_PREVIEW_WINDOW, EmotionVisualizer
+from camera_broker import BrokerVisualizer, get_broker
 from elabs1 import log_conversation, record_audio, transcribe_audio
 from session_config import LISTEN_SECONDS, QUESTIONS, UI_WINDOW_NAME, WARMUP_SECONDS
 from audio_service import synthesize_prompt_audio
@@ -29,7 +30,10 @@ class SessionService:
     """Wraps the session flow so it can be reused outside the CLI."""
 
     on_event: SessionEventHook = _default_hook
-    visualizer: EmotionVisualizer = field(default_factory=EmotionVisualizer)
+    # Shares the broker's camera with API streams; frames are only annotated when previewed.
+    visualizer: EmotionVisualizer = field(
+        default_factory=lambda: BrokerVisualizer(get_broker(), annotated=SHOW_PREVIEW_WINDOW)
+    )
     history: List[Tuple[str, str]] = field(default_factory=list)
     results: List[Dict[str, object]] = field(default_factory=list)
 
@@ -0,0 +1,260 @@
+"""Shared MJPEG encoding for every `/camera/stream` viewer.
+
+One encoder thread reads annotated frames from the camera broker and
+JPEG-encodes each frame once per distinct `(width, quality)` variant that
+viewers asked for. All viewers of a variant receive the same bytes, so an
+extra viewer costs bandwidth, not CPU. Each viewer only ever takes the
+newest encoded frame; a viewer whose socket backs up skips the frames it
+missed instead of queueing them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+import cv2
+
+try:
+    from .camera_metrics import metrics
+except ImportError:
+    from camera_metrics import metrics  # type: ignore
+
+BOUNDARY = "frame"
+MIN_QUALITY = 10
+MAX_QUALITY = 95
+# Viewers are grouped by quality rounded to this step so near-identical requests share an encode.
+QUALITY_STEP = 5
+MIN_WIDTH = 64
+# Attempts to reopen the broker subscription after the pipeline fails or switches source.
+RESUBSCRIBE_ATTEMPTS = 3
+RESUBSCRIBE_BACKOFF = 0.5
+
+VariantKey = Tuple[Optional[int], int]
+
+
+@dataclass
+class EncodedFrame:
+    frame_id: int
+    timestamp: float
+    jpeg: bytes
+
+    def part(self) -> bytes:
+        return (
+            b"--" + BOUNDARY.encode() + b"\r\n"
+            b"Content-Type: image/jpeg\r\n"
+            b"Content-Length: " + str(len(self.jpeg)).encode() + b"\r\n\r\n" + self.jpeg + b"\r\n"
+        )
+
+
+@dataclass
+class _Viewer:
+    loop: asyncio.AbstractEventLoop
+    event: asyncio.Event
+    interval: float
+    sent: int = 0
+    skipped: int = 0
+
+
+@dataclass
+class _Variant:
+    width: Optional[int]
+    quality: int
+    viewers: Dict[int, _Viewer] = field(default_factory=dict)
+    latest: Optional[EncodedFrame] = None
+    encoded: int = 0
+    encode_ms: float = 0.0
+    _next_due: float = 0.0
+
+    def interval(self) -> float:
+        # Encode as often as the fastest viewer of this variant wants frames.
+        return min((viewer.interval for viewer in self.viewers.values()), default=0.0)
+
+
+def stream_params(fps: Optional[float], width: Optional[int], quality: Optional[int], defaults: Dict[str, Any]) -> Tuple[float, Optional[int], int]:
+    """Clamp per-connection query parameters to supported values."""
+    fps = float(fps if fps is not None else defaults["fps"])
+    fps = min(max(fps, 0.5), 60.0)
+    width = width if width is not None else defaults.get("width")
+    if width is not None:
+        width = max(int(width), MIN_WIDTH)
+    quality = int(quality if quality is not None else defaults["quality"])
+    quality = min(max(int(round(quality / QUALITY_STEP) * QUALITY_STEP), MIN_QUALITY), MAX_QUALITY)
+    return fps, width, quality
+
+
+class MjpegHub:
+    """Encodes broker frames once per variant and wakes the viewers of that variant."""
+
+    def __init__(self, broker: Any) -> None:
+        self.broker = broker
+        self._variants: Dict[VariantKey, _Variant] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+
+    async def stream(self, *, fps: float, width: Optional[int], quality: int) -> AsyncIterator[bytes]:
+        """Multipart chunks for one connection; runs on the event loop and never encodes."""
+        key: VariantKey = (width, quality)
+        viewer = _Viewer(asyncio.get_running_loop(), asyncio.Event(), 1.0 / fps)
+        viewer_id = next(self._ids)
+        with self._lock:
+            # Register before the encoder starts: it exits as soon as it finds no variants.
+            variant = self._variants.get(key)
+            if variant is None:
+                variant = self._variants[key] = _Variant(width=width, quality=quality)
+            variant.viewers[viewer_id] = viewer
+        last_id = 0
+        next_due = 0.0
+        try:
+            # Opening the camera blocks; keep it off the event loop.
+            await viewer.loop.run_in_executor(None, self._ensure_encoder)
+            while True:
+                delay = next_due - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                try:
+                    await asyncio.wait_for(viewer.event.wait(), timeout=5.0)
+                except asyncio.TimeoutError:
+                    if self._error is not None:
+                        raise RuntimeError(str(self._error)) from self._error
+                    continue
+                viewer.event.clear()
+                latest = variant.latest
+                if latest is None or latest.frame_id == last_id:
+                    continue
+                if last_id:
+                    skipped = max(latest.frame_id - last_id - 1, 0)
+                    viewer.skipped += skipped
+                    if skipped:
+                        metrics.inc("camera_dropped_frames_total", skipped, reason="stream_viewer")
+                last_id = latest.frame_id
+                next_due = time.monotonic() + viewer.interval
+                viewer.sent += 1
+                # Awaiting the send is where a slow client backs up; frames published meanwhile
+                # only replace `latest`.
+                yield latest.part()
+        finally:
+            self._leave(key, viewer_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self._thread is not None,
+                "variants": [
+                    {
+                        "width": variant.width,
+                        "quality": variant.quality,
+                        "viewers": len(variant.viewers),
+                        "encoded": variant.encoded,
+                        "encode_ms": round(variant.encode_ms, 2),
+                        "bytes": len(variant.latest.jpeg) if variant.latest else 0,
+                        "skipped": sum(viewer.skipped for viewer in variant.viewers.values()),
+                    }
+                    for variant in self._variants.values()
+                ],
+            }
+
+    def _ensure_encoder(self) -> None:
+        with self._lock:
+            if self._thread is not None or not self._variants:
+                return
+            subscription = self.broker.subscribe(annotated=True)
+            self._error = None
+            self._thread = threading.Thread(
+                target=self._run, args=(subscription,), name="mjpeg-encoder", daemon=True
+            )
+            self._thread.start()
+
+    def _leave(self, key: VariantKey, viewer_id: int) -> None:
+        with self._lock:
+            variant = self._variants.get(key)
+            if variant is None:
+                return
+            variant.viewers.pop(viewer_id, None)
+            if not variant.viewers:
+                del self._variants[key]
+
+    def _run(self, subscription: Any) -> None:
+        try:
+            while True:
+                with self._lock:
+                    if not self._variants:
+                        self._thread = None
+                        return
+                try:
+                    item = subscription.get(timeout=0.5)
+                except RuntimeError:
+                    # The pipeline failed or was switched to another source; viewers stay connected.
+                    subscription.close()
+                    subscription = self._resubscribe()
+                    continue
+                if item is None:
+                    continue
+                now = time.monotonic()
+                with self._lock:
+                    due = []
+                    for variant in self._variants.values():
+                        if now >= variant._next_due:
+                            variant._next_due = now + variant.interval()
+                            due.append((variant, list(variant.viewers.values())))
+                for variant, viewers in due:
+                    encoded = self._encode(variant, item)
+                    if encoded is None:
+                        continue
+                    variant.latest = encoded
+                    for viewer in viewers:
+                        try:
+                            viewer.loop.call_soon_threadsafe(viewer.event.set)
+                        except RuntimeError:  # loop already closed; the viewer is going away
+                            pass
+        except Exception as exc:  # noqa: BLE001 - surfaced to viewers on their next wait
+            self._error = exc
+            with self._lock:
+                self._thread = None
+        finally:
+            subscription.close()
+
+    def _resubscribe(self) -> Any:
+        for attempt in range(RESUBSCRIBE_ATTEMPTS):
+            time.sleep(RESUBSCRIBE_BACKOFF * attempt)
+            try:
+                return self.broker.subscribe(annotated=True)
+            except Exception:  # noqa: BLE001 - retried, then surfaced by _run
+                if attempt == RESUBSCRIBE_ATTEMPTS - 1:
+                    raise
+        raise RuntimeError("Could not resubscribe to the camera broker.")
+
+    @staticmethod
+    def _encode(variant: _Variant, item: Any) -> Optional[EncodedFrame]:
+        started = time.perf_counter()
+        frame = item.frame
+        if variant.width is not None and variant.width < frame.shape[1]:
+            height = max(int(round(frame.shape[0] * variant.width / frame.shape[1])), 1)
+            frame = cv2.resize(frame, (variant.width, height), interpolation=cv2.INTER_AREA)
+        ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, variant.quality])
+        if not ok:
+            return None
+        elapsed = (time.perf_counter() - started) * 1000.0
+        metrics.record("jpeg_encode", elapsed / 1000.0)
+        variant.encode_ms = 0.9 * variant.encode_ms + 0.1 * elapsed if variant.encoded else elapsed
+        variant.encoded += 1
+        return EncodedFrame(item.frame_id, item.timestamp, buffer.tobytes())
+
+
+_default_hub: Optional[MjpegHub] = None
+_default_lock = threading.Lock()
+
+
+def get_stream_hub(broker: Any) -> MjpegHub:
+    """Process-wide hub over `broker`."""
+    global _default_hub
+    with _default_lock:
+        if _default_hub is None or _default_hub.broker is not broker:
+            _default_hub = MjpegHub(broker)
+        return _default_hub
@@ -0,0 +1,266 @@
+"""Offline emotion analysis of recorded answer videos.
+
+    python -m project.camera analyze-video project/mock_answer_q1.mp4 recordings/ --stride 3 --workers 4
+
+Frames are decoded as fast as the codec allows (skipped frames are only
+grabbed, never converted), every `stride`-th frame goes through FaceDetection
+and the fused crops are classified `batch_size` at a time with
+`EmotionFusionEngine.analyze_batch`. Each video produces `<stem>.jsonl` in the
+output directory: one `frame` record per analyzed frame followed by a
+`summary` record. The summaries of all videos are also collected in
+`summary.jsonl`. Videos are processed in parallel spawn workers.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import cv2
+
+try:
+    from .camera import (
+        COMPLEX_EMOTION_MIXES,
+        QUESTIONS,
+        ComplexEmotionResolver,
+        EmotionFusionEngine,
+        detect_face_box,
+        model_registry,
+        normalize_emotion_dict,
+    )
+    from .emotion_spectrum import Spectrum, WeightedAccumulator
+except ImportError:
+    from camera import (  # type: ignore
+        COMPLEX_EMOTION_MIXES,
+        QUESTIONS,
+        ComplexEmotionResolver,
+        EmotionFusionEngine,
+        detect_face_box,
+        model_registry,
+        normalize_emotion_dict,
+    )
+    from emotion_spectrum import Spectrum, WeightedAccumulator  # type: ignore
+
+VIDEO_SUFFIXES = (".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v")
+_QUESTION_PATTERN = re.compile(r"q(\d+)", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class VideoAnalysisOptions:
+    stride: int = 3
+    batch_size: int = 16
+    # Stop after this many sampled frames per video; 0 reads the whole video.
+    max_frames: int = 0
+
+
+def find_videos(inputs: List[str]) -> List[Path]:
+    videos: List[Path] = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            videos.extend(sorted(p for p in path.iterdir() if p.suffix.lower() in VIDEO_SUFFIXES))
+        elif path.exists():
+            videos.append(path)
+        else:
+            raise FileNotFoundError(f"No such video or directory: {path}")
+    return videos
+
+
+def question_for(path: Path) -> Tuple[Optional[int], Optional[str]]:
+    """Question number from names like `mock_answer_q2.mp4`, and its text when known."""
+    match = _QUESTION_PATTERN.search(path.stem)
+    if not match:
+        return None, None
+    number = int(match.group(1))
+    text = QUESTIONS[number - 1] if 0 < number <= len(QUESTIONS) else None
+    return number, text
+
+
+def sample_frames(capture: Any, stride: int, max_frames: int = 0) -> Iterator[Tuple[int, Any]]:
+    """`(index, frame)` for every `stride`-th frame; the others are grabbed without decoding to BGR."""
+    index = 0
+    sampled = 0
+    while True:
+        if index % stride:
+            if not capture.grab():
+                return
+        else:
+            ok, frame = capture.read()
+            if not ok:
+                return
+            yield index, frame
+            sampled += 1
+            if max_frames and sampled >= max_frames:
+                return
+        index += 1
+
+
+def analyze_video(path: Path, out_path: Path, options: VideoAnalysisOptions, engine: Any = None) -> Dict[str, Any]:
+    """Write `frame` records and a final `summary` record for one video; return the summary."""
+    capture = cv2.VideoCapture(str(path))
+    if not capture.isOpened():
+        raise RuntimeError(f"Cannot open video {path}")
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    engine = engine or EmotionFusionEngine()
+    resolver = ComplexEmotionResolver(COMPLEX_EMOTION_MIXES)
+    histogram = WeightedAccumulator()
+    question_number, question = question_for(path)
+    frame_weight = options.stride / fps
+
+    sampled = 0
+    analyzed = 0
+    pending: List[Tuple[int, Tuple[int, int, int, int], Any]] = []
+    started = time.perf_counter()
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def flush(handle) -> None:
+        nonlocal analyzed
+        if not pending:
+            return
+        results = engine.analyze_batch([crop for _, _, crop in pending])
+        for (index, bbox, _), scores in zip(pending, results):
+            if not scores:
+                continue
+            spectrum = normalize_emotion_dict(scores)
+            histogram.add(spectrum.vector, frame_weight)
+            analyzed += 1
+            record = {
+                "type": "frame",
+                "video": path.name,
+                "frame": index,
+                "t": round(index / fps, 3),
+                "bbox": list(bbox),
+                "dominant": spectrum.dominant()[0],
+                "spectrum": spectrum.to_dict(),
+            }
+            handle.write(json.dumps(record) + "\n")
+        pending.clear()
+
+    try:
+        with out_path.open("w", encoding="utf-8") as handle, model_registry.lease("face_detection") as detector:
+            for index, frame in sample_frames(capture, max(1, options.stride), options.max_frames):
+                sampled += 1
+                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                bbox = detect_face_box(detector, rgb, frame.shape)
+                if bbox is None:
+                    continue
+                x1, y1, x2, y2 = bbox
+                crop = frame[y1:y2, x1:x2]
+                if crop.size == 0:
+                    continue
+                # The batch outlives this frame, so keep a copy of the crop only.
+                pending.append((index, bbox, crop.copy()))
+                if len(pending) >= options.batch_size:
+                    flush(handle)
+            flush(handle)
+
+            elapsed = time.perf_counter() - started
+            decoded = int(capture.get(cv2.CAP_PROP_POS_FRAMES)) or sampled
+            summary: Dict[str, Any] = {
+                "type": "summary",
+                "video": path.name,
+                "question_number": question_number,
+                "question": question,
+                "frames_decoded": decoded,
+                "frames_sampled": sampled,
+                "frames_analyzed": analyzed,
+                "seconds": round(elapsed, 3),
+                "decode_fps": round(decoded / elapsed, 1) if elapsed else 0.0,
+                "analysis_fps": round(analyzed / elapsed, 1) if elapsed else 0.0,
+                "video_seconds": round(decoded / fps, 3),
+            }
+            if analyzed:
+                spectrum = Spectrum(histogram.mean())
+                label, confidence, _ = resolver.pick_label(spectrum)
+                summary.update(
+                    label=label,
+                    confidence=confidence,
+                    dominant=spectrum.dominant()[0],
+                    spectrum=spectrum.to_dict(),
+                )
+            else:
+                summary.update(label="unknown", confidence=0.0, dominant=None, spectrum={})
+            handle.write(json.dumps(summary) + "\n")
+    finally:
+        capture.release()
+    return summary
+
+
+def _analyze_in_worker(path: str, out_path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    return analyze_video(Path(path), Path(out_path), VideoAnalysisOptions(**options))
+
+
+def analyze_videos(videos: List[Path], out_dir: Path, options: VideoAnalysisOptions, workers: int = 1) -> List[Dict[str, Any]]:
+    """Analyze `videos` (in parallel when `workers > 1`) and write their summaries to `summary.jsonl`."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    jobs = [(video, out_dir / f"{video.stem}.jsonl") for video in videos]
+    summaries: List[Dict[str, Any]] = []
+    if workers <= 1 or len(jobs) <= 1:
+        engine = EmotionFusionEngine()
+        for video, out_path in jobs:
+            summaries.append(analyze_video(video, out_path, options, engine))
+            _report(summaries[-1])
+    else:
+        # Spawned like the inference pool: each worker owns its models and decoder.
+        context = mp.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [
+                pool.submit(_analyze_in_worker, str(video), str(out_path), asdict(options))
+                for video, out_path in jobs
+            ]
+            for future in as_completed(futures):
+                summaries.append(future.result())
+                _report(summaries[-1])
+    summaries.sort(key=lambda summary: (summary["question_number"] or 0, summary["video"]))
+    with (out_dir / "summary.jsonl").open("w", encoding="utf-8") as handle:
+        for summary in summaries:
+            handle.write(json.dumps(summary) + "\n")
+    return summaries
+
+
+def _report(summary: Dict[str, Any]) -> None:
+    print(
+        f"{summary['video']}: {summary['label']} ({summary['confidence']:.2f}) "
+        f"{summary['frames_analyzed']}/{summary['frames_decoded']} frames, "
+        f"{summary['decode_fps']} fps decoded, {summary['analysis_fps']} fps analyzed",
+        file=sys.stderr,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="analyze-video", description="Analyze recorded answer videos offline.")
+    parser.add_argument("inputs", nargs="+", help="video files or directories of videos")
+    parser.add_argument("--out", default="project/video_analysis", help="output directory for JSONL files")
+    parser.add_argument("--stride", type=int, default=VideoAnalysisOptions.stride, help="analyze every Nth frame")
+    parser.add_argument("--batch-size", type=int, default=VideoAnalysisOptions.batch_size)
+    parser.add_argument("--max-frames", type=int, default=0, help="stop after this many sampled frames per video")
+    parser.add_argument("--workers", type=int, default=1, help="videos analyzed in parallel")
+    args = parser.parse_args(argv)
+
+    videos = find_videos(args.inputs)
+    if not videos:
+        parser.error("no videos found")
+    options = VideoAnalysisOptions(stride=max(1, args.stride), batch_size=max(1, args.batch_size), max_frames=args.max_frames)
+    started = time.perf_counter()
+    summaries = analyze_videos(videos, Path(args.out), options, workers=args.workers)
+    elapsed = time.perf_counter() - started
+    decoded = sum(summary["frames_decoded"] for summary in summaries)
+    analyzed = sum(summary["frames_analyzed"] for summary in summaries)
+    print(
+        f"{len(summaries)} videos, {decoded} frames decoded ({decoded / elapsed:.1f} fps), "
+        f"{analyzed} analyzed ({analyzed / elapsed:.1f} fps) in {elapsed:.1f}s -> {args.out}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""ONNX Runtime emotion backend: label mapping, softmax, int8 quantization, no TensorFlow.
+
+Every model here is generated by `benchmarks/onnx_models.build_tiny_model`,
+so nothing is downloaded.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+PROJECT_DIR = ROOT / "project"
+sys.path.insert(0, str(PROJECT_DIR))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from emotion_backends import FER2013_LABELS, OnnxEmotionBackend, quantize_int8  # noqa: E402
+from emotion_spectrum import EMOTION_KEYS  # noqa: E402
+from onnx_models import build_tiny_model  # noqa: E402
+
+HEAVY_MODULES = ("tensorflow", "deepface", "fer", "keras")
+
+
+def _crops(count: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, (int(rng.integers(60, 160)),) * 2 + (3,), dtype=np.uint8) for _ in range(count)]
+
+
+def _softmax(values: Sequence[float]) -> np.ndarray:
+    row = np.asarray(values, dtype=np.float64)
+    row = np.exp(row - row.max())
+    return row / row.sum()
+
+
+@pytest.fixture(autouse=True)
+def _onnx_installed():
+    pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+
+
+def test_metadata_labels_map_onto_emotion_keys(tmp_path):
+    labels = ("neutral", "happy", "contempt", "sad", "angry", "surprise", "fear", "disgust")
+    logits = [0.5, 4.0, 6.0, 0.0, -1.0, 1.0, 0.2, -2.0]
+    backend = OnnxEmotionBackend(build_tiny_model(tmp_path / "relabelled.onnx", labels=labels, logits=logits))
+
+    scores = backend.analyze(_crops(1)[0])
+
+    # "contempt" has no EMOTION_KEYS slot and is dropped; every other class keeps its own probability.
+    assert set(scores) == set(EMOTION_KEYS)
+    expected = dict(zip(labels, _softmax(logits)))
+    for key in EMOTION_KEYS:
+        assert scores[key] == pytest.approx(expected[key], abs=1e-6)
+    assert max(scores, key=scores.get) == "happy"
+
+
+def test_explicit_labels_override_metadata(tmp_path):
+    logits = [3.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+    path = build_tiny_model(tmp_path / "angry_first.onnx", logits=logits)
+    backend = OnnxEmotionBackend(path, labels=tuple(reversed(FER2013_LABELS)))
+
+    scores = backend.analyze(_crops(1)[0])
+
+    assert max(scores, key=scores.get) == FER2013_LABELS[-1]
+
+
+def test_logits_are_softmax_normalised(tmp_path):
+    logits = [2.0, -1.0, 0.5, 3.0, -4.0, 1.0, 0.0]
+    backend = OnnxEmotionBackend(build_tiny_model(tmp_path / "logits.onnx", logits=logits))
+
+    for scores in backend.analyze_batch(_crops(4)):
+        assert sum(scores.values()) == pytest.approx(1.0, abs=1e-5)
+        assert [scores[label] for label in FER2013_LABELS] == pytest.approx(_softmax(logits).tolist(), abs=1e-6)
+
+
+def test_probability_outputs_pass_through(tmp_path):
+    probabilities = [0.1, 0.05, 0.05, 0.5, 0.1, 0.1, 0.1]
+    backend = OnnxEmotionBackend(build_tiny_model(tmp_path / "probs.onnx", logits=probabilities))
+
+    scores = backend.analyze(_crops(1)[0])
+
+    assert [scores[label] for label in FER2013_LABELS] == pytest.approx(probabilities, abs=1e-6)
+
+
+def test_quantize_int8_round_trip(tmp_path):
+    source = build_tiny_model(tmp_path / "tiny.onnx")
+    quantized = quantize_int8(source, tmp_path / "tiny.int8.onnx")
+    crops = _crops(16)
+
+    full = OnnxEmotionBackend(source, name="onnx-float32").analyze_batch(crops)
+    int8 = OnnxEmotionBackend(quantized, name="onnx-int8").analyze_batch(crops)
+
+    assert quantized.stat().st_size < source.stat().st_size / 2
+    for expected, scores in zip(full, int8):
+        assert set(scores) == set(expected)
+        assert sum(scores.values()) == pytest.approx(1.0, abs=1e-5)
+        for key, value in expected.items():
+            assert scores[key] == pytest.approx(value, abs=0.02)
+
+
+def test_onnx_backend_never_imports_tensorflow(tmp_path):
+    model = build_tiny_model(tmp_path / "tiny.onnx")
+    # A fresh interpreter: anything imported by this test session must not count.
+    script = textwrap.dedent(
+        f"""
+        import sys
+        import numpy as np
+        sys.path.insert(0, {str(PROJECT_DIR)!r})
+        from emotion_backends import OnnxEmotionBackend
+        backend = OnnxEmotionBackend({str(model)!r})
+        assert backend.analyze(np.full((96, 96, 3), 127, dtype=np.uint8))
+        print(",".join(name for name in {HEAVY_MODULES!r} if name in sys.modules))
+        """
+    )
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == ""